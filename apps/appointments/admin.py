@@ -1,7 +1,10 @@
 from django.contrib import admin
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 from django.utils.html import format_html
 from .models import Appointment
+from . import availability_cache
+from apps.dashboard import rollups
 
 
 @admin.register(Appointment)
@@ -134,12 +137,16 @@ class AppointmentAdmin(admin.ModelAdmin):
     def confirm_appointments(self, request, queryset):
         """Bulk confirm appointments"""
         from django.utils import timezone
-        updated = queryset.filter(
+        queryset = queryset.filter(
             status=Appointment.Status.PENDING
-        ).update(
-            status=Appointment.Status.CONFIRMED,
-            confirmed_at=timezone.now()
         )
+        # update() bypasses signals, so move the dashboard rollups explicitly
+        with transaction.atomic():
+            rollups.record_update(queryset, status=Appointment.Status.CONFIRMED)
+            updated = queryset.update(
+                status=Appointment.Status.CONFIRMED,
+                confirmed_at=timezone.now()
+            )
         self.message_user(
             request,
             _('%(count)d appointment(s) confirmed successfully') % {'count': updated}
@@ -149,12 +156,18 @@ class AppointmentAdmin(admin.ModelAdmin):
     def cancel_appointments(self, request, queryset):
         """Bulk cancel appointments"""
         from django.utils import timezone
-        updated = queryset.filter(
+        queryset = queryset.filter(
             status__in=[Appointment.Status.PENDING, Appointment.Status.CONFIRMED]
-        ).update(
-            status=Appointment.Status.CANCELED,
-            canceled_at=timezone.now()
         )
+        # update() bypasses signals, so drop cached availability (on commit)
+        # and move the dashboard rollups explicitly
+        with transaction.atomic():
+            availability_cache.invalidate_queryset(queryset)
+            rollups.record_update(queryset, status=Appointment.Status.CANCELED)
+            updated = queryset.update(
+                status=Appointment.Status.CANCELED,
+                canceled_at=timezone.now()
+            )
         self.message_user(
             request,
             _('%(count)d appointment(s) canceled successfully') % {'count': updated}
@@ -163,11 +176,17 @@ class AppointmentAdmin(admin.ModelAdmin):
 
     def complete_appointments(self, request, queryset):
         """Bulk complete appointments"""
-        updated = queryset.filter(
+        queryset = queryset.filter(
             status=Appointment.Status.CONFIRMED
-        ).update(
-            status=Appointment.Status.COMPLETED
         )
+        # update() bypasses signals, so drop cached availability (on commit)
+        # and move the dashboard rollups explicitly
+        with transaction.atomic():
+            availability_cache.invalidate_queryset(queryset)
+            rollups.record_update(queryset, status=Appointment.Status.COMPLETED)
+            updated = queryset.update(
+                status=Appointment.Status.COMPLETED
+            )
         self.message_user(
             request,
             _('%(count)d appointment(s) marked as completed') % {'count': updated}
@@ -0,0 +1,442 @@
+"""
+Batched availability engine
+
+Loads WorkingHour, DayOff and active Appointment rows for many doctors and
+many dates in a fixed number of queries, then computes free intervals in
+memory using sorted interval arithmetic.
+"""
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .bitmap import DayBitmaps, FULL_DAY, grid_mask, intervals_mask
+
+SLOT_MINUTES = 30
+NEXT_SLOT_HORIZON_DAYS = 14
+# Furthest date patients may book, counted from today (see AppointmentCreateForm)
+MAX_BOOKING_DAYS = 90
+# First window scanned by earliest_slots; later windows double in size
+EARLIEST_FIRST_WINDOW_DAYS = 7
+ACTIVE_STATUSES = ['PENDING', 'CONFIRMED']
+
+
+def to_minutes(value):
+    """Convert a time object to minutes since midnight"""
+    return value.hour * 60 + value.minute
+
+
+def from_minutes(minutes):
+    """Convert minutes since midnight to a time object"""
+    return time(minutes // 60, minutes % 60)
+
+
+def service_duration(service):
+    """Length in minutes of an appointment for the given service"""
+    if service is not None and getattr(service, 'duration_minutes', None):
+        return service.duration_minutes
+    return SLOT_MINUTES
+
+
+def merge_intervals(intervals):
+    """Merge overlapping or touching (start, end) intervals"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(base, busy):
+    """
+    Remove busy intervals from base intervals
+
+    Both lists must be sorted and non-overlapping (see merge_intervals).
+    Runs in O(len(base) + len(busy)).
+    """
+    free = []
+    i = 0
+    for start, end in base:
+        cursor = start
+        while i < len(busy) and busy[i][1] <= cursor:
+            i += 1
+        j = i
+        while j < len(busy) and busy[j][0] < end:
+            if busy[j][0] > cursor:
+                free.append((cursor, busy[j][0]))
+            cursor = max(cursor, busy[j][1])
+            j += 1
+        if cursor < end:
+            free.append((cursor, end))
+    return free
+
+
+def fits_in(intervals, starts, start, end):
+    """
+    Whether [start, end) lies inside one of the sorted, merged intervals
+
+    ``starts`` is the list of interval start points, used for an O(log n)
+    lookup of the only candidate interval.
+    """
+    i = bisect_right(starts, start) - 1
+    return i >= 0 and end <= intervals[i][1]
+
+
+def compute_slots(working, free, date, duration, slot_minutes=SLOT_MINUTES, now=None):
+    """
+    Bookable slot start times from working and free intervals
+
+    Slots are aligned to the start of each working period and stepped by
+    slot_minutes; a slot is bookable when [start, start + duration) fits
+    inside a free interval, so longer services only get slots they can
+    actually complete. Past slots are dropped for today.
+    """
+    now = now or timezone.localtime()
+    if date < now.date():
+        return []
+    cutoff = to_minutes(now.time()) if date == now.date() else -1
+
+    free_starts = [f_start for f_start, _ in free]
+    result = []
+    for work_start, work_end in working:
+        start = work_start
+        while start + duration <= work_end:
+            if start > cutoff and fits_in(free, free_starts, start, start + duration):
+                result.append(from_minutes(start))
+            start += slot_minutes
+    return result
+
+
+class ConflictIndex:
+    """
+    Per doctor-day index of booked [start_time, end_time) intervals
+
+    Intervals are merged and sorted on first lookup so that each overlap
+    query is a single bisection, which keeps dense schedules with mixed
+    service durations cheap to validate.
+    """
+
+    def __init__(self):
+        self._raw = defaultdict(list)
+        self._merged = {}
+
+    def add(self, doctor_id, date, start, end):
+        """Add a booked interval (in minutes)"""
+        key = (doctor_id, date)
+        self._raw[key].append((start, end))
+        self._merged.pop(key, None)
+
+    def intervals(self, doctor_id, date):
+        """Merged booked intervals (in minutes) for a doctor on a date"""
+        key = (doctor_id, date)
+        if key not in self._merged:
+            merged = merge_intervals(self._raw.get(key, []))
+            self._merged[key] = (merged, [start for start, _ in merged])
+        return self._merged[key][0]
+
+    def overlaps(self, doctor_id, date, start, end):
+        """Whether [start, end) overlaps any booked interval"""
+        intervals = self.intervals(doctor_id, date)
+        starts = self._merged[(doctor_id, date)][1]
+        # Last interval starting before the requested end is the only candidate
+        i = bisect_left(starts, end) - 1
+        return i >= 0 and intervals[i][1] > start
+
+    @classmethod
+    def load(cls, doctors, dates, exclude_pk=None, include_holds=False, holder=None):
+        """
+        Build an index for doctors x dates from active appointments (one query)
+
+        With ``include_holds`` unexpired slot holds count as booked too (one
+        more query), except those belonging to ``holder``.
+        """
+        from apps.appointments.models import Appointment
+
+        index = cls()
+        doctor_ids = {getattr(d, 'pk', d) for d in doctors}
+        dates = sorted(set(dates))
+        if not doctor_ids or not dates:
+            return index
+
+        appointments = Appointment.objects.filter(
+            doctor_id__in=doctor_ids,
+            date__range=[dates[0], dates[-1]],
+            status__in=ACTIVE_STATUSES
+        )
+        if exclude_pk:
+            appointments = appointments.exclude(pk=exclude_pk)
+
+        for doctor_id, date, start, end in appointments.values_list(
+                'doctor_id', 'date', 'start_time', 'end_time'):
+            start_min = to_minutes(start)
+            end_min = to_minutes(end) if end and end > start else start_min + SLOT_MINUTES
+            index.add(doctor_id, date, start_min, end_min)
+
+        if include_holds:
+            index.add_holds(doctor_ids, dates, holder=holder)
+        return index
+
+    def add_holds(self, doctors, dates, holder=None):
+        """Add unexpired slot holds, except those of ``holder`` (one query)"""
+        from apps.appointments.models import SlotHold
+
+        doctor_ids = {getattr(d, 'pk', d) for d in doctors}
+        dates = sorted(set(dates))
+        if not doctor_ids or not dates:
+            return
+
+        holds = SlotHold.objects.filter(
+            doctor_id__in=doctor_ids,
+            date__range=[dates[0], dates[-1]],
+            expires_at__gt=timezone.now()
+        )
+        if holder is not None:
+            holds = holds.exclude(patient=holder)
+        for doctor_id, date, start, end in holds.values_list(
+                'doctor_id', 'date', 'start_time', 'end_time'):
+            self.add(doctor_id, date, to_minutes(start), to_minutes(end))
+
+
+class AvailabilityEngine:
+    """
+    Availability for N doctors x D dates
+
+    Usage:
+        engine = AvailabilityEngine(doctors, dates)
+        engine.slots(doctor.pk, date)
+        engine.next_free_slot(doctor.pk)
+
+    All rows are fetched lazily on first use with exactly three queries,
+    regardless of how many doctors or dates are requested.
+    """
+
+    def __init__(self, doctors, dates, slot_minutes=SLOT_MINUTES, include_holds=False, holder=None):
+        self.doctor_ids = sorted({getattr(d, 'pk', d) for d in doctors})
+        self.dates = sorted(set(dates))
+        self.slot_minutes = slot_minutes
+        # Treat other patients' slot holds as bookings (see ConflictIndex.load)
+        self.include_holds = include_holds
+        self.holder = holder
+        self._loaded = False
+
+    def load(self):
+        """Fetch all rows needed for the requested doctors and dates"""
+        from apps.doctors.models import WorkingHour, DayOff
+        from apps.doctors.holidays import get_recurring_index
+
+        # doctor_id -> weekday -> [(start, end)]
+        self._working = defaultdict(lambda: defaultdict(list))
+        # (doctor_id, date) set
+        self._days_off = set()
+        # doctor_id -> frozenset((month, day)) of recurring days off
+        self._recurring_off = {}
+        self._bookings = ConflictIndex()
+        self._loaded = True
+
+        if not self.doctor_ids or not self.dates:
+            return
+
+        first, last = self.dates[0], self.dates[-1]
+        weekdays = {d.weekday() for d in self.dates}
+
+        working_hours = WorkingHour.objects.filter(
+            doctor_id__in=self.doctor_ids,
+            day_of_week__in=weekdays,
+            is_active=True
+        ).values_list('doctor_id', 'day_of_week', 'start_time', 'end_time')
+
+        for doctor_id, weekday, start, end in working_hours:
+            self._working[doctor_id][weekday].append((to_minutes(start), to_minutes(end)))
+
+        days_off = DayOff.objects.filter(
+            doctor_id__in=self.doctor_ids,
+            date__range=[first, last]
+        ).values_list('doctor_id', 'date')
+
+        self._days_off.update(days_off)
+        self._recurring_off = get_recurring_index(self.doctor_ids)
+
+        self._bookings = ConflictIndex.load(
+            self.doctor_ids, self.dates, include_holds=self.include_holds, holder=self.holder
+        )
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def is_day_off(self, doctor_id, date):
+        self._ensure_loaded()
+        return (
+            (doctor_id, date) in self._days_off
+            or (date.month, date.day) in self._recurring_off.get(doctor_id, ())
+        )
+
+    def working_intervals(self, doctor_id, date):
+        """Merged working intervals (in minutes) for a doctor on a date"""
+        self._ensure_loaded()
+        return merge_intervals(self._working[doctor_id][date.weekday()])
+
+    def booked_intervals(self, doctor_id, date):
+        """Merged booked intervals (in minutes) for a doctor on a date"""
+        self._ensure_loaded()
+        return self._bookings.intervals(doctor_id, date)
+
+    def is_free(self, doctor_id, date, start, end):
+        """Whether [start, end) (in minutes) is inside working hours and unbooked"""
+        if self.is_day_off(doctor_id, date):
+            return False
+        working = self.working_intervals(doctor_id, date)
+        return (
+            fits_in(working, [w_start for w_start, _ in working], start, end)
+            and not self._bookings.overlaps(doctor_id, date, start, end)
+        )
+
+    def free_intervals(self, doctor_id, date):
+        """Free (start, end) intervals in minutes for a doctor on a date"""
+        if self.is_day_off(doctor_id, date):
+            return []
+        return subtract_intervals(
+            self.working_intervals(doctor_id, date),
+            self.booked_intervals(doctor_id, date)
+        )
+
+    def day_entry(self, doctor_id, date):
+        """Plain-data summary of one doctor-day, suitable for caching"""
+        return {
+            'working': self.working_intervals(doctor_id, date),
+            'free': self.free_intervals(doctor_id, date),
+            'day_off': self.is_day_off(doctor_id, date),
+        }
+
+    def day_bitmaps(self, doctor_id, date):
+        """Working, booked and day-off bitmaps for a doctor on a date"""
+        return DayBitmaps(
+            working=intervals_mask(self.working_intervals(doctor_id, date)),
+            booked=intervals_mask(self.booked_intervals(doctor_id, date), covering=True),
+            day_off=FULL_DAY if self.is_day_off(doctor_id, date) else 0
+        )
+
+    def slots(self, doctor_id, date, duration_minutes=None, now=None):
+        """Bookable slot start times for a doctor on a date (see compute_slots)"""
+        return compute_slots(
+            self.working_intervals(doctor_id, date),
+            self.free_intervals(doctor_id, date),
+            date,
+            duration_minutes or self.slot_minutes,
+            slot_minutes=self.slot_minutes,
+            now=now
+        )
+
+    def next_free_slot(self, doctor_id, duration_minutes=None, now=None):
+        """Earliest bookable datetime for a doctor within the loaded dates"""
+        for date in self.dates:
+            slots = self.slots(doctor_id, date, duration_minutes, now=now)
+            if slots:
+                return datetime.combine(date, slots[0])
+        return None
+
+
+def date_range(start, days):
+    """List of consecutive dates starting at start"""
+    return [start + timedelta(days=offset) for offset in range(days)]
+
+
+def annotate_next_available(doctors, days=NEXT_SLOT_HORIZON_DAYS):
+    """
+    Attach ``next_available_slot`` to every doctor in one batched computation
+
+    Used by listing pages to show "next free slot" badges without issuing
+    per-card queries.
+    """
+    doctors = list(doctors)
+    if not doctors:
+        return doctors
+
+    slots = next_available_map(doctors, days)
+    for doctor in doctors:
+        doctor.next_available_slot = slots[doctor.pk]
+    return doctors
+
+
+def next_available_map(doctors, days=NEXT_SLOT_HORIZON_DAYS, now=None):
+    """{doctor_id: next free slot datetime or None} with one engine load"""
+    doctor_ids = [getattr(d, 'pk', d) for d in doctors]
+    if not doctor_ids:
+        return {}
+    now = now or timezone.localtime()
+    engine = AvailabilityEngine(doctor_ids, date_range(now.date(), days))
+    return {doctor_id: engine.next_free_slot(doctor_id, now=now) for doctor_id in doctor_ids}
+
+
+def _slot_stream(engine, doctor_id, dates, duration_minutes, now):
+    """Lazily yield (datetime, doctor_id) for one doctor in date order"""
+    for date in dates:
+        for slot in engine.slots(doctor_id, date, duration_minutes, now=now):
+            yield datetime.combine(date, slot), doctor_id
+
+
+def earliest_slots(doctors, limit=10, duration_minutes=None, days=MAX_BOOKING_DAYS, now=None):
+    """
+    Soonest ``limit`` bookable slots across many doctors
+
+    Returns a sorted list of (datetime, doctor_id). Per-doctor slot streams
+    are combined with a heap-based k-way merge, so days are only computed
+    until enough results are found. Rows are loaded in growing date windows
+    (7, 14, 28... days) with one engine each, which keeps the common case to
+    three queries without ever building a full calendar for every doctor.
+    """
+    doctor_ids = sorted({getattr(d, 'pk', d) for d in doctors})
+    now = now or timezone.localtime()
+    today = now.date()
+
+    results = []
+    offset, window = 0, EARLIEST_FIRST_WINDOW_DAYS
+    while doctor_ids and offset <= days and len(results) < limit:
+        dates = date_range(today + timedelta(days=offset), min(window, days + 1 - offset))
+        engine = AvailabilityEngine(doctor_ids, dates)
+        streams = [
+            _slot_stream(engine, doctor_id, dates, duration_minutes, now)
+            for doctor_id in doctor_ids
+        ]
+        for item in heapq.merge(*streams):
+            results.append(item)
+            if len(results) >= limit:
+                break
+        offset += window
+        window *= 2
+    return results
+
+
+def doctors_free_in_window(doctors, date, window_start, window_end,
+                           duration_minutes=SLOT_MINUTES, now=None):
+    """
+    Doctors with at least ``duration_minutes`` free between two times on a date
+
+    Answers questions like "any cardiologist free on Tuesday afternoon" for
+    hundreds of doctors with one engine load and a few bitmap operations per
+    doctor. Returns {doctor_id: earliest free time} for matching doctors.
+    Only starts on the compute_slots grid count (working-period start,
+    SLOT_MINUTES steps, after now for today), so every match is a slot the
+    patient can actually book.
+    """
+    now = now or timezone.localtime()
+    if date < now.date():
+        return {}
+    cutoff = to_minutes(now.time()) if date == now.date() else -1
+
+    doctor_ids = {getattr(d, 'pk', d) for d in doctors}
+    engine = AvailabilityEngine(doctor_ids, [date])
+    start, end = to_minutes(window_start), to_minutes(window_end)
+
+    result = {}
+    for doctor_id in sorted(doctor_ids):
+        allowed = grid_mask(engine.working_intervals(doctor_id, date), engine.slot_minutes, cutoff)
+        fit = engine.day_bitmaps(doctor_id, date).first_fit(duration_minutes, start, end, allowed)
+        if fit is not None:
+            result[doctor_id] = from_minutes(fit)
+    return result
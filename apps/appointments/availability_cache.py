@@ -0,0 +1,178 @@
+"""
+Availability cache
+
+Caches the computed working/free intervals of each (doctor, date) so that
+HTMX slot lookups don't recompute availability on every request. Entries are
+invalidated by signal handlers when an Appointment, WorkingHour or DayOff row
+for that doctor changes (see apps.appointments.signals and
+apps.doctors.signals), and explicitly by bulk-update paths such as the admin
+actions.
+
+Keys embed a per-doctor generation stamp, so changes that affect every date
+of a doctor (working hours, recurring days off) only need one write.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.core import query_cache
+from .availability import AvailabilityEngine, compute_slots, date_range, SLOT_MINUTES
+
+KEY_PREFIX = 'availability'
+HITS_KEY = f'{KEY_PREFIX}:stats:hits'
+MISSES_KEY = f'{KEY_PREFIX}:stats:misses'
+
+
+def get_timeout():
+    return getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 60 * 60)
+
+
+def _generation_key(doctor_id):
+    return f'{KEY_PREFIX}:gen:{doctor_id}'
+
+
+def _entry_key(doctor_id, generation, date):
+    return f'{KEY_PREFIX}:day:{doctor_id}:{generation}:{date.isoformat()}'
+
+
+def _generations(doctor_ids):
+    """Current generation stamp for every doctor (one cache round trip)"""
+    keys = {_generation_key(doctor_id): doctor_id for doctor_id in doctor_ids}
+    found = cache.get_many(keys)
+    generations = {keys[key]: value for key, value in found.items()}
+
+    for key, doctor_id in keys.items():
+        if doctor_id not in generations:
+            # A time-based stamp never reuses an old generation after eviction
+            cache.add(key, time.time_ns(), None)
+            generations[doctor_id] = cache.get(key) or 0
+    return generations
+
+
+def _incr(key, delta):
+    if not delta:
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key, delta)
+
+
+def get_day_availability(doctors, dates):
+    """
+    Cached availability entries for doctors x dates
+
+    Returns {(doctor_id, date): {'working': [...], 'free': [...], 'day_off': bool}}.
+    Missing entries are computed together with one AvailabilityEngine.
+    """
+    doctor_ids = sorted({getattr(d, 'pk', d) for d in doctors})
+    dates = sorted(set(dates))
+    generations = _generations(doctor_ids)
+
+    keys = {
+        _entry_key(doctor_id, generations[doctor_id], date): (doctor_id, date)
+        for doctor_id in doctor_ids
+        for date in dates
+    }
+    found = cache.get_many(keys)
+    entries = {keys[key]: value for key, value in found.items()}
+
+    missing = [pair for pair in keys.values() if pair not in entries]
+    if missing:
+        engine = AvailabilityEngine(
+            {doctor_id for doctor_id, _ in missing},
+            {date for _, date in missing}
+        )
+        computed = {}
+        for doctor_id, date in missing:
+            entry = engine.day_entry(doctor_id, date)
+            entries[(doctor_id, date)] = entry
+            computed[_entry_key(doctor_id, generations[doctor_id], date)] = entry
+        cache.set_many(computed, get_timeout())
+
+    _incr(HITS_KEY, len(found))
+    _incr(MISSES_KEY, len(missing))
+    return entries
+
+
+def get_cached_slots(doctor, date, duration_minutes=SLOT_MINUTES, now=None):
+    """Bookable slot start times for one doctor-day, served from the cache"""
+    entry = get_day_availability([doctor], [date])[(doctor.pk, date)]
+    return compute_slots(entry['working'], entry['free'], date, duration_minutes, now=now)
+
+
+def get_range_summary(doctor, first, last, duration_minutes=SLOT_MINUTES, now=None):
+    """
+    Per-day free slot counts for one doctor between two dates (inclusive)
+
+    Returns {date: {'free': int, 'fully_booked': bool, 'day_off': bool}},
+    built from one batched cache lookup (and at most one engine load).
+    """
+    dates = date_range(first, (last - first).days + 1)
+    entries = get_day_availability([doctor], dates)
+
+    summary = {}
+    for date in dates:
+        entry = entries[(doctor.pk, date)]
+        free = len(compute_slots(entry['working'], entry['free'], date, duration_minutes, now=now))
+        summary[date] = {
+            'free': free,
+            'fully_booked': bool(entry['working']) and not entry['day_off'] and not free,
+            'day_off': entry['day_off'],
+        }
+    return summary
+
+
+def invalidate(doctor_id, *dates):
+    """Drop cached entries for specific dates of one doctor"""
+    # Listings filtered by an availability window depend on this too
+    query_cache.bump('availability')
+    generation = cache.get(_generation_key(doctor_id))
+    if generation is None:
+        # No generation means nothing was cached under it
+        return
+    cache.delete_many([_entry_key(doctor_id, generation, date) for date in dates])
+
+
+def invalidate_doctor(doctor_id):
+    """Drop every cached date of one doctor by moving to a new generation"""
+    query_cache.bump('availability')
+    cache.set(_generation_key(doctor_id), time.time_ns(), None)
+
+
+def invalidate_queryset(queryset):
+    """
+    Invalidate every (doctor, date) touched by an Appointment queryset
+
+    For bulk ``update()`` paths that bypass model signals: call inside their
+    transaction, before the update (the pairs are read now). Entries are
+    dropped once it commits, so a concurrent read can't cache the old
+    bookings again in between.
+    """
+    by_doctor = {}
+    for doctor_id, date in queryset.order_by().values_list('doctor_id', 'date').distinct():
+        by_doctor.setdefault(doctor_id, []).append(date)
+
+    def run():
+        for doctor_id, dates in by_doctor.items():
+            invalidate(doctor_id, *dates)
+    transaction.on_commit(run)
+
+
+def get_stats():
+    """Hit/miss counters since the last reset"""
+    hits = cache.get(HITS_KEY) or 0
+    misses = cache.get(MISSES_KEY) or 0
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+    }
+
+
+def reset_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,112 @@
+"""
+Bitmap day schedules
+
+A doctor-day is a 288-bit integer at 5-minute granularity (bit i covers
+minutes [5i, 5i + 5)). Working hours, bookings and days off each become one
+bitmap, availability is ``working & ~booked & ~day_off`` and "k consecutive
+free units" is answered with a handful of shift/AND operations on the whole
+integer instead of per-slot Python loops.
+"""
+UNIT_MINUTES = 5
+UNITS_PER_DAY = 24 * 60 // UNIT_MINUTES
+FULL_DAY = (1 << UNITS_PER_DAY) - 1
+
+
+def _span(first_unit, last_unit):
+    """Bits [first_unit, last_unit) set"""
+    first_unit = max(first_unit, 0)
+    last_unit = min(last_unit, UNITS_PER_DAY)
+    if last_unit <= first_unit:
+        return 0
+    return ((1 << (last_unit - first_unit)) - 1) << first_unit
+
+
+def inside_mask(start, end):
+    """Units lying completely inside [start, end) minutes (for working hours)"""
+    return _span(-(-start // UNIT_MINUTES), end // UNIT_MINUTES)
+
+
+def covering_mask(start, end):
+    """Units touched by [start, end) minutes (for bookings)"""
+    return _span(start // UNIT_MINUTES, -(-end // UNIT_MINUTES))
+
+
+def intervals_mask(intervals, covering=False):
+    """OR of the masks of (start, end) minute intervals"""
+    build = covering_mask if covering else inside_mask
+    mask = 0
+    for start, end in intervals:
+        mask |= build(start, end)
+    return mask
+
+
+def grid_mask(intervals, step_minutes, after=-1):
+    """
+    Units where a slot may start: each interval's start, then every
+    ``step_minutes`` (the compute_slots grid), later than minute ``after``
+    """
+    mask = 0
+    for start, end in intervals:
+        for minute in range(start, end, step_minutes):
+            if minute > after and minute % UNIT_MINUTES == 0:
+                mask |= 1 << (minute // UNIT_MINUTES)
+    return mask
+
+
+def run_starts(mask, units):
+    """
+    Bitmap of positions where ``units`` consecutive set bits begin
+
+    Uses doubling, so the cost is O(log units) whole-integer operations.
+    """
+    if units <= 0:
+        return mask
+    result = mask
+    covered = 1
+    while covered < units:
+        step = min(covered, units - covered)
+        result &= result >> step
+        covered += step
+    return result
+
+
+def find_run(mask, units, from_unit=0, allowed=FULL_DAY):
+    """
+    First unit index >= from_unit starting ``units`` free units, or -1
+
+    Only starts set in ``allowed`` count (see grid_mask).
+    """
+    starts = run_starts(mask, units) & allowed & ~((1 << from_unit) - 1)
+    if not starts:
+        return -1
+    return (starts & -starts).bit_length() - 1
+
+
+def minutes_to_units(minutes):
+    """Number of units needed to cover a duration in minutes"""
+    return -(-minutes // UNIT_MINUTES)
+
+
+class DayBitmaps:
+    """Working, booked and day-off bitmaps of one doctor-day"""
+
+    __slots__ = ('working', 'booked', 'day_off')
+
+    def __init__(self, working=0, booked=0, day_off=0):
+        self.working = working
+        self.booked = booked
+        self.day_off = day_off
+
+    @property
+    def free(self):
+        return self.working & ~self.booked & ~self.day_off & FULL_DAY
+
+    def first_fit(self, duration_minutes, window_start=0, window_end=24 * 60, allowed=FULL_DAY):
+        """
+        Earliest start (in minutes) of a free run within a window, or None
+
+        ``allowed`` restricts the start units (see grid_mask).
+        """
+        mask = self.free & inside_mask(window_start, window_end)
+        unit = find_run(mask, minutes_to_units(duration_minutes), allowed=allowed)
+        return unit * UNIT_MINUTES if unit >= 0 else None
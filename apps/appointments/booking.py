@@ -0,0 +1,146 @@
+"""
+Race-free booking
+
+Concurrent patients can pass AppointmentCreateForm.clean for the same slot.
+Bookings therefore go through create_appointment(), which serializes writes
+per doctor (SELECT ... FOR UPDATE on the doctor row, or an IMMEDIATE
+transaction on SQLite), re-checks overlaps inside the transaction and relies
+on the unique_active_appointment_slot constraint as the last line of defence.
+
+Slot holds reserve a time for a few minutes while the patient completes the
+form; other patients see the slot as taken until the hold expires.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import availability_cache
+from .availability import ConflictIndex, from_minutes, service_duration, to_minutes
+from .models import Appointment, SlotHold
+from apps.dashboard import rollups
+
+
+class SlotUnavailable(Exception):
+    """The requested slot is booked or held by someone else"""
+
+
+def get_hold_minutes():
+    return getattr(settings, 'SLOT_HOLD_MINUTES', 5)
+
+
+def _lock_doctor(doctor_id):
+    """Serialize bookings of one doctor for the rest of the transaction"""
+    from apps.doctors.models import Doctor
+
+    list(Doctor.objects.select_for_update().filter(pk=doctor_id).values_list('pk'))
+
+
+def _is_taken(doctor_id, date, start, end, patient, exclude_pk=None):
+    index = ConflictIndex.load(
+        [doctor_id], [date], exclude_pk=exclude_pk, include_holds=True, holder=patient
+    )
+    return index.overlaps(doctor_id, date, start, end)
+
+
+def place_hold(patient, doctor, date, start_time, duration_minutes):
+    """
+    Reserve [start_time, start_time + duration) for the patient
+
+    Replaces any previous hold of the patient on this doctor. Raises
+    SlotUnavailable when the slot is booked or held by another patient.
+    """
+    start = to_minutes(start_time)
+    end = start + duration_minutes
+
+    with transaction.atomic():
+        _lock_doctor(doctor.pk)
+        if _is_taken(doctor.pk, date, start, end, patient):
+            raise SlotUnavailable
+
+        # Drop the patient's previous hold and any expired ones for this doctor
+        SlotHold.objects.filter(
+            Q(patient=patient) | Q(expires_at__lte=timezone.now()),
+            doctor=doctor
+        ).delete()
+        return SlotHold.objects.create(
+            patient=patient,
+            doctor=doctor,
+            date=date,
+            start_time=start_time,
+            end_time=from_minutes(end),
+            expires_at=timezone.now() + timedelta(minutes=get_hold_minutes())
+        )
+
+
+def release_holds(patient, doctor=None):
+    holds = SlotHold.objects.filter(patient=patient)
+    if doctor is not None:
+        holds = holds.filter(doctor=doctor)
+    holds.delete()
+
+
+def create_appointment(appointment):
+    """
+    Save a new appointment unless its slot was taken concurrently
+
+    Raises SlotUnavailable instead of creating a double booking. The
+    patient's own holds on the doctor are released on success.
+    """
+    start = to_minutes(appointment.start_time)
+    end = start + service_duration(appointment.service)
+
+    with transaction.atomic():
+        _lock_doctor(appointment.doctor_id)
+        if _is_taken(appointment.doctor_id, appointment.date, start, end, appointment.patient):
+            raise SlotUnavailable
+
+        try:
+            with transaction.atomic():
+                appointment.save()
+        except IntegrityError:
+            raise SlotUnavailable
+
+        release_holds(appointment.patient, appointment.doctor)
+    return appointment
+
+
+def create_series(appointments):
+    """
+    Insert every occurrence of a recurring series with one bulk_create
+
+    All occurrences share a doctor and patient. They are re-checked together
+    under the doctor lock; if any is taken the whole series is rejected
+    with SlotUnavailable. bulk_create skips model signals, so derived fields
+    are filled here and the availability cache and dashboard rollups are
+    updated explicitly.
+    """
+    first = appointments[0]
+    dates = [appointment.date for appointment in appointments]
+
+    with transaction.atomic():
+        _lock_doctor(first.doctor_id)
+        index = ConflictIndex.load(
+            [first.doctor_id], dates, include_holds=True, holder=first.patient
+        )
+        for appointment in appointments:
+            start = to_minutes(appointment.start_time)
+            if index.overlaps(first.doctor_id, appointment.date, start,
+                              start + service_duration(appointment.service)):
+                raise SlotUnavailable
+            appointment.apply_derived_fields()
+
+        try:
+            with transaction.atomic():
+                created = Appointment.objects.bulk_create(appointments)
+        except IntegrityError:
+            raise SlotUnavailable
+
+        rollups.record_created(created)
+
+        release_holds(first.patient, first.doctor)
+
+    availability_cache.invalidate(first.doctor_id, *dates)
+    return created
@@ -79,6 +79,28 @@ class EmailService:
             context=context
         )
 
+    @classmethod
+    def send_series_confirmation(cls, appointments):
+        """Send one summary email for a recurring appointment series"""
+        first = appointments[0]
+        subject = 'تأكيد حجز سلسلة مواعيد - Appointment Series Confirmation'
+
+        context = {
+            'appointments': appointments,
+            'patient_name': first.patient.get_full_name(),
+            'doctor_name': first.doctor.user.get_full_name(),
+            'clinic_name': first.clinic.name,
+            'service': first.service.name if first.service else 'استشارة عامة',
+            'total_price': sum(appointment.total_amount for appointment in appointments),
+        }
+
+        return cls.send_email(
+            subject=subject,
+            to_email=first.patient.email,
+            template_name='emails/appointment_series_confirmation.html',
+            context=context
+        )
+
     @classmethod
     def send_appointment_reminder(cls, appointment):
         """Send appointment reminder (24 hours before)"""
@@ -6,7 +6,9 @@ from datetime import datetime, timedelta, date
 import re
 
 from .models import Appointment, Payment, PaymentCard
-from apps.doctors.models import Doctor, WorkingHour, DayOff
+from .availability import AvailabilityEngine, ConflictIndex, MAX_BOOKING_DAYS, service_duration, to_minutes
+from apps.doctors import holidays
+from apps.doctors.models import Doctor, WorkingHour
 
 
 class AppointmentCreateForm(forms.ModelForm):
@@ -68,7 +70,7 @@ class AppointmentCreateForm(forms.ModelForm):
         if date and date < timezone.now().date():
             raise ValidationError(_('Cannot book appointments in the past'))
 
-        max_date = timezone.now().date() + timedelta(days=90)
+        max_date = timezone.now().date() + timedelta(days=MAX_BOOKING_DAYS)
         if date and date > max_date:
             raise ValidationError(_('Cannot book appointments more than 3 months in advance'))
 
@@ -89,6 +91,10 @@ class AppointmentCreateForm(forms.ModelForm):
         if not all([doctor, date, start_time]):
             return cleaned_data
 
+        # Appointments occupy [start, start + service duration)
+        start = to_minutes(start_time)
+        end = start + service_duration(cleaned_data.get('service'))
+
         day_of_week = date.weekday()
         working_hours = WorkingHour.objects.filter(
             doctor=doctor,
@@ -103,7 +109,7 @@ class AppointmentCreateForm(forms.ModelForm):
 
         is_valid_time = False
         for wh in working_hours:
-            if wh.start_time <= start_time < wh.end_time:
+            if to_minutes(wh.start_time) <= start and end <= to_minutes(wh.end_time):
                 is_valid_time = True
                 break
 
@@ -112,22 +118,17 @@ class AppointmentCreateForm(forms.ModelForm):
                 'start_time': _('Selected time is outside doctor\'s working hours')
             })
 
-        if DayOff.objects.filter(doctor=doctor, date=date).exists():
+        if holidays.is_day_off(doctor, date):
             raise ValidationError({
                 'date': _('Doctor is not available on this date')
             })
 
-        conflicts = Appointment.objects.filter(
-            doctor=doctor,
-            date=date,
-            start_time=start_time,
-            status__in=['PENDING', 'CONFIRMED']
+        # Slots held by other patients count as taken
+        conflicts = ConflictIndex.load(
+            [doctor], [date], exclude_pk=self.instance.pk, include_holds=True, holder=self.user
         )
 
-        if self.instance.pk:
-            conflicts = conflicts.exclude(pk=self.instance.pk)
-
-        if conflicts.exists():
+        if conflicts.overlaps(doctor.pk, date, start, end):
             raise ValidationError({
                 'start_time': _('This time slot is already booked')
             })
@@ -135,6 +136,95 @@ class AppointmentCreateForm(forms.ModelForm):
         return cleaned_data
 
 
+class AppointmentSeriesForm(forms.Form):
+    """Recurring series booking (e.g. weekly physiotherapy for 8 weeks)"""
+
+    INTERVAL_CHOICES = [
+        (7, _('Every week')),
+        (14, _('Every 2 weeks')),
+    ]
+    MAX_OCCURRENCES = 12
+
+    doctor = forms.ModelChoiceField(queryset=Doctor.objects.filter(is_available=True))
+    service = forms.ModelChoiceField(queryset=None, required=False)
+    date = forms.DateField(
+        label=_('First date'),
+        widget=forms.DateInput(attrs={'type': 'date'})
+    )
+    start_time = forms.TimeField(widget=forms.TimeInput(attrs={'type': 'time'}))
+    interval_days = forms.TypedChoiceField(
+        label=_('Repeat'),
+        choices=INTERVAL_CHOICES,
+        coerce=int,
+        initial=7
+    )
+    occurrences = forms.IntegerField(
+        label=_('Number of appointments'),
+        min_value=2,
+        max_value=MAX_OCCURRENCES,
+        initial=8
+    )
+    symptoms = forms.CharField(required=False, widget=forms.Textarea(attrs={'rows': 3}))
+
+    def __init__(self, *args, **kwargs):
+        self.user = kwargs.pop('user', None)
+        self.doctor = kwargs.pop('doctor', None)
+        super().__init__(*args, **kwargs)
+
+        from apps.services.models import Service
+        self.fields['service'].queryset = Service.objects.filter(is_active=True)
+        if self.doctor:
+            self.fields['doctor'].initial = self.doctor
+            self.fields['service'].queryset = self.doctor.clinic.services.filter(is_active=True)
+
+        for field in self.fields.values():
+            field.widget.attrs['class'] = 'w-full px-4 py-3 rounded-lg border border-gray-300 dark:border-gray-600 bg-gray-50 dark:bg-gray-700 text-gray-900 dark:text-white focus:ring-2 focus:ring-purple-500'
+
+        self.fields['date'].widget.attrs['min'] = timezone.now().date().isoformat()
+
+    def get_dates(self):
+        """Dates of every occurrence in the series"""
+        first = self.cleaned_data['date']
+        step = self.cleaned_data['interval_days']
+        return [first + timedelta(days=step * i) for i in range(self.cleaned_data['occurrences'])]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        doctor = cleaned_data.get('doctor')
+        service = cleaned_data.get('service')
+        start_time = cleaned_data.get('start_time')
+
+        if self.errors or not all([doctor, start_time]):
+            return cleaned_data
+
+        if service and service.clinic_id != doctor.clinic_id:
+            raise ValidationError({'service': _('This service is not offered at the doctor\'s clinic')})
+
+        dates = self.get_dates()
+        today = timezone.now().date()
+        if dates[0] < today:
+            raise ValidationError({'date': _('Cannot book appointments in the past')})
+        if dates[-1] > today + timedelta(days=MAX_BOOKING_DAYS):
+            raise ValidationError({
+                'occurrences': _('Cannot book appointments more than 3 months in advance')
+            })
+
+        # Every occurrence checked against working hours, days off, bookings
+        # and other patients' holds with one batched load
+        start = to_minutes(start_time)
+        end = start + service_duration(service)
+        engine = AvailabilityEngine([doctor], dates, include_holds=True, holder=self.user)
+
+        unavailable = [d for d in dates if not engine.is_free(doctor.pk, d, start, end)]
+        if unavailable:
+            raise ValidationError(
+                _('The selected time is not available on: %(dates)s'),
+                params={'dates': ', '.join(d.strftime('%Y-%m-%d') for d in unavailable)}
+            )
+
+        return cleaned_data
+
+
 class AppointmentCancelForm(forms.Form):
     """Appointment cancellation form with fee warning"""
 
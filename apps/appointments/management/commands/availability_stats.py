@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from apps.appointments import availability_cache
+
+
+class Command(BaseCommand):
+    help = 'Show availability cache hit/miss counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset counters after printing')
+
+    def handle(self, *args, **options):
+        stats = availability_cache.get_stats()
+        hit_rate = f"{stats['hit_rate']:.1%}" if stats['hit_rate'] is not None else 'n/a'
+
+        self.stdout.write(f"Hits:     {stats['hits']}")
+        self.stdout.write(f"Misses:   {stats['misses']}")
+        self.stdout.write(f"Hit rate: {hit_rate}")
+
+        if options['reset']:
+            availability_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
@@ -0,0 +1,143 @@
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, DatabaseError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.appointments.availability import (
+    AvailabilityEngine, ACTIVE_STATUSES, service_duration, to_minutes
+)
+from apps.appointments.booking import SlotUnavailable, create_appointment
+from apps.appointments.models import Appointment
+from apps.doctors.models import Doctor
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Fire parallel bookings at one doctor-day and verify there are no double bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctor', type=int, help='Doctor id (default: first verified doctor)')
+        parser.add_argument('--date', help='YYYY-MM-DD (default: first free day 30+ days ahead)')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--attempts', type=int, default=25, help='Bookings attempted per thread')
+        parser.add_argument('--keep', action='store_true', help='Keep the created appointments')
+
+    def handle(self, *args, **options):
+        doctor = self.get_doctor(options['doctor'])
+        patients = list(User.objects.filter(role=User.Role.PATIENT)[:50])
+        if not patients:
+            raise CommandError('At least one patient user is required')
+
+        date, slots = self.get_target_day(doctor, options['date'])
+        service = doctor.clinic.services.filter(is_active=True).first()
+        self.stdout.write(
+            f'Doctor {doctor.pk} on {date}: {len(slots)} free slots, '
+            f'{options["threads"]} threads x {options["attempts"]} attempts'
+        )
+
+        counters = {'booked': 0, 'rejected': 0, 'errors': 0}
+        created = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                for _ in range(options['attempts']):
+                    appointment = Appointment(
+                        patient=random.choice(patients),
+                        doctor=doctor,
+                        clinic=doctor.clinic,
+                        service=service,
+                        date=date,
+                        start_time=random.choice(slots),
+                        status=Appointment.Status.PENDING,
+                    )
+                    try:
+                        create_appointment(appointment)
+                        outcome = 'booked'
+                    except SlotUnavailable:
+                        outcome = 'rejected'
+                    except DatabaseError:
+                        outcome = 'errors'
+                    with lock:
+                        counters[outcome] += 1
+                        if outcome == 'booked':
+                            created.append(appointment.pk)
+            finally:
+                connection.close()
+
+        # Confirmation emails are kept in memory during the run
+        with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+        total = sum(counters.values())
+        double_bookings = self.count_double_bookings(doctor, date)
+
+        self.stdout.write(f'Attempts:        {total}')
+        self.stdout.write(f'Booked:          {counters["booked"]}')
+        self.stdout.write(f'Rejected:        {counters["rejected"]}')
+        self.stdout.write(f'DB errors:       {counters["errors"]}')
+        self.stdout.write(f'Elapsed:         {elapsed:.2f}s')
+        self.stdout.write(f'Throughput:      {total / elapsed:.1f} attempts/s')
+        self.stdout.write(f'Double bookings: {double_bookings}')
+
+        if not options['keep']:
+            Appointment.objects.filter(pk__in=created).delete()
+
+        if double_bookings:
+            raise CommandError('Double bookings detected')
+        self.stdout.write(self.style.SUCCESS('No double bookings'))
+
+    def get_doctor(self, doctor_id):
+        doctors = Doctor.objects.select_related('clinic')
+        if doctor_id:
+            doctor = doctors.filter(pk=doctor_id).first()
+        else:
+            doctor = doctors.filter(is_verified=True, working_hours__is_active=True).first()
+        if doctor is None:
+            raise CommandError('No suitable doctor found')
+        return doctor
+
+    def get_target_day(self, doctor, date_str):
+        """Pick a date with free slots (30-minute grid) for the doctor"""
+        if date_str:
+            dates = [datetime.strptime(date_str, '%Y-%m-%d').date()]
+        else:
+            first = timezone.localdate() + timedelta(days=30)
+            dates = [first + timedelta(days=offset) for offset in range(14)]
+
+        engine = AvailabilityEngine([doctor], dates)
+        service = doctor.clinic.services.filter(is_active=True).first()
+        for date in dates:
+            slots = engine.slots(doctor.pk, date, service_duration(service))
+            if slots:
+                return date, slots
+        raise CommandError('Doctor has no free slots on the chosen date(s)')
+
+    def count_double_bookings(self, doctor, date):
+        """Active appointments overlapping an earlier active appointment"""
+        intervals = sorted(
+            (to_minutes(start), to_minutes(end) if end else to_minutes(start) + 30)
+            for start, end in Appointment.objects.filter(
+                doctor=doctor, date=date, status__in=ACTIVE_STATUSES
+            ).values_list('start_time', 'end_time')
+        )
+        overlaps = 0
+        latest_end = -1
+        for start, end in intervals:
+            if start < latest_end:
+                overlaps += 1
+            latest_end = max(latest_end, end)
+        return overlaps
@@ -197,19 +197,32 @@ class Command(BaseCommand):
         for service in services:
             services_by_clinic[service.clinic_id].append(service)
 
+        # Active bookings must not share a slot (unique_active_appointment_slot)
+        start_times = [datetime.strptime(f'{hour:02d}:00', '%H:%M').time() for hour in range(9, 17)]
+        active_statuses = {Appointment.Status.PENDING, Appointment.Status.CONFIRMED}
+        taken = set()
+
         for _ in range(300):
             doctor = random.choice(doctors)
             clinic_services = services_by_clinic.get(doctor.clinic_id)
             if not clinic_services:
                 continue
 
+            date = fake.date_between('-14d', '+14d')
+            start_time = random.choice(start_times)
+            status = random.choice(statuses)
+            if status in active_statuses:
+                if (doctor.pk, date, start_time) in taken:
+                    continue
+                taken.add((doctor.pk, date, start_time))
+
             Appointment.objects.create(
                 patient=random.choice(patients),
                 doctor=doctor,
                 clinic=doctor.clinic,
                 service=random.choice(clinic_services),
-                date=fake.date_between('-14d', '+14d'),
-                start_time=datetime.strptime('10:00', '%H:%M').time(),
+                date=date,
+                start_time=start_time,
                 symptoms='Routine check',
-                status=random.choice(statuses),
+                status=status,
             )
@@ -0,0 +1,75 @@
+# Generated by Django 5.1.15 on 2026-10-16 22:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def cancel_duplicate_active_slots(apps, schema_editor):
+    """Keep the oldest active booking per doctor/date/start_time, cancel the rest"""
+    Appointment = apps.get_model('appointments', 'Appointment')
+    seen = set()
+    duplicates = []
+    active = Appointment.objects.filter(
+        status__in=['PENDING', 'CONFIRMED']
+    ).order_by('pk').values_list('pk', 'doctor_id', 'date', 'start_time')
+    for pk, doctor_id, date, start_time in active.iterator():
+        key = (doctor_id, date, start_time)
+        if key in seen:
+            duplicates.append(pk)
+        else:
+            seen.add(key)
+    if duplicates:
+        Appointment.objects.filter(pk__in=duplicates).update(
+            status='CANCELED',
+            cancellation_reason='Duplicate booking of the same slot'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0007_appointment_cancellation_reason_ar_and_more'),
+        ('clinics', '0002_clinic_address_ar_clinic_address_en_and_more'),
+        ('doctors', '0003_doctor_bio_ar_doctor_bio_en_doctor_education_ar_and_more'),
+        ('services', '0002_service_description_ar_service_description_en_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='date')),
+                ('start_time', models.TimeField(verbose_name='start time')),
+                ('end_time', models.TimeField(verbose_name='end time')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='expires at')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+            ],
+            options={
+                'verbose_name': 'slot hold',
+                'verbose_name_plural': 'slot holds',
+                'ordering': ['expires_at'],
+            },
+        ),
+        migrations.RunPython(cancel_duplicate_active_slots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING', 'CONFIRMED'])), fields=('doctor', 'date', 'start_time'), name='unique_active_appointment_slot'),
+        ),
+        migrations.AddField(
+            model_name='slothold',
+            name='doctor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_holds', to='doctors.doctor', verbose_name='doctor'),
+        ),
+        migrations.AddField(
+            model_name='slothold',
+            name='patient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_holds', to=settings.AUTH_USER_MODEL, verbose_name='patient'),
+        ),
+        migrations.AddIndex(
+            model_name='slothold',
+            index=models.Index(fields=['doctor', 'date'], name='appointment_doctor__cde8cd_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-16 22:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0008_slot_hold_and_unique_active_slot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='series_id',
+            field=models.UUIDField(blank=True, db_index=True, null=True, verbose_name='series id'),
+        ),
+    ]
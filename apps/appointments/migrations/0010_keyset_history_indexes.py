@@ -0,0 +1,30 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0009_appointment_series_id'),
+        ('clinics', '0003_listing_sort_indexes'),
+        ('doctors', '0004_listing_sort_indexes'),
+        ('services', '0003_search_text'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['patient', '-date', '-start_time', '-id'], name='appt_patient_history_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doctor', '-date', '-start_time', '-id'], name='appt_doctor_history_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['patient', '-created_at', '-id'], name='payment_patient_history_idx'),
+        ),
+    ]
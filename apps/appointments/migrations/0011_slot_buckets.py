@@ -0,0 +1,52 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_slot_buckets(apps, schema_editor):
+    """Fill start_hour / weekday of existing appointments in batches"""
+    Appointment = apps.get_model('appointments', 'Appointment')
+    batch = []
+    pending = Appointment.objects.filter(start_hour__isnull=True).only('date', 'start_time')
+    for appointment in pending.iterator(chunk_size=1000):
+        appointment.start_hour = appointment.start_time.hour
+        appointment.weekday = appointment.date.weekday()
+        batch.append(appointment)
+        if len(batch) >= 1000:
+            Appointment.objects.bulk_update(batch, ['start_hour', 'weekday'])
+            batch = []
+    Appointment.objects.bulk_update(batch, ['start_hour', 'weekday'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0010_keyset_history_indexes'),
+        ('clinics', '0003_listing_sort_indexes'),
+        ('doctors', '0004_listing_sort_indexes'),
+        ('services', '0003_search_text'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='start_hour',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='start hour'),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='weekday',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='weekday'),
+        ),
+        migrations.RunPython(backfill_slot_buckets, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['weekday', 'start_hour'], name='appt_slot_bucket_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doctor', 'status', 'weekday', 'start_hour'], name='appt_doctor_bucket_idx'),
+        ),
+    ]
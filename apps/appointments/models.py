@@ -50,6 +50,14 @@ class Appointment(models.Model):
     start_time = models.TimeField(_('start time'))
     end_time = models.TimeField(_('end time'), blank=True, null=True)
 
+    # Slot buckets for peak-hour / weekday analytics, derived from date and
+    # start_time on save (weekday as date.weekday(), Monday = 0)
+    start_hour = models.PositiveSmallIntegerField(_('start hour'), null=True, blank=True, editable=False)
+    weekday = models.PositiveSmallIntegerField(_('weekday'), null=True, blank=True, editable=False)
+
+    # Recurring series this appointment belongs to, if any
+    series_id = models.UUIDField(_('series id'), null=True, blank=True, db_index=True)
+
     # Details
     symptoms = models.TextField(_('symptoms'), blank=True)
     notes = models.TextField(_('notes'), blank=True)
@@ -107,13 +115,46 @@ class Appointment(models.Model):
             models.Index(fields=['doctor', 'date']),
             models.Index(fields=['status']),
             models.Index(fields=['is_paid']),
+            # Keyset pagination of patient/doctor histories (-date, -start_time, -id)
+            models.Index(fields=['patient', '-date', '-start_time', '-id'], name='appt_patient_history_idx'),
+            models.Index(fields=['doctor', '-date', '-start_time', '-id'], name='appt_doctor_history_idx'),
+            # Grouped scans for peak hours and weekday heatmaps
+            models.Index(fields=['weekday', 'start_hour'], name='appt_slot_bucket_idx'),
+            models.Index(fields=['doctor', 'status', 'weekday', 'start_hour'], name='appt_doctor_bucket_idx'),
+        ]
+        constraints = [
+            # Last line of defence against concurrent double booking
+            models.UniqueConstraint(
+                fields=['doctor', 'date', 'start_time'],
+                condition=models.Q(status__in=['PENDING', 'CONFIRMED']),
+                name='unique_active_appointment_slot',
+            ),
         ]
 
     def __str__(self):
         return f"{self.patient.get_full_name()} - Dr. {self.doctor.user.get_full_name()} on {self.date}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember persisted values so signal handlers can tell what changed"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def save(self, *args, **kwargs):
         """Auto-calculate end_time, prices, and payment due date"""
+        self.apply_derived_fields()
+
+        super().save(*args, **kwargs)
+
+        # post_save handlers have seen the previous values; track the new ones
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+        }
+
+    def apply_derived_fields(self):
+        """Fill end_time, slot buckets, base_price, payment_due_date and total_amount (also used before bulk_create)"""
         # Calculate end_time
         if not self.end_time:
             duration = 30
@@ -124,6 +165,10 @@ class Appointment(models.Model):
             end_dt = start_dt + timedelta(minutes=duration)
             self.end_time = end_dt.time()
 
+        # Slot buckets
+        self.start_hour = self.start_time.hour
+        self.weekday = self.date.weekday()
+
         # Set base price
         if not self.base_price and self.service:
             self.base_price = getattr(self.service, 'price', Decimal('0'))
@@ -140,8 +185,6 @@ class Appointment(models.Model):
         # Calculate total
         self.total_amount = self.base_price + self.cancellation_fee + self.late_payment_fee
 
-        super().save(*args, **kwargs)
-
     def get_appointment_datetime(self):
         """Get appointment datetime as timezone-aware"""
         dt = datetime.combine(self.date, self.start_time)
@@ -312,6 +355,9 @@ class Payment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['patient', '-created_at', '-id'], name='payment_patient_history_idx'),
+        ]
 
     def __str__(self):
         return f"Payment {self.transaction_id or self.id} - {self.amount} SAR"
@@ -330,6 +376,9 @@ class Payment(models.Model):
         self.appointment.save()
         self.save()
 
+        from apps.dashboard import ledger
+        ledger.record_payment(self)
+
     def mark_as_failed(self, reason=''):
         self.status = self.PaymentStatus.FAILED
         if reason:
@@ -364,4 +413,41 @@ class PaymentCard(models.Model):
         if self.is_default:
             PaymentCard.objects.filter(patient=self.patient, is_default=True).exclude(pk=self.pk).update(
                 is_default=False)
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+
+class SlotHold(models.Model):
+    """Short-lived reservation of a slot while a patient completes booking"""
+
+    patient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='slot_holds',
+        verbose_name=_('patient')
+    )
+    doctor = models.ForeignKey(
+        'doctors.Doctor',
+        on_delete=models.CASCADE,
+        related_name='slot_holds',
+        verbose_name=_('doctor')
+    )
+    date = models.DateField(_('date'))
+    start_time = models.TimeField(_('start time'))
+    end_time = models.TimeField(_('end time'))
+    expires_at = models.DateTimeField(_('expires at'), db_index=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('slot hold')
+        verbose_name_plural = _('slot holds')
+        ordering = ['expires_at']
+        indexes = [
+            models.Index(fields=['doctor', 'date']),
+        ]
+
+    def __str__(self):
+        return f"Hold Dr. {self.doctor_id} {self.date} {self.start_time} until {self.expires_at}"
+
+    @property
+    def is_active(self):
+        return self.expires_at > timezone.now()
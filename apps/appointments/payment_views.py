@@ -8,11 +8,15 @@ from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.http import JsonResponse
 from django.db import transaction
+from django.db.models import Count, Q, Sum
 from decimal import Decimal
 import json
 
 from .models import Appointment, Payment, PaymentCard
 from .forms import PaymentForm, SavedCardPaymentForm
+from utils.mixins import CursorPaginationMixin
+from utils.pagination import SortMode
+from apps.dashboard import ledger
 
 
 # This would integrate with actual payment gateway
@@ -361,13 +365,15 @@ class PaymentSuccessView(LoginRequiredMixin, DetailView):
         return Payment.objects.filter(patient=self.request.user)
 
 
-class PaymentHistoryView(LoginRequiredMixin, ListView):
+class PaymentHistoryView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """Payment history for patient"""
 
     model = Payment
     template_name = 'appointments/payment_history.html'
+    partial_template_name = 'appointments/partials/payment_list.html'
     context_object_name = 'payments'
     paginate_by = 20
+    sort_mode = SortMode(_('Newest first'), '-created_at', '-pk')
 
     def get_queryset(self):
         return Payment.objects.filter(
@@ -375,7 +381,16 @@ class PaymentHistoryView(LoginRequiredMixin, ListView):
         ).select_related(
             'appointment__doctor__user',
             'appointment__service'
-        ).order_by('-created_at')
+        )
+
+    def get_count_scopes(self):
+        return [f'payment:patient:{self.request.user.pk}']
+
+    def compute_totals(self):
+        return Payment.objects.filter(patient=self.request.user).aggregate(
+            count=Count('pk'),
+            spent=Sum('amount', filter=Q(status=Payment.PaymentStatus.COMPLETED)),
+        )
 
 
 @login_required
@@ -466,6 +481,7 @@ def cancel_appointment_with_fee(request, pk):
                                 payment.refunded_at = timezone.now()
                                 payment.refund_reason = f'Cancellation fee applied: {cancellation_fee} SAR'
                                 payment.save()
+                                ledger.record_refund(payment)
 
                 # Cancel appointment
                 appointment.status = Appointment.Status.CANCELED
@@ -1,11 +1,58 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db import transaction
 from django.dispatch import receiver
 from django.core.mail import send_mail, EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils.html import strip_tags
 from .models import Appointment, Payment
+from . import availability_cache
+from apps.core import query_cache
+from apps.dashboard import rollups
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def invalidate_appointment_availability(sender, instance, **kwargs):
+    """Drop cached availability for the doctor-day(s) this appointment touches"""
+    availability_cache.invalidate(instance.doctor_id, instance.date)
+
+    # A rescheduled appointment also frees its previous doctor-day
+    previous = getattr(instance, '_loaded_values', {})
+    old_doctor_id = previous.get('doctor_id', instance.doctor_id)
+    old_date = previous.get('date', instance.date)
+    if (old_doctor_id, old_date) != (instance.doctor_id, instance.date):
+        availability_cache.invalidate(old_doctor_id, old_date)
+
+
+@receiver(post_save, sender=Appointment)
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    """Move the appointment between dashboard rollup rows"""
+    if not raw:
+        rollups.record_save(instance, created)
+
+
+@receiver(post_delete, sender=Appointment)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    rollups.record_delete(instance)
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def invalidate_doctor_fragments(sender, instance, **kwargs):
+    """Drop the cached dashboard fragments of the appointment's doctor(s)"""
+    previous = getattr(instance, '_loaded_values', {})
+    doctor_ids = {instance.doctor_id, previous.get('doctor_id', instance.doctor_id)}
+    scopes = [rollups.doctor_scope(doctor_id) for doctor_id in doctor_ids]
+    transaction.on_commit(lambda: query_cache.bump(*scopes))
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def invalidate_payment_totals(sender, instance, **kwargs):
+    """Drop the cached payment-history totals of the paying patient"""
+    query_cache.bump(f'payment:patient:{instance.patient_id}')
 
 
 @receiver(post_save, sender=Appointment)
@@ -0,0 +1,89 @@
+"""
+Patient appointment timeline
+
+Everything the patient dashboard and the "My Appointments" page show about
+one patient's appointments: upcoming and past cards, recent bookings,
+counts by status and most visited doctors. Counts come from one conditional
+aggregate and each list from one ``LIMIT`` query on the patient's index, so
+the cost stays bounded however long the patient's history grows.
+"""
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from apps.doctors.models import Doctor
+from .availability import ACTIVE_STATUSES
+from .models import Appointment
+
+CLOSED_STATUSES = ['COMPLETED', 'CANCELED', 'NO_SHOW']
+
+
+class PatientTimeline:
+    """Bounded views of a patient's appointments"""
+
+    def __init__(self, patient, today=None):
+        self.patient = patient
+        self.today = today or timezone.now().date()
+        self._stats = None
+
+    def get_queryset(self):
+        return Appointment.objects.filter(patient=self.patient).select_related(
+            'doctor__user__profile',
+            'doctor__specialization',
+            'clinic',
+            'service'
+        )
+
+    def upcoming_q(self):
+        return Q(date__gte=self.today, status__in=ACTIVE_STATUSES)
+
+    def past_q(self):
+        return Q(date__lt=self.today) | Q(status__in=CLOSED_STATUSES)
+
+    def upcoming(self, limit=None):
+        """Active appointments from today on, soonest first"""
+        appointments = self.get_queryset().filter(self.upcoming_q()).order_by(
+            'date', 'start_time', 'pk'
+        )
+        return list(appointments[:limit] if limit else appointments)
+
+    def past(self, limit=None):
+        """Earlier or closed appointments, newest first"""
+        appointments = self.get_queryset().filter(self.past_q()).order_by(
+            '-date', '-start_time', '-pk'
+        )
+        return list(appointments[:limit] if limit else appointments)
+
+    def recent(self, limit=5):
+        """Most recently booked appointments"""
+        return list(self.get_queryset().order_by('-created_at', '-pk')[:limit])
+
+    def stats(self):
+        """Counts by status, upcoming and past (one aggregate query)"""
+        if self._stats is None:
+            self._stats = Appointment.objects.filter(patient=self.patient).aggregate(
+                total_appointments=Count('pk'),
+                upcoming=Count('pk', filter=self.upcoming_q()),
+                past=Count('pk', filter=self.past_q()),
+                completed=Count('pk', filter=Q(status='COMPLETED')),
+                canceled=Count('pk', filter=Q(status='CANCELED')),
+            )
+        return self._stats
+
+    def favorite_doctors(self, limit=3):
+        """Most visited doctors, each with a ``visit_count`` attribute"""
+        visits = list(
+            Appointment.objects.filter(patient=self.patient)
+            .values('doctor_id')
+            .annotate(visits=Count('pk'), last_visit=Max('date'))
+            .order_by('-visits', '-last_visit')[:limit]
+        )
+        doctors = Doctor.objects.select_related(
+            'user__profile', 'specialization'
+        ).in_bulk([row['doctor_id'] for row in visits])
+
+        favorites = []
+        for row in visits:
+            doctor = doctors[row['doctor_id']]
+            doctor.visit_count = row['visits']
+            favorites.append(doctor)
+        return favorites
@@ -61,6 +61,7 @@ urlpatterns = [
 
     # Create & Detail
     path('create/', views.AppointmentCreateView.as_view(), name='create'),
+    path('create/series/', views.AppointmentSeriesCreateView.as_view(), name='create_series'),
     path('<int:pk>/', views.AppointmentDetailView.as_view(), name='detail'),
 
     # Actions
@@ -71,4 +72,6 @@ urlpatterns = [
     # AJAX/HTMX endpoints
     path('check-availability/', views.check_availability, name='check_availability'),
     path('get-slots/', views.get_available_slots_ajax, name='get_slots'),
+    path('month-availability/', views.month_availability, name='month_availability'),
+    path('hold/', views.hold_slot, name='hold_slot'),
 ]
@@ -1,5 +1,5 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.generic import ListView, DetailView, CreateView
+from django.views.generic import ListView, DetailView, CreateView, FormView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -10,10 +10,20 @@ from django.http import JsonResponse, HttpResponse
 from django.db.models import Q
 from datetime import datetime, timedelta
 import json
+import uuid
 
 from .models import Appointment
-from .forms import AppointmentCreateForm, AppointmentCancelForm, AppointmentFilterForm
-from apps.doctors.models import Doctor, WorkingHour, DayOff
+from .availability import ConflictIndex, fits_in, service_duration, to_minutes, MAX_BOOKING_DAYS
+from .availability_cache import get_cached_slots, get_day_availability, get_range_summary
+from .booking import SlotUnavailable, create_appointment, create_series, place_hold
+from .timeline import PatientTimeline
+from .forms import AppointmentCreateForm, AppointmentCancelForm, AppointmentFilterForm, AppointmentSeriesForm
+from .email_service import EmailService
+from apps.doctors import holidays
+from apps.doctors.models import Doctor, WorkingHour
+from apps.services.models import Service
+from utils.mixins import CursorPaginationMixin
+from utils.pagination import SortMode
 
 try:
     from django_htmx.http import HttpResponseClientRefresh
@@ -24,11 +34,17 @@ except ImportError:
         return HttpResponseRedirect('/')
 
 
-class MyAppointmentsView(LoginRequiredMixin, ListView):
+# Newest first, matching Appointment.Meta.ordering plus a unique tie-breaker
+APPOINTMENT_HISTORY_ORDER = SortMode(_('Newest first'), '-date', '-start_time', '-pk')
+
+
+class MyAppointmentsView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """User's appointments"""
     template_name = 'appointments/my_appointments.html'
+    partial_template_name = 'appointments/partials/my_appointment_list.html'
     context_object_name = 'appointments'
     paginate_by = 10
+    sort_mode = APPOINTMENT_HISTORY_ORDER
 
     def get_queryset(self):
         queryset = Appointment.objects.filter(
@@ -38,7 +54,7 @@ class MyAppointmentsView(LoginRequiredMixin, ListView):
             'doctor__specialization',
             'clinic',
             'service'
-        ).order_by('-date', '-start_time')
+        )
 
         # Apply filters
         form = AppointmentFilterForm(self.request.GET)
@@ -54,23 +70,14 @@ class MyAppointmentsView(LoginRequiredMixin, ListView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        queryset = self.get_queryset()
-        today = timezone.now().date()
 
-        # Upcoming appointments
-        context['upcoming'] = queryset.filter(
-            date__gte=today,
-            status__in=['PENDING', 'CONFIRMED']
-        )[:5]
-
-        # Past appointments
-        context['past'] = queryset.filter(
-            Q(date__lt=today) |
-            Q(status__in=['COMPLETED', 'CANCELED', 'NO_SHOW'])
-        )[:5]
-
-        # Filter form
-        context['filter_form'] = AppointmentFilterForm(self.request.GET)
+        # "Load more" pages only render rows, the timeline is for the full page
+        if self.cursor_param not in self.request.GET:
+            timeline = PatientTimeline(self.request.user)
+            context['upcoming'] = timeline.upcoming(limit=5)
+            context['past'] = timeline.past(limit=5)
+            context['stats'] = timeline.stats()
+            context['filter_form'] = AppointmentFilterForm(self.request.GET)
 
         return context
 
@@ -95,11 +102,13 @@ class UpcomingAppointmentsView(LoginRequiredMixin, ListView):
         ).order_by('date', 'start_time')
 
 
-class PastAppointmentsView(LoginRequiredMixin, ListView):
+class PastAppointmentsView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """Past appointments"""
     template_name = 'appointments/past.html'
+    partial_template_name = 'appointments/partials/past_appointment_list.html'
     context_object_name = 'appointments'
     paginate_by = 20
+    sort_mode = APPOINTMENT_HISTORY_ORDER
 
     def get_queryset(self):
         today = timezone.now().date()
@@ -113,7 +122,7 @@ class PastAppointmentsView(LoginRequiredMixin, ListView):
             'doctor__specialization',
             'clinic',
             'service'
-        ).order_by('-date', '-start_time')
+        )
 
 
 class AppointmentCreateView(LoginRequiredMixin, CreateView):
@@ -153,6 +162,13 @@ class AppointmentCreateView(LoginRequiredMixin, CreateView):
         # Set status
         form.instance.status = Appointment.Status.PENDING
 
+        # Re-checked under a per-doctor lock; a concurrent booking wins the slot
+        try:
+            self.object = create_appointment(form.instance)
+        except SlotUnavailable:
+            form.add_error('start_time', _('This time slot was just booked by someone else'))
+            return self.form_invalid(form)
+
         messages.success(
             self.request,
             _('Appointment booked successfully! You will receive a confirmation soon.')
@@ -160,10 +176,9 @@ class AppointmentCreateView(LoginRequiredMixin, CreateView):
 
         # Handle HTMX request
         if hasattr(self.request, 'htmx') and self.request.htmx:
-            response = super().form_valid(form)
             return HttpResponseClientRefresh()
 
-        return super().form_valid(form)
+        return redirect(self.get_success_url())
 
     def form_invalid(self, form):
         """Handle invalid form"""
@@ -187,11 +202,11 @@ class AppointmentCreateView(LoginRequiredMixin, CreateView):
                 ).get(pk=doctor_id)
                 context['doctor'] = doctor
 
-                # Get disabled dates (days off)
-                disabled_dates = list(
-                    DayOff.objects.filter(doctor=doctor)
-                    .values_list('date', flat=True)
-                )
+                # Get disabled dates (days off, recurring ones expanded)
+                today = timezone.localdate()
+                disabled_dates = sorted(holidays.days_off_between(
+                    doctor, today, today + timedelta(days=MAX_BOOKING_DAYS)
+                ))
                 context['disabled_dates_json'] = json.dumps(
                     [d.strftime('%Y-%m-%d') for d in disabled_dates]
                 )
@@ -210,6 +225,72 @@ class AppointmentCreateView(LoginRequiredMixin, CreateView):
         return context
 
 
+class AppointmentSeriesCreateView(LoginRequiredMixin, FormView):
+    """Book a recurring series (e.g. weekly for 8 weeks) in one request"""
+    form_class = AppointmentSeriesForm
+    template_name = 'appointments/series_create.html'
+    success_url = reverse_lazy('appointments:my_appointments')
+
+    def dispatch(self, request, *args, **kwargs):
+        """Check if user is a patient"""
+        if not hasattr(request.user, 'role') or request.user.role != 'PATIENT':
+            messages.error(request, _('Only patients can book appointments'))
+            return redirect('dashboard:index')
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_doctor(self):
+        doctor_id = self.request.GET.get('doctor', '')
+        if doctor_id.isdigit():
+            return Doctor.objects.select_related(
+                'user', 'specialization', 'clinic'
+            ).filter(pk=doctor_id).first()
+        return None
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        kwargs['doctor'] = self.get_doctor()
+        return kwargs
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['doctor'] = self.get_doctor()
+        return context
+
+    def form_valid(self, form):
+        doctor = form.cleaned_data['doctor']
+        series_id = uuid.uuid4()
+        appointments = [
+            Appointment(
+                patient=self.request.user,
+                doctor=doctor,
+                clinic=doctor.clinic,
+                service=form.cleaned_data['service'],
+                date=date,
+                start_time=form.cleaned_data['start_time'],
+                symptoms=form.cleaned_data['symptoms'],
+                status=Appointment.Status.PENDING,
+                series_id=series_id,
+            )
+            for date in form.get_dates()
+        ]
+
+        try:
+            create_series(appointments)
+        except SlotUnavailable:
+            form.add_error(None, _('One of the selected slots was just booked by someone else'))
+            return self.form_invalid(form)
+
+        # One summary email instead of one per occurrence
+        EmailService.send_series_confirmation(appointments)
+
+        messages.success(
+            self.request,
+            _('%(count)d appointments booked successfully!') % {'count': len(appointments)}
+        )
+        return super().form_valid(form)
+
+
 class AppointmentDetailView(LoginRequiredMixin, DetailView):
     """Appointment detail"""
     model = Appointment
@@ -330,6 +411,7 @@ def check_availability(request):
     doctor_id = request.GET.get('doctor')
     date_str = request.GET.get('date')
     time_str = request.GET.get('time')
+    service_id = request.GET.get('service')
 
     if not all([doctor_id, date_str, time_str]):
         return JsonResponse({
@@ -349,25 +431,26 @@ def check_availability(request):
                 'message': _('Cannot book appointments in the past')
             })
 
-        # Check working hours
-        day_of_week = date.weekday()
-        working_hours = WorkingHour.objects.filter(
-            doctor=doctor,
-            day_of_week=day_of_week,
-            is_active=True
-        )
+        # Requested interval, sized by the selected service
+        service = Service.objects.filter(
+            pk=service_id, clinic_id=doctor.clinic_id
+        ).first() if service_id and service_id.isdigit() else None
+        start = to_minutes(time)
+        end = start + service_duration(service)
+
+        # Cached working/free intervals for this doctor-day
+        entry = get_day_availability([doctor], [date])[(doctor.pk, date)]
+        working = entry['working']
 
-        if not working_hours.exists():
+        # Check working hours
+        if not working:
             return JsonResponse({
                 'available': False,
                 'message': _('Doctor is not available on this day')
             })
 
-        # Check if time is within working hours
-        is_valid_time = any(
-            wh.start_time <= time < wh.end_time
-            for wh in working_hours
-        )
+        # Check if the whole appointment fits within working hours
+        is_valid_time = fits_in(working, [w_start for w_start, _ in working], start, end)
 
         if not is_valid_time:
             return JsonResponse({
@@ -376,21 +459,16 @@ def check_availability(request):
             })
 
         # Check day off
-        if DayOff.objects.filter(doctor=doctor, date=date).exists():
+        if entry['day_off']:
             return JsonResponse({
                 'available': False,
                 'message': _('Doctor is not available on this date')
             })
 
-        # Check conflicts
-        conflicts = Appointment.objects.filter(
-            doctor=doctor,
-            date=date,
-            start_time=time,
-            status__in=['PENDING', 'CONFIRMED']
-        )
+        # Check conflicts against [start, end) of existing bookings
+        free = entry['free']
 
-        if conflicts.exists():
+        if not fits_in(free, [f_start for f_start, _ in free], start, end):
             return JsonResponse({
                 'available': False,
                 'message': _('This time slot is already booked')
@@ -418,62 +496,31 @@ def check_availability(request):
         })
 
 
-def get_available_time_slots(doctor, date):
+def get_available_time_slots(doctor, date, service=None, holder=None):
     """
     Get available time slots for a doctor on a specific date
     
     Args:
         doctor: Doctor instance
         date: Date object
+        service: Optional Service; slots must fit its duration
+        holder: Optional patient; slots held by other patients are hidden
     
     Returns:
         List of available time slots (strings in HH:MM format)
     """
-    # Get working hours for the day
-    day_of_week = date.weekday()
-    working_hours = WorkingHour.objects.filter(
-        doctor=doctor,
-        day_of_week=day_of_week,
-        is_active=True
-    )
+    duration = service_duration(service)
+    slots = get_cached_slots(doctor, date, duration)
 
-    if not working_hours.exists():
-        return []
-
-    # Check if it's a day off
-    if DayOff.objects.filter(doctor=doctor, date=date).exists():
-        return []
-
-    # Get all booked slots for this day
-    booked_slots = Appointment.objects.filter(
-        doctor=doctor,
-        date=date,
-        status__in=['PENDING', 'CONFIRMED']
-    ).values_list('start_time', flat=True)
-
-    # Generate available slots
-    available_slots = []
-    slot_duration = 30  # minutes
-
-    for wh in working_hours:
-        current_time = datetime.combine(date, wh.start_time)
-        end_time = datetime.combine(date, wh.end_time)
-
-        while current_time < end_time:
-            slot_time = current_time.time()
-            
-            # Check if slot is not booked
-            if slot_time not in booked_slots:
-                # Check if slot is not in the past (for today)
-                if date == timezone.now().date():
-                    if slot_time > timezone.now().time():
-                        available_slots.append(slot_time.strftime('%H:%M'))
-                else:
-                    available_slots.append(slot_time.strftime('%H:%M'))
-            
-            current_time += timedelta(minutes=slot_duration)
-
-    return available_slots
+    if holder is not None:
+        # Holds are short-lived, so they are applied on top of the cached slots
+        held = ConflictIndex()
+        held.add_holds([doctor], [date], holder=holder)
+        slots = [
+            slot_time for slot_time in slots
+            if not held.overlaps(doctor.pk, date, to_minutes(slot_time), to_minutes(slot_time) + duration)
+        ]
+    return [slot_time.strftime('%H:%M') for slot_time in slots]
 
 
 @login_required
@@ -481,6 +528,7 @@ def get_available_slots_ajax(request):
     """Get available slots via AJAX/HTMX"""
     doctor_id = request.GET.get('doctor')
     date_str = request.GET.get('date')
+    service_id = request.GET.get('service')
 
     if not doctor_id or not date_str:
         return HttpResponse(
@@ -491,7 +539,10 @@ def get_available_slots_ajax(request):
     try:
         doctor = Doctor.objects.get(pk=doctor_id)
         date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        slots = get_available_time_slots(doctor, date)
+        service = Service.objects.filter(
+            pk=service_id, clinic_id=doctor.clinic_id
+        ).first() if service_id and service_id.isdigit() else None
+        slots = get_available_time_slots(doctor, date, service, holder=request.user)
 
         if not slots:
             return HttpResponse(
@@ -516,3 +567,90 @@ def get_available_slots_ajax(request):
             '<option value="">%s</option>' % _('Invalid date format'),
             content_type='text/html'
         )
+
+
+@login_required
+def month_availability(request):
+    """Per-day availability of one doctor for a month (JSON for the date picker)"""
+    doctor_id = request.GET.get('doctor', '')
+    month_str = request.GET.get('month', '')
+    service_id = request.GET.get('service', '')
+
+    if not doctor_id.isdigit():
+        return JsonResponse({'error': _('Doctor is required')}, status=400)
+
+    doctor = get_object_or_404(Doctor, pk=doctor_id)
+    today = timezone.localdate()
+
+    try:
+        first = datetime.strptime(month_str, '%Y-%m').date() if month_str else today.replace(day=1)
+    except ValueError:
+        return JsonResponse({'error': _('Invalid month format')}, status=400)
+
+    next_month = (first + timedelta(days=32)).replace(day=1)
+
+    # Only bookable days: from today up to the booking horizon
+    start = max(first, today)
+    end = min(next_month - timedelta(days=1), today + timedelta(days=MAX_BOOKING_DAYS))
+
+    service = Service.objects.filter(
+        pk=service_id, clinic_id=doctor.clinic_id
+    ).first() if service_id.isdigit() else None
+
+    days = {}
+    if start <= end:
+        summary = get_range_summary(doctor, start, end, service_duration(service))
+        days = {date.isoformat(): info for date, info in summary.items()}
+
+    return JsonResponse({
+        'doctor': doctor.pk,
+        'month': first.strftime('%Y-%m'),
+        'days': days,
+    })
+
+
+@login_required
+def hold_slot(request):
+    """Reserve the picked time for a few minutes while the patient books (POST)"""
+    if request.method != 'POST':
+        return JsonResponse({'error': _('POST required')}, status=405)
+
+    doctor_id = request.POST.get('doctor', '')
+    date_str = request.POST.get('date', '')
+    time_str = request.POST.get('time', '')
+    service_id = request.POST.get('service', '')
+
+    if not doctor_id.isdigit() or not date_str or not time_str:
+        return JsonResponse({'held': False, 'message': _('Missing parameters')}, status=400)
+
+    doctor = get_object_or_404(Doctor, pk=doctor_id)
+    try:
+        date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        start_time = datetime.strptime(time_str, '%H:%M').time()
+    except ValueError:
+        return JsonResponse({'held': False, 'message': _('Invalid date or time format')}, status=400)
+
+    # Same booking window as AppointmentCreateForm.clean_date
+    today = timezone.now().date()
+    if date < today:
+        return JsonResponse({'held': False, 'message': _('Cannot book appointments in the past')}, status=400)
+    if date > today + timedelta(days=MAX_BOOKING_DAYS):
+        return JsonResponse({
+            'held': False,
+            'message': _('Cannot book appointments more than 3 months in advance')
+        }, status=400)
+
+    service = Service.objects.filter(
+        pk=service_id, clinic_id=doctor.clinic_id
+    ).first() if service_id.isdigit() else None
+
+    # Only real slots can be held
+    if time_str not in get_available_time_slots(doctor, date, service, holder=request.user):
+        return JsonResponse({'held': False, 'message': _('This time slot is not available')}, status=409)
+
+    try:
+        hold = place_hold(request.user, doctor, date, start_time, service_duration(service))
+    except SlotUnavailable:
+        return JsonResponse({'held': False, 'message': _('This time slot is not available')}, status=409)
+
+    return JsonResponse({'held': True, 'expires_at': hold.expires_at.isoformat()})
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinics', '0002_clinic_address_ar_clinic_address_en_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='clinic',
+            index=models.Index(fields=['is_active', '-rating', 'id'], name='clinic_listing_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clinic',
+            index=models.Index(fields=['is_active', 'name_ar', 'id'], name='clinic_listing_name_ar_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clinic',
+            index=models.Index(fields=['is_active', 'name_en', 'id'], name='clinic_listing_name_en_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clinic',
+            index=models.Index(fields=['is_active', 'city', 'id'], name='clinic_listing_city_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:37
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinics', '0003_listing_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='clinic',
+            name='clinic_listing_name_ar_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='clinic',
+            name='clinic_listing_name_en_idx',
+        ),
+        migrations.AddIndex(
+            model_name='clinic',
+            index=models.Index(models.F('is_active'), django.db.models.functions.comparison.Cast(django.db.models.functions.comparison.Coalesce(django.db.models.functions.comparison.NullIf('name_ar', models.Value('')), django.db.models.functions.comparison.NullIf('name_en', models.Value('')), models.Value('')), models.TextField()), models.F('id'), name='clinic_listing_name_ar_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='clinic',
+            index=models.Index(models.F('is_active'), django.db.models.functions.comparison.Cast(django.db.models.functions.comparison.Coalesce(django.db.models.functions.comparison.NullIf('name_en', models.Value('')), django.db.models.functions.comparison.NullIf('name_ar', models.Value('')), models.Value('')), models.TextField()), models.F('id'), name='clinic_listing_name_en_idx'),
+        ),
+    ]
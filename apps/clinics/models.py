@@ -2,8 +2,28 @@
 # clinics/models.py
 # ============================================
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Cast, Coalesce, NullIf
 from django.utils.translation import gettext_lazy as _
 from django.utils.text import slugify
+from modeltranslation.utils import get_language, resolution_order
+
+
+def sort_name(language=None):
+    """
+    The clinic name as displayed in ``language`` (default: the active one),
+    as a never-NULL expression
+
+    Follows modeltranslation's fallback order, where NULL and '' both fall
+    back, so ordering and keyset cursors see the text the page shows.
+    """
+    languages = resolution_order(language or get_language())
+    # Cast, not output_field=: a field in Coalesce's extra never compares equal
+    # to the migration's copy, so the index below would always look changed
+    return Cast(
+        Coalesce(*[NullIf(f'name_{code}', Value('')) for code in languages], Value('')),
+        models.TextField(),
+    )
 
 
 class Clinic(models.Model):
@@ -45,6 +65,11 @@ class Clinic(models.Model):
             models.Index(fields=['slug']),
             models.Index(fields=['city']),
             models.Index(fields=['-rating']),
+            # Listing sort modes (ClinicListView.sort_modes), pk as tie-breaker
+            models.Index(fields=['is_active', '-rating', 'id'], name='clinic_listing_rating_idx'),
+            models.Index('is_active', sort_name('ar'), 'id', name='clinic_listing_name_ar_idx'),
+            models.Index('is_active', sort_name('en'), 'id', name='clinic_listing_name_en_idx'),
+            models.Index(fields=['is_active', 'city', 'id'], name='clinic_listing_city_idx'),
         ]
 
     def __str__(self):
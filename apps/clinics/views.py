@@ -1,31 +1,47 @@
 from django.shortcuts import render, get_object_or_404
 from django.views.generic import ListView, DetailView
 from django.db.models import Q, Avg, Count
-from .models import Clinic
+from django.utils.translation import gettext_lazy as _
+from .models import Clinic, sort_name
 from apps.doctors.models import Doctor
 from apps.services.models import Service
+from apps.appointments.availability import annotate_next_available
+from apps.core import search as search_index
+from utils.mixins import CachedResultsMixin, EarliestSlotsMixin, KeysetPaginationMixin
+from utils.pagination import SortMode
 
 
-class ClinicListView(ListView):
+class ClinicListView(KeysetPaginationMixin, CachedResultsMixin, ListView):
     """List all clinics"""
     model = Clinic
     template_name = 'clinics/list.html'
     context_object_name = 'clinics'
-    paginate_by = 12
-
-    def get_queryset(self):
-        queryset = Clinic.objects.filter(is_active=True).annotate(
+    page_size = 12
+    cache_scopes = ('clinic', 'doctor')
+    # Backed by the clinic_listing_* composite indexes (see Clinic.Meta)
+    sort_modes = {
+        'rating': SortMode(_('Highest Rated'), '-rating'),
+        'name': SortMode(_('Name A-Z'), 'sort_name', annotations={'sort_name': sort_name}),
+        'city': SortMode(_('City'), 'city'),
+    }
+    sort_aliases = {'-rating': 'rating'}
+    default_sort = 'rating'
+
+    def get_hydration_queryset(self):
+        return Clinic.objects.annotate(
             doctor_count=Count('doctors'),
             avg_rating=Avg('doctors__rating')
         )
 
+    def build_queryset(self):
+        # No aggregates here: they are only computed for the page (hydration)
+        queryset = Clinic.objects.filter(is_active=True)
+
         # Search
         search = self.request.GET.get('search', '')
         if search:
             queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(description__icontains=search) |
-                Q(city__icontains=search)
+                pk__in=search_index.search_ids(search, search_index.Kind.CLINIC, limit=None)
             )
 
         # Filter by city
@@ -33,10 +49,6 @@ class ClinicListView(ListView):
         if city:
             queryset = queryset.filter(city=city)
 
-        # Ordering
-        order = self.request.GET.get('order', '-rating')
-        queryset = queryset.order_by(order)
-
         return queryset
 
     def get_context_data(self, **kwargs):
@@ -52,7 +64,7 @@ class ClinicListView(ListView):
         return ['clinics/list.html']
 
 
-class ClinicDetailView(DetailView):
+class ClinicDetailView(EarliestSlotsMixin, DetailView):
     """Clinic detail page"""
     model = Clinic
     template_name = 'clinics/detail.html'
@@ -72,10 +84,8 @@ class ClinicDetailView(DetailView):
         clinic = self.object
 
         # Get doctors
-        context['doctors'] = clinic.doctors.filter(
-            is_available=True,
-            is_verified=True
-        ).select_related('user', 'specialization')
+        context['doctors'] = self.get_scope_doctors().select_related('user', 'specialization')
+        annotate_next_available(context['doctors'])
 
         # Get services
         context['services'] = clinic.services.filter(is_active=True)
@@ -91,6 +101,12 @@ class ClinicDetailView(DetailView):
 
         return context
 
+    def get_scope_doctors(self):
+        return self.object.doctors.filter(
+            is_available=True,
+            is_verified=True
+        )
+
 
 class ClinicDoctorsView(ListView):
     """Clinic doctors list (HTMX)"""
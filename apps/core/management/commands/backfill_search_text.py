@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.services.models import Service
+from utils.arabic import build_search_text
+
+
+class Command(BaseCommand):
+    help = 'Recompute the normalized search_text column of services'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        started = time.perf_counter()
+
+        # Clinics, doctors and specializations are searched through
+        # SearchDocument (rebuild_search_index), not a column of their own
+        changed = []
+        updated = 0
+        for service in Service.objects.iterator(chunk_size=batch_size):
+            search_text = build_search_text(service, service.SEARCH_FIELDS)
+            if search_text != service.search_text:
+                service.search_text = search_text
+                changed.append(service)
+            if len(changed) >= batch_size:
+                updated += Service.objects.bulk_update(changed, ['search_text'])
+                changed = []
+        if changed:
+            updated += Service.objects.bulk_update(changed, ['search_text'])
+        self.stdout.write(f'Service: {updated} updated')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Search text backfilled in {elapsed:.2f}s'))
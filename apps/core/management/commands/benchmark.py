@@ -0,0 +1,362 @@
+"""
+Availability / booking / dashboard micro-benchmarks
+
+Runs against a throwaway test database seeded with synthetic data, so it
+never touches real rows:
+
+    python manage.py benchmark --doctors 1000 --appointments 100000 --output bench.json
+
+Each benchmark records wall time (min/median/max over --repeat runs), query
+count and peak Python allocations (tracemalloc, measured in a separate run
+so it doesn't skew timings). Cached views (listing query cache, admin
+overview snapshot, chart payloads) are timed on a cleared cache. Compare
+JSON files between commits.
+"""
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timedelta, time as dt_time
+from decimal import Decimal
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from apps.appointments import availability_cache
+from apps.appointments.forms import AppointmentCreateForm
+from apps.appointments.models import Appointment, Payment
+from apps.appointments.views import get_available_time_slots
+from apps.clinics.models import Clinic
+from apps.dashboard import ledger, rollups
+from apps.doctors.models import Doctor, Specialization, WorkingHour, DayOff
+from apps.services.models import Service
+from apps.users.models import Profile
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+SPECIALIZATIONS = [
+    'Cardiology', 'Dermatology', 'Pediatrics', 'Orthopedics', 'Neurology',
+    'Ophthalmology', 'Dentistry', 'General Medicine', 'Gynecology', 'Psychiatry',
+]
+SLOT_TIMES = [dt_time(hour, minute) for hour in range(9, 17) for minute in (0, 30)]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark availability, booking and dashboard hot paths on a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctors', type=int, default=100, help='Synthetic doctors (100 - 10,000)')
+        parser.add_argument('--appointments', type=int, default=10000, help='Synthetic appointments (up to 1M)')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per benchmark')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for reproducible data')
+        parser.add_argument('--output', default='benchmark.json', help='JSON result file')
+        parser.add_argument('--keepdb', action='store_true', help='Keep (and reuse) the benchmark database')
+
+    def handle(self, *args, **options):
+        if options['doctors'] < 1 or options['appointments'] < 0:
+            raise CommandError('--doctors must be >= 1 and --appointments >= 0')
+
+        self.random = random.Random(options['seed'])
+        old_name = connection.settings_dict['NAME']
+
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            if not Doctor.objects.exists():
+                started = time.perf_counter()
+                self.seed(options['doctors'], options['appointments'])
+                self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+            else:
+                self.stdout.write('Reusing seeded benchmark database')
+
+            with translation.override('en'):
+                results = self.run_benchmarks(options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        report = {
+            'meta': self.get_meta(options),
+            'results': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+        for name, result in results.items():
+            if 'error' in result:
+                self.stdout.write(self.style.ERROR(f"{name:<36} {result['error']}"))
+                continue
+            self.stdout.write(
+                f"{name:<36} {result['wall_ms']['median']:>9.2f} ms  "
+                f"{result['queries']:>4} queries  {result['peak_alloc_kb']:>9.1f} KiB"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    # -------------------------
+    # Seeding
+    # -------------------------
+    def seed(self, n_doctors, n_appointments):
+        rnd = self.random
+        password = make_password('password123')
+        today = timezone.now().date()
+
+        specializations = Specialization.objects.bulk_create([
+            Specialization(name=name, name_en=name, slug=name.lower().replace(' ', '-'))
+            for name in SPECIALIZATIONS
+        ])
+
+        n_clinics = max(1, n_doctors // 20)
+        clinics = Clinic.objects.bulk_create([
+            Clinic(
+                name=f'Clinic {i}', name_en=f'Clinic {i}', slug=f'clinic-{i}',
+                description='Benchmark clinic', address='Benchmark street',
+                city=rnd.choice(['Riyadh', 'Jeddah', 'Dammam']),
+                phone='0500000000', email=f'clinic{i}@bench.local'
+            )
+            for i in range(n_clinics)
+        ])
+
+        services_by_clinic = {}
+        services = []
+        for clinic in clinics:
+            for duration, price in ((15, 80), (30, 150), (60, 250)):
+                services.append(Service(
+                    clinic=clinic, name=f'Service {duration}', slug=f'service-{duration}',
+                    description='Benchmark service', duration_minutes=duration, price=price
+                ))
+        for service in Service.objects.bulk_create(services):
+            services_by_clinic.setdefault(service.clinic_id, []).append(service)
+
+        n_patients = min(max(50, n_appointments // 50), 20000)
+        users = [
+            User(email=f'doctor{i}@bench.local', password=password, first_name='Doctor',
+                 last_name=str(i), role=User.Role.DOCTOR)
+            for i in range(n_doctors)
+        ] + [
+            User(email=f'patient{i}@bench.local', password=password, first_name='Patient',
+                 last_name=str(i), role=User.Role.PATIENT)
+            for i in range(n_patients)
+        ] + [
+            User(email='admin@bench.local', password=password, first_name='Admin',
+                 last_name='Bench', role=User.Role.ADMIN, is_staff=True, is_superuser=True)
+        ]
+        users = User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        Profile.objects.bulk_create([Profile(user=user) for user in users], batch_size=BATCH_SIZE)
+        doctor_users, patients = users[:n_doctors], users[n_doctors:n_doctors + n_patients]
+
+        doctors = Doctor.objects.bulk_create([
+            Doctor(
+                user=user, clinic=rnd.choice(clinics), specialization=rnd.choice(specializations),
+                license_number=f'BENCH{i:06d}', bio='Benchmark doctor', is_verified=True,
+                consultation_fee=rnd.randint(100, 500), rating=Decimal(rnd.randint(30, 50)) / 10,
+                experience_years=rnd.randint(1, 30)
+            )
+            for i, user in enumerate(doctor_users)
+        ], batch_size=BATCH_SIZE)
+
+        working_hours, days_off = [], []
+        for doctor in doctors:
+            for day in rnd.sample(range(7), 5):
+                if rnd.random() < 0.3:
+                    # Split shift
+                    working_hours.append(WorkingHour(doctor=doctor, day_of_week=day,
+                                                     start_time=dt_time(9), end_time=dt_time(13)))
+                    working_hours.append(WorkingHour(doctor=doctor, day_of_week=day,
+                                                     start_time=dt_time(14), end_time=dt_time(18)))
+                else:
+                    working_hours.append(WorkingHour(doctor=doctor, day_of_week=day,
+                                                     start_time=dt_time(9), end_time=dt_time(17)))
+            for offset in rnd.sample(range(-30, 90), 3):
+                days_off.append(DayOff(doctor=doctor, date=today + timedelta(days=offset),
+                                       is_recurring=rnd.random() < 0.3))
+        WorkingHour.objects.bulk_create(working_hours, batch_size=BATCH_SIZE)
+        DayOff.objects.bulk_create(days_off, batch_size=BATCH_SIZE)
+
+        statuses = (
+            [Appointment.Status.COMPLETED] * 4 + [Appointment.Status.CONFIRMED] * 3 +
+            [Appointment.Status.PENDING] * 2 + [Appointment.Status.CANCELED]
+        )
+        active = {Appointment.Status.PENDING, Appointment.Status.CONFIRMED}
+        taken = set()
+        batch = []
+        for _ in range(n_appointments):
+            doctor = rnd.choice(doctors)
+            date = today + timedelta(days=rnd.randint(-60, 60))
+            start_time = rnd.choice(SLOT_TIMES)
+            status = rnd.choice(statuses)
+            if status in active:
+                if (doctor.pk, date, start_time) in taken:
+                    status = Appointment.Status.CANCELED
+                else:
+                    taken.add((doctor.pk, date, start_time))
+
+            appointment = Appointment(
+                patient=rnd.choice(patients), doctor=doctor, clinic_id=doctor.clinic_id,
+                service=rnd.choice(services_by_clinic[doctor.clinic_id]),
+                date=date, start_time=start_time, status=status,
+                is_paid=status == Appointment.Status.COMPLETED and rnd.random() < 0.8
+            )
+            appointment.apply_derived_fields()
+            batch.append(appointment)
+            if len(batch) >= BATCH_SIZE:
+                self.seed_payments(Appointment.objects.bulk_create(batch))
+                batch = []
+        self.seed_payments(Appointment.objects.bulk_create(batch))
+
+        # bulk_create skips the signals that maintain the dashboard tables
+        rollups.rebuild()
+        ledger.reconcile()
+
+    def seed_payments(self, appointments):
+        """One completed payment per paid appointment"""
+        payments = []
+        for appointment in appointments:
+            if not appointment.is_paid:
+                continue
+            paid_at = timezone.make_aware(datetime.combine(appointment.date, appointment.start_time))
+            payments.append(Payment(
+                appointment=appointment, patient_id=appointment.patient_id,
+                amount=appointment.base_price, base_amount=appointment.base_price,
+                status=Payment.PaymentStatus.COMPLETED, completed_at=paid_at,
+                transaction_id=f'BENCH-{appointment.pk}'
+            ))
+        Payment.objects.bulk_create(payments, batch_size=BATCH_SIZE)
+
+    # -------------------------
+    # Benchmarks
+    # -------------------------
+    def measure(self, func, repeat, setup=None):
+        """Wall time over ``repeat`` runs, plus queries and peak allocations of one run"""
+        timings = []
+        for _ in range(repeat):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        if setup:
+            setup()
+        with CaptureQueriesContext(connection) as ctx:
+            tracemalloc.start()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        return {
+            'wall_ms': {
+                'min': round(min(timings), 3),
+                'median': round(statistics.median(timings), 3),
+                'max': round(max(timings), 3),
+            },
+            'queries': len(ctx.captured_queries),
+            'peak_alloc_kb': round(peak / 1024, 1),
+        }
+
+    def run_benchmarks(self, repeat):
+        rnd = self.random
+        today = timezone.now().date()
+        doctors = list(Doctor.objects.select_related('clinic', 'user').order_by('pk'))
+        doctor = rnd.choice(doctors)
+        date = today + timedelta(days=rnd.randint(1, 14))
+        service = doctor.clinic.services.order_by('duration_minutes')[1]
+        patient = User.objects.filter(role=User.Role.PATIENT).first()
+        admin = User.objects.filter(role=User.Role.ADMIN).first()
+
+        clients = {}
+
+        def get(url, user, **params):
+            if user.pk not in clients:
+                # Debug toolbar only renders for INTERNAL_IPS
+                clients[user.pk] = (Client(REMOTE_ADDR='10.0.0.1'), user)
+                clients[user.pk][0].force_login(user)
+            client = clients[user.pk][0]
+
+            def run():
+                response = client.get(url, params)
+                if response.status_code != 200:
+                    raise CommandError(f'{url} returned {response.status_code}')
+            return run
+
+        form_data = {
+            'doctor': doctor.pk, 'service': service.pk, 'date': date.isoformat(),
+            'start_time': '10:00', 'symptoms': '', 'notes': '',
+        }
+
+        def cold_cache():
+            # Time cached views on a miss; sessions live in the cache too
+            cache.clear()
+            for client, user in clients.values():
+                client.force_login(user)
+
+        def clean_form():
+            AppointmentCreateForm(data=form_data, user=patient, doctor=doctor).is_valid()
+
+        benchmarks = {
+            'get_available_time_slots.cold': (
+                lambda: get_available_time_slots(doctor, date, service),
+                lambda: availability_cache.invalidate_doctor(doctor.pk)
+            ),
+            'get_available_time_slots.warm': (
+                lambda: get_available_time_slots(doctor, date, service), None
+            ),
+            'check_availability': (
+                get(reverse('appointments:check_availability'), patient,
+                    doctor=doctor.pk, date=date.isoformat(), time='10:00', service=service.pk),
+                None
+            ),
+            'AppointmentCreateForm.clean': (clean_form, None),
+            'DoctorListView': (get(reverse('doctors:list'), patient), cold_cache),
+            'PatientDashboardView': (get(reverse('dashboard:patient'), patient), None),
+            'DoctorDashboardView': (get(reverse('dashboard:doctor'), doctor.user), None),
+            'AdminDashboardView': (get(reverse('dashboard:admin'), admin), cold_cache),
+            'AdminStatisticsView': (get(reverse('dashboard:admin_statistics'), admin), None),
+            'appointments_chart_data': (get(reverse('dashboard:appointments_chart'), admin), cold_cache),
+            'revenue_chart_data': (get(reverse('dashboard:revenue_chart'), admin), cold_cache),
+        }
+
+        results = {}
+        for name, (func, setup) in benchmarks.items():
+            self.stdout.write(f'Running {name}...')
+            try:
+                results[name] = self.measure(func, repeat, setup)
+            except Exception as exc:
+                # Keep going; a path that fails on this backend is reported, not timed
+                results[name] = {'error': f'{type(exc).__name__}: {exc}'}
+        return results
+
+    def get_meta(self, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                cwd=settings.BASE_DIR
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+
+        return {
+            'commit': commit,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'scale': {
+                'doctors': options['doctors'],
+                'appointments': options['appointments'],
+                'seed': options['seed'],
+                'repeat': options['repeat'],
+            },
+        }
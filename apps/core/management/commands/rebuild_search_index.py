@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for doctors, clinics and specializations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=search.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = search.rebuild(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+
+        for kind, count in counts.items():
+            self.stdout.write(f'{kind}: {count} documents')
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt in {elapsed:.2f}s'))
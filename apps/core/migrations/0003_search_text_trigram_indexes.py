@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# A trigram GIN index makes ``search_text__contains`` (LIKE '%term%') index-backed
+# on PostgreSQL; other backends keep a plain scan of the normalized column.
+# Only services have the column: clinics, doctors and specializations are
+# searched through SearchDocument
+TABLES = ['services_service']
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in TABLES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_search_text_trgm '
+            f'ON {table} USING gin (search_text gin_trgm_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in TABLES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_search_text_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_search_backends'),
+        ('services', '0003_search_text'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -1,3 +1,34 @@
 from django.db import models
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+
+class SearchDocument(models.Model):
+    """
+    Denormalized, bilingual search row for a doctor, clinic or specialization
+
+    ``title`` holds the names (weighted higher when ranking) and ``body`` the
+    remaining searchable text, both with the Arabic and English translations.
+    The full-text structures themselves (a generated tsvector plus trigram
+    GIN indexes on PostgreSQL, an FTS5 table kept in sync by triggers on
+    SQLite) are created by migration 0002 and queried by apps.core.search.
+    """
+
+    class Kind(models.TextChoices):
+        DOCTOR = 'doctor', _('Doctor')
+        CLINIC = 'clinic', _('Clinic')
+        SPECIALIZATION = 'specialization', _('Specialization')
+
+    kind = models.CharField(_('kind'), max_length=20, choices=Kind.choices)
+    object_id = models.PositiveBigIntegerField(_('object id'))
+    title = models.TextField(_('title'))
+    body = models.TextField(_('body'), blank=True)
+
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('search document')
+        verbose_name_plural = _('search documents')
+        unique_together = ['kind', 'object_id']
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.title}"
@@ -0,0 +1,108 @@
+"""
+Query-result cache for search and listing pages
+
+Results (ordered primary keys, facet counts, ...) are cached under keys built
+from the view name, the active language (``i18n_patterns`` serves /ar/ and
+/en/), the normalized GET parameters and one generation counter per model
+scope the view depends on. Changing a Doctor, Clinic or Specialization bumps
+its scope (see apps.core.signals), so stale entries are never read again and
+simply expire.
+
+A cold key is computed by one request only: the first miss takes a short
+lock in the cache, concurrent misses wait for its result instead of
+recomputing it (single flight).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import get_language
+
+from utils.arabic import normalize_arabic
+
+KEY_PREFIX = 'qcache'
+LOCK_TIMEOUT = 10
+WAIT_INTERVAL = 0.05
+
+# Free-text parameters share entries across spelling variants
+TEXT_PARAMS = ('q', 'search')
+
+
+def get_timeout():
+    return getattr(settings, 'QUERY_CACHE_TIMEOUT', 5 * 60)
+
+
+def _generation_key(scope):
+    return f'{KEY_PREFIX}:gen:{scope}'
+
+
+def generations(scopes):
+    """Current counter of every scope (one cache round trip)"""
+    keys = {_generation_key(scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    stamps = []
+    for key, scope in sorted(keys.items(), key=lambda item: item[1]):
+        if key not in found:
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key) or 0
+        stamps.append(f'{scope}={found[key]}')
+    return ','.join(stamps)
+
+
+def bump(*scopes):
+    """Invalidate every cached result depending on one of the scopes"""
+    now = time.time_ns()
+    cache.set_many({_generation_key(scope): now for scope in scopes}, None)
+
+
+def normalize_params(params, ignore=()):
+    """Sorted, de-duplicated (name, value) pairs without empty values"""
+    pairs = set()
+    for name, values in params.lists():
+        if name in ignore:
+            continue
+        for value in values:
+            value = normalize_arabic(value) if name in TEXT_PARAMS else value.strip()
+            if value:
+                pairs.add((name, value))
+    return sorted(pairs)
+
+
+def make_key(name, params, scopes, ignore=()):
+    signature = repr((normalize_params(params, ignore), generations(scopes)))
+    digest = hashlib.md5(signature.encode()).hexdigest()
+    return f'{KEY_PREFIX}:{name}:{get_language()}:{digest}'
+
+
+def get_or_compute(key, compute, timeout=None):
+    """
+    Cached value of ``key``, computing it at most once across concurrent misses
+
+    Waiters give up after LOCK_TIMEOUT seconds and compute the value
+    themselves (e.g. if the lock holder died).
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = f'{key}:lock'
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+    while not locked and time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+        locked = cache.add(lock_key, 1, LOCK_TIMEOUT)
+
+    try:
+        # The previous holder may have filled the key just before releasing
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            cache.set(key, value, get_timeout() if timeout is None else timeout)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
@@ -0,0 +1,237 @@
+"""
+Bilingual full-text search
+
+Doctors, clinics and specializations are flattened into SearchDocument rows
+(names in ``title``, everything else in ``body``, Arabic and English
+translations side by side, normalized with utils.arabic like the query
+tokens). Rows are kept current by the signal handlers in
+apps.core.signals and rebuilt from scratch by ``manage.py rebuild_search_index``.
+
+Queries are ranked by the database:
+
+* PostgreSQL: prefix ``tsquery`` over a weighted, generated tsvector plus
+  trigram similarity on the title (typo tolerance), both GIN-indexed.
+* SQLite: FTS5 prefix query ranked with bm25 (local development and tests).
+* Anything else: ``icontains`` over the denormalized rows.
+"""
+import re
+
+from django.db import connection, transaction
+
+from utils.arabic import normalize_arabic
+from .models import SearchDocument
+
+Kind = SearchDocument.Kind
+
+FTS_TABLE = 'core_searchdocument_fts'
+MAX_TOKENS = 8
+CANDIDATE_LIMIT = 50
+BATCH_SIZE = 500
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def _join(*values):
+    """Normalized, space-joined non-empty values without repeats (ar/en often match)"""
+    seen = []
+    for value in values:
+        value = normalize_arabic(value)
+        if value and value not in seen:
+            seen.append(value)
+    return ' '.join(seen)
+
+
+def _translations(obj, field):
+    return [getattr(obj, f'{field}_ar', ''), getattr(obj, f'{field}_en', ''), getattr(obj, field, '')]
+
+
+def _doctor_document(doctor):
+    user = doctor.user
+    specialization = doctor.specialization
+    clinic = doctor.clinic
+    return {
+        'title': _join(user.first_name, user.last_name),
+        'body': _join(
+            *_translations(specialization, 'name'),
+            *_translations(doctor, 'bio'),
+            *_translations(clinic, 'name'),
+            clinic.city,
+        ),
+    }
+
+
+def _clinic_document(clinic):
+    return {
+        'title': _join(*_translations(clinic, 'name')),
+        'body': _join(
+            clinic.city,
+            *_translations(clinic, 'description'),
+            *_translations(clinic, 'address'),
+        ),
+    }
+
+
+def _specialization_document(specialization):
+    return {
+        'title': _join(*_translations(specialization, 'name')),
+        'body': _join(*_translations(specialization, 'description')),
+    }
+
+
+def _sources():
+    """kind -> (model, queryset for indexing, document builder)"""
+    from apps.clinics.models import Clinic
+    from apps.doctors.models import Doctor, Specialization
+
+    return {
+        Kind.DOCTOR: (
+            Doctor,
+            Doctor.objects.select_related('user', 'specialization', 'clinic'),
+            _doctor_document,
+        ),
+        Kind.CLINIC: (Clinic, Clinic.objects.all(), _clinic_document),
+        Kind.SPECIALIZATION: (Specialization, Specialization.objects.all(), _specialization_document),
+    }
+
+
+def kind_for(instance):
+    for kind, (model, _, _) in _sources().items():
+        if isinstance(instance, model):
+            return kind
+    return None
+
+
+def index_instance(instance):
+    """Insert or refresh the search row of one doctor/clinic/specialization"""
+    kind = kind_for(instance)
+    if kind is None:
+        return
+    build = _sources()[kind][2]
+    SearchDocument.objects.update_or_create(
+        kind=kind, object_id=instance.pk, defaults=build(instance)
+    )
+
+
+def remove_instance(instance):
+    kind = kind_for(instance)
+    if kind is not None:
+        SearchDocument.objects.filter(kind=kind, object_id=instance.pk).delete()
+
+
+def index_queryset(kind, queryset):
+    """Refresh the rows of many objects of one kind (e.g. a clinic's doctors)"""
+    build = _sources()[kind][2]
+    for instance in queryset.iterator(chunk_size=BATCH_SIZE):
+        SearchDocument.objects.update_or_create(
+            kind=kind, object_id=instance.pk, defaults=build(instance)
+        )
+
+
+@transaction.atomic
+def rebuild(batch_size=BATCH_SIZE):
+    """Recreate every search row; returns {kind: count}"""
+    SearchDocument.objects.all().delete()
+    counts = {}
+    for kind, (_, queryset, build) in _sources().items():
+        documents = [
+            SearchDocument(kind=kind, object_id=instance.pk, **build(instance))
+            for instance in queryset.iterator(chunk_size=batch_size)
+        ]
+        SearchDocument.objects.bulk_create(documents, batch_size=batch_size)
+        counts[kind] = len(documents)
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return counts
+
+
+def tokenize(query):
+    """Query tokens, normalized like the indexed text"""
+    return TOKEN_RE.findall(normalize_arabic(query))[:MAX_TOKENS]
+
+
+def _search_postgresql(tokens, kind, limit):
+    tsquery = ' & '.join(f'{token}:*' for token in tokens)
+    phrase = ' '.join(tokens)
+    sql = """
+        SELECT object_id FROM core_searchdocument
+        WHERE kind = %s
+          AND (search_vector @@ to_tsquery('simple', %s) OR title %% %s)
+        ORDER BY ts_rank(search_vector, to_tsquery('simple', %s)) + similarity(title, %s) DESC
+    """
+    params = [kind, tsquery, phrase, tsquery, phrase]
+    if limit:
+        sql += ' LIMIT %s'
+        params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_sqlite(tokens, kind, limit):
+    match = ' '.join(f'"{token}"*' for token in tokens)
+    sql = f"""
+        SELECT d.object_id FROM {FTS_TABLE}
+        JOIN core_searchdocument d ON d.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s AND d.kind = %s
+        ORDER BY bm25({FTS_TABLE}, 10.0, 1.0)
+    """
+    params = [match, kind]
+    if limit:
+        sql += ' LIMIT %s'
+        params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_fallback(tokens, kind, limit):
+    from django.db.models import Q
+
+    queryset = SearchDocument.objects.filter(kind=kind)
+    for token in tokens:
+        queryset = queryset.filter(Q(title__icontains=token) | Q(body__icontains=token))
+    ids = queryset.order_by('title').values_list('object_id', flat=True)
+    return list(ids[:limit] if limit else ids)
+
+
+BACKENDS = {
+    'postgresql': _search_postgresql,
+    'sqlite': _search_sqlite,
+}
+
+
+def search_ids(query, kind, limit=CANDIDATE_LIMIT):
+    """Primary keys of one kind matching ``query``, best match first"""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    backend = BACKENDS.get(connection.vendor, _search_fallback)
+    return backend(tokens, kind, limit)
+
+
+def visible_ids(queryset, query, kind, limit, candidates=CANDIDATE_LIMIT):
+    """
+    Up to ``limit`` primary keys matching ``query`` that ``queryset`` keeps,
+    best match first
+
+    Visibility (available, verified, active...) is not part of the index,
+    so when the best ``candidates`` matches are mostly filtered out the
+    search is repeated with four times as many until ``limit`` rows are
+    found or the matches run out.
+    """
+    while True:
+        ids = search_ids(query, kind, limit=candidates)
+        kept = set(queryset.filter(pk__in=ids).values_list('pk', flat=True))
+        result = [pk for pk in ids if pk in kept][:limit]
+        if len(result) >= limit or len(ids) < candidates:
+            return result
+        candidates *= 4
+
+
+def ranked(queryset, ids, limit=None):
+    """Objects of ``queryset`` among ``ids``, in the order of ``ids``"""
+    objects = queryset.in_bulk(ids)
+    results = [objects[pk] for pk in ids if pk in objects]
+    return results[:limit] if limit else results
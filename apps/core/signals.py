@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.clinics.models import Clinic
+from apps.doctors.models import Doctor, Specialization
+from . import query_cache, search, typeahead
+
+User = get_user_model()
+
+NAME_FIELDS = {'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_save, sender=Clinic)
+@receiver(post_save, sender=Specialization)
+def update_search_document(sender, instance, **kwargs):
+    search.index_instance(instance)
+    typeahead.bump_version()
+    query_cache.bump(sender._meta.model_name)
+    # Doctor rows embed their clinic and specialization names
+    if sender is not Doctor:
+        search.index_queryset(
+            search.Kind.DOCTOR,
+            Doctor.objects.filter(**{sender._meta.model_name: instance})
+            .select_related('user', 'specialization', 'clinic')
+        )
+
+
+@receiver(post_delete, sender=Doctor)
+@receiver(post_delete, sender=Clinic)
+@receiver(post_delete, sender=Specialization)
+def delete_search_document(sender, instance, **kwargs):
+    search.remove_instance(instance)
+    typeahead.bump_version()
+    query_cache.bump(sender._meta.model_name)
+
+
+@receiver(post_save, sender=User)
+def update_doctor_name(sender, instance, update_fields=None, **kwargs):
+    """Re-index a doctor when the user's name changes (not on every login)"""
+    if update_fields is not None and not NAME_FIELDS & set(update_fields):
+        return
+    doctor = Doctor.objects.filter(user=instance).select_related(
+        'user', 'specialization', 'clinic'
+    ).first()
+    if doctor is not None:
+        search.index_instance(doctor)
+        typeahead.bump_version()
+        query_cache.bump('doctor')
@@ -0,0 +1,148 @@
+"""
+In-process typeahead index
+
+Autocomplete for the global search box is served from a prefix trie held in
+each worker's memory: doctor names, clinic names, cities and specialization
+names in Arabic and English. Every word of a label is indexed, so "card"
+suggests "Cardiology" and "ahm" suggests "Ali Ahmed". Each trie node keeps
+its best suggestions precomputed, so a lookup is one walk of len(prefix)
+dict hops and no database query.
+
+The index is built on first use in a worker and rebuilt when the shared
+version stamp in the cache moves on; the signal handlers in apps.core.signals
+bump it whenever a Doctor, Clinic or Specialization row changes.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from utils.arabic import normalize_arabic
+
+VERSION_KEY = 'typeahead:version'
+MAX_SUGGESTIONS = 8
+MAX_PREFIX = 20
+
+
+# kind: 'doctor', 'clinic', 'city' or 'specialization'
+# key: pk, slug or city name used to build the link
+Suggestion = namedtuple('Suggestion', 'label kind key weight', defaults=(0,))
+
+
+def normalize(text):
+    return normalize_arabic(text)
+
+
+class Trie:
+    """
+    Prefix trie whose nodes carry their top suggestions
+
+    A node is a dict ``{char: child_node, ..., None: suggestions}``.
+    """
+
+    __slots__ = ('root',)
+
+    def __init__(self, suggestions=()):
+        self.root = {None: []}
+        for suggestion in suggestions:
+            self.add(suggestion)
+        self._finalize(self.root)
+
+    def add(self, suggestion):
+        words = normalize(suggestion.label).split(' ')
+        seen = set()
+        for position in range(len(words)):
+            # Index the label from each word onwards ("ali ahmed", "ahmed")
+            text = ' '.join(words[position:])[:MAX_PREFIX]
+            node = self.root
+            for char in text:
+                node = node.setdefault(char, {None: []})
+                if id(node) not in seen:
+                    seen.add(id(node))
+                    node[None].append(suggestion)
+
+    def _finalize(self, root):
+        """Keep only the best MAX_SUGGESTIONS per node"""
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            best = sorted(set(node[None]), key=lambda s: (-s.weight, s.label))
+            node[None] = tuple(best[:MAX_SUGGESTIONS])
+            stack.extend(child for char, child in node.items() if char is not None)
+
+    def lookup(self, prefix, limit=MAX_SUGGESTIONS):
+        node = self.root
+        for char in normalize(prefix)[:MAX_PREFIX]:
+            node = node.get(char)
+            if node is None:
+                return ()
+        return node[None][:limit]
+
+
+def _translations(obj, field):
+    return {getattr(obj, f'{field}_{lang}', '') or '' for lang in ('ar', 'en')} - {''}
+
+
+def collect_suggestions():
+    """Every suggestion currently in the database (a few narrow queries)"""
+    from apps.clinics.models import Clinic
+    from apps.doctors.models import Doctor, Specialization
+
+    suggestions = []
+    doctors = Doctor.objects.filter(is_available=True, is_verified=True).values_list(
+        'pk', 'user__first_name', 'user__last_name', 'rating'
+    )
+    for pk, first_name, last_name, rating in doctors:
+        label = f'{first_name} {last_name}'.strip()
+        if label:
+            suggestions.append(Suggestion(label, 'doctor', str(pk), float(rating or 0)))
+
+    cities = set()
+    for clinic in Clinic.objects.filter(is_active=True).only(
+        'slug', 'city', 'rating', 'name_ar', 'name_en'
+    ):
+        for name in _translations(clinic, 'name'):
+            suggestions.append(Suggestion(name, 'clinic', clinic.slug, float(clinic.rating or 0)))
+        if clinic.city:
+            cities.add(clinic.city)
+    suggestions.extend(Suggestion(city, 'city', city) for city in cities)
+
+    for specialization in Specialization.objects.only('slug', 'name_ar', 'name_en'):
+        for name in _translations(specialization, 'name'):
+            suggestions.append(Suggestion(name, 'specialization', specialization.slug))
+    return suggestions
+
+
+_lock = threading.Lock()
+_state = {'version': None, 'trie': None}
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """Mark every worker's index stale (called on catalogue changes)"""
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def get_trie():
+    version = current_version()
+    if _state['version'] == version and _state['trie'] is not None:
+        return _state['trie']
+    with _lock:
+        if _state['version'] != version or _state['trie'] is None:
+            # Swap in the new trie in one assignment; readers keep the old one
+            _state['trie'], _state['version'] = Trie(collect_suggestions()), version
+    return _state['trie']
+
+
+def suggest(prefix, limit=MAX_SUGGESTIONS):
+    if not normalize(prefix):
+        return ()
+    return get_trie().lookup(prefix, limit)
@@ -6,6 +6,7 @@ from . import views
 urlpatterns = [
     path('', views.HomeView.as_view(), name='home'),
     path('search/', views.SearchView.as_view(), name='search'),
+    path('search/suggest/', views.SuggestView.as_view(), name='search_suggest'),
     path('about/', views.AboutView.as_view(), name='about'),
     path('contact/', views.ContactView.as_view(), name='contact'),
 ]
\ No newline at end of file
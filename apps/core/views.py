@@ -1,8 +1,8 @@
 from django.views.generic import TemplateView
 from django.shortcuts import render
-from django.db.models import Q
 from apps.doctors.models import Doctor, Specialization
 from apps.clinics.models import Clinic
+from . import query_cache, search, typeahead
 
 
 class HomeView(TemplateView):
@@ -13,38 +13,50 @@ class HomeView(TemplateView):
 class SearchView(TemplateView):
     """Global search"""
     template_name = 'partials/search_results.html'
+    # Results shown per kind
+    limit = 5
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        query = self.request.GET.get('q', '')
+        # The home page box submits ``search``, the header box ``q``
+        query = self.request.GET.get('q') or self.request.GET.get('search', '')
 
         if query:
-            # Search doctors
-            context['doctors'] = Doctor.objects.filter(
-                Q(user__first_name__icontains=query) |
-                Q(user__last_name__icontains=query) |
-                Q(bio__icontains=query) |
-                Q(specialization__name__icontains=query),
-                is_available=True,
-                is_verified=True
-            ).select_related('user', 'specialization', 'clinic')[:5]
-
-            # Search clinics
-            context['clinics'] = Clinic.objects.filter(
-                Q(name__icontains=query) |
-                Q(description__icontains=query) |
-                Q(city__icontains=query),
-                is_active=True
-            )[:5]
-
-            # Search specializations
-            context['specializations'] = Specialization.objects.filter(
-                name__icontains=query
-            )[:5]
+            querysets = {
+                search.Kind.DOCTOR: Doctor.objects.filter(
+                    is_available=True,
+                    is_verified=True
+                ).select_related('user__profile', 'specialization', 'clinic'),
+                search.Kind.CLINIC: Clinic.objects.filter(is_active=True),
+                search.Kind.SPECIALIZATION: Specialization.objects.all(),
+            }
+            key = query_cache.make_key(
+                'SearchView', self.request.GET, ('doctor', 'clinic', 'specialization')
+            )
+            ids = query_cache.get_or_compute(key, lambda: {
+                kind: search.visible_ids(queryset, query, kind, self.limit)
+                for kind, queryset in querysets.items()
+            })
+
+            for name, kind in (('doctors', search.Kind.DOCTOR), ('clinics', search.Kind.CLINIC),
+                               ('specializations', search.Kind.SPECIALIZATION)):
+                context[name] = search.ranked(querysets[kind], ids[kind])
 
         return context
 
 
+class SuggestView(TemplateView):
+    """Typeahead suggestions for the search box (served from memory)"""
+    template_name = 'partials/search_suggestions.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q') or self.request.GET.get('search', '')
+        context['query'] = query
+        context['suggestions'] = typeahead.suggest(query)
+        return context
+
+
 class AboutView(TemplateView):
     """About page"""
     template_name = 'about.html'
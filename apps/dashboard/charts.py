@@ -0,0 +1,82 @@
+"""
+Dashboard chart data
+
+Chart payloads change only when appointments or revenue change, so every
+range has a cheap version: the day (the window slides at midnight), the
+language and the generation counter of its data, bumped by
+apps.dashboard.rollups / ledger on every write. The version is the ETag
+(an ``If-None-Match`` poll is answered 304 without touching the database)
+and the server-side cache key of the JSON payload.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.translation import get_language
+
+from apps.core import query_cache
+from . import ledger, rollups
+
+KEY_PREFIX = 'dashboard:chart'
+
+
+def get_timeout():
+    return getattr(settings, 'CHART_CACHE_TIMEOUT', 10 * 60)
+
+
+def _months_back(first_of_month, months):
+    """First day of the month ``months`` before ``first_of_month``"""
+    index = first_of_month.year * 12 + first_of_month.month - 1 - months
+    return first_of_month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def appointments_data(days, today):
+    data = rollups.by_day(date__gte=today - timedelta(days=days))
+    return {
+        'labels': [day.strftime('%Y-%m-%d') for day, count in data],
+        'values': [count for day, count in data],
+    }
+
+
+def revenue_data(months, today):
+    data = ledger.by_month(date__gte=_months_back(today.replace(day=1), months - 1))
+    return {
+        'labels': [row['month'].strftime('%b %Y') for row in data],
+        'values': [float(row['total']) if row['total'] else 0 for row in data],
+    }
+
+
+# name -> (range parameter, allowed values, default, data scope, builder)
+CHARTS = {
+    'appointments': ('days', (7, 30, 90), 30, rollups.SCOPE, appointments_data),
+    'revenue': ('months', (6, 12, 24), 12, ledger.SCOPE, revenue_data),
+}
+
+
+def get_range(name, params):
+    """The requested range of a chart, or its default if missing or not allowed"""
+    param, allowed, default = CHARTS[name][:3]
+    try:
+        value = int(params.get(param, default))
+    except (TypeError, ValueError):
+        return default
+    return value if value in allowed else default
+
+
+def version(name, params):
+    """ETag value of a chart: changes with its range, the day, the language and its data"""
+    size = get_range(name, params)
+    today = timezone.now().date()
+    signature = f'{name}:{size}:{today.isoformat()}:{get_language()}:{query_cache.generations([CHARTS[name][3]])}'
+    return hashlib.md5(signature.encode()).hexdigest()
+
+
+def get_data(name, params):
+    """JSON payload of a chart, cached under its version"""
+    size = get_range(name, params)
+    build = CHARTS[name][4]
+    today = timezone.now().date()
+    return query_cache.get_or_compute(
+        f'{KEY_PREFIX}:{name}:{version(name, params)}', lambda: build(size, today), get_timeout()
+    )
@@ -0,0 +1,246 @@
+"""
+Report exports
+
+Appointment and payment reports are read with a ``values_list()``
+projection over ``.iterator(chunk_size=EXPORT_CHUNK_SIZE)`` and written by
+the streaming writers in utils.spreadsheets, so neither a download nor a
+background file ever holds more than one chunk of rows in memory.
+
+Downloads stream straight into the response (``stream``); background
+exports are ReportExport rows processed by ``manage.py run_exports``
+(``run_pending``), which writes a compressed file and emails the link.
+"""
+import gzip
+import tempfile
+from datetime import date
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from apps.appointments.email_service import EmailService
+from apps.appointments.models import Appointment, Payment
+from utils.spreadsheets import CSV_CONTENT_TYPE, XLSX_CONTENT_TYPE, csv_stream, xlsx_stream
+from .models import ReportExport
+
+Kind = ReportExport.Kind
+Format = ReportExport.Format
+
+
+def get_chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+class ReportSpec:
+    """What a report reads: its model, scope lookups, annotations and columns"""
+
+    def __init__(self, model, lookups, columns, annotations=None):
+        self.model = model
+        # Filter name -> ORM lookup ('date_from' / 'date_to' get __gte / __lte)
+        self.lookups = lookups
+        # (header, field or annotation name)
+        self.columns = columns
+        self.annotations = annotations or {}
+
+    @property
+    def header(self):
+        return [header for header, _field in self.columns]
+
+    def queryset(self, filters):
+        queryset = self.model.objects.all()
+        for name, value in filters.items():
+            if value in (None, ''):
+                continue
+            if name == 'date_from':
+                queryset = queryset.filter(**{f"{self.lookups['date']}__gte": _as_date(value)})
+            elif name == 'date_to':
+                queryset = queryset.filter(**{f"{self.lookups['date']}__lte": _as_date(value)})
+            elif name in self.lookups:
+                queryset = queryset.filter(**{self.lookups[name]: value})
+        return queryset.annotate(**self.annotations).order_by('pk').values_list(
+            *[field for _header, field in self.columns]
+        )
+
+
+def _as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _full_name(prefix):
+    return Concat(f'{prefix}__first_name', Value(' '), f'{prefix}__last_name')
+
+
+REPORTS = {
+    Kind.APPOINTMENTS: ReportSpec(
+        Appointment,
+        lookups={'date': 'date', 'clinic': 'clinic_id', 'doctor': 'doctor_id', 'status': 'status'},
+        annotations={
+            'patient_name': _full_name('patient'),
+            'doctor_name': _full_name('doctor__user'),
+        },
+        columns=[
+            (_('ID'), 'id'),
+            (_('Date'), 'date'),
+            (_('Start time'), 'start_time'),
+            (_('End time'), 'end_time'),
+            (_('Status'), 'status'),
+            (_('Patient'), 'patient_name'),
+            (_('Patient email'), 'patient__email'),
+            (_('Doctor'), 'doctor_name'),
+            (_('Specialization'), 'doctor__specialization__name'),
+            (_('Clinic'), 'clinic__name'),
+            (_('Service'), 'service__name'),
+            (_('Base price'), 'base_price'),
+            (_('Cancellation fee'), 'cancellation_fee'),
+            (_('Late payment fee'), 'late_payment_fee'),
+            (_('Total amount'), 'total_amount'),
+            (_('Paid'), 'is_paid'),
+            (_('Paid at'), 'paid_at'),
+            (_('Booked at'), 'created_at'),
+        ],
+    ),
+    Kind.PAYMENTS: ReportSpec(
+        Payment,
+        lookups={
+            'date': 'created_at__date',
+            'clinic': 'appointment__clinic_id',
+            'doctor': 'appointment__doctor_id',
+            'status': 'status',
+        },
+        annotations={
+            'patient_name': _full_name('patient'),
+            'doctor_name': _full_name('appointment__doctor__user'),
+        },
+        columns=[
+            (_('ID'), 'id'),
+            (_('Transaction'), 'transaction_id'),
+            (_('Created at'), 'created_at'),
+            (_('Completed at'), 'completed_at'),
+            (_('Status'), 'status'),
+            (_('Method'), 'payment_method'),
+            (_('Amount'), 'amount'),
+            (_('Base amount'), 'base_amount'),
+            (_('Late fee'), 'late_fee_amount'),
+            (_('Cancellation fee'), 'cancellation_fee_amount'),
+            (_('Refunded'), 'is_refunded'),
+            (_('Refund amount'), 'refund_amount'),
+            (_('Refunded at'), 'refunded_at'),
+            (_('Appointment'), 'appointment_id'),
+            (_('Appointment date'), 'appointment__date'),
+            (_('Patient'), 'patient_name'),
+            (_('Patient email'), 'patient__email'),
+            (_('Doctor'), 'doctor_name'),
+            (_('Clinic'), 'appointment__clinic__name'),
+        ],
+    ),
+}
+
+CONTENT_TYPES = {
+    Format.CSV: CSV_CONTENT_TYPE,
+    Format.XLSX: XLSX_CONTENT_TYPE,
+}
+
+
+def rows(kind, filters, chunk_size=None):
+    """Row tuples of a report, fetched ``chunk_size`` at a time"""
+    return REPORTS[kind].queryset(filters).iterator(chunk_size=chunk_size or get_chunk_size())
+
+
+def stream(kind, fmt, filters, chunk_size=None):
+    """Encoded chunks of a report file"""
+    spec = REPORTS[kind]
+    records = rows(kind, filters, chunk_size)
+    if fmt == Format.XLSX:
+        return xlsx_stream(spec.header, records, sheet_name=str(Kind(kind).label))
+    return csv_stream(spec.header, records)
+
+
+def filename(kind, fmt, filters):
+    parts = [kind]
+    if filters.get('date_from') or filters.get('date_to'):
+        parts.append(f"{filters.get('date_from', 'start')}_{filters.get('date_to', 'today')}")
+    else:
+        parts.append(timezone.localdate().isoformat())
+    return '-'.join(parts) + f'.{fmt}'
+
+
+# ============================================
+# Background exports
+# ============================================
+
+def write_export(export, chunk_size=None):
+    """Write the file of a ReportExport (CSV is gzip-compressed; XLSX already is)"""
+    name = filename(export.kind, export.format, export.filters)
+    rows_written = 0
+
+    def counted(records):
+        nonlocal rows_written
+        for record in records:
+            rows_written += 1
+            yield record
+
+    spec = REPORTS[export.kind]
+    records = counted(rows(export.kind, export.filters, chunk_size))
+    with tempfile.TemporaryFile() as target:
+        if export.format == Format.XLSX:
+            for chunk in xlsx_stream(spec.header, records, sheet_name=str(export.get_kind_display())):
+                target.write(chunk)
+        else:
+            name += '.gz'
+            with gzip.GzipFile(filename=name[:-3], mode='wb', fileobj=target) as compressed:
+                for chunk in csv_stream(spec.header, records):
+                    compressed.write(chunk)
+        target.seek(0)
+        export.file.save(name, File(target), save=False)
+    export.row_count = rows_written
+    return export
+
+
+def _claim(export):
+    """Mark a pending export as running; False if another worker got it first"""
+    return bool(ReportExport.objects.filter(
+        pk=export.pk, status=ReportExport.Status.PENDING
+    ).update(status=ReportExport.Status.RUNNING))
+
+
+def notify(export):
+    return EmailService.send_email(
+        subject=str(_('Your report is ready')),
+        to_email=export.requested_by.email,
+        template_name='emails/export_ready.html',
+        context={'export': export},
+    )
+
+
+def process(export, chunk_size=None):
+    """Run one claimed export to completion and notify the requester"""
+    try:
+        write_export(export, chunk_size)
+    except Exception as exc:
+        export.status = ReportExport.Status.FAILED
+        export.error = str(exc)
+    else:
+        export.status = ReportExport.Status.DONE
+    export.finished_at = timezone.now()
+    export.save()
+    if export.status == ReportExport.Status.DONE:
+        notify(export)
+    return export
+
+
+def run_pending(limit=None, chunk_size=None):
+    """Process pending exports, oldest first; returns the processed exports"""
+    pending = ReportExport.objects.filter(
+        status=ReportExport.Status.PENDING
+    ).select_related('requested_by').order_by('created_at')
+    if limit:
+        pending = pending[:limit]
+
+    processed = []
+    for export in pending:
+        if _claim(export):
+            processed.append(process(export, chunk_size))
+    return processed
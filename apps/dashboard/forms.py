@@ -0,0 +1,109 @@
+from django import forms
+from django.utils.translation import gettext_lazy as _
+
+from apps.appointments.models import Appointment, Payment
+from apps.clinics.models import Clinic
+from apps.doctors.models import Doctor
+from .models import ReportExport
+
+FIELD_CLASS = 'px-4 py-2 rounded-lg border border-gray-300 dark:border-gray-600 bg-gray-50 dark:bg-gray-700 text-gray-900 dark:text-white focus:ring-2 focus:ring-purple-500'
+
+STATUS_CHOICES = {
+    ReportExport.Kind.APPOINTMENTS: Appointment.Status.choices,
+    ReportExport.Kind.PAYMENTS: Payment.PaymentStatus.choices,
+}
+
+
+class ReportExportForm(forms.Form):
+    """Report export scope; a doctor's exports are always limited to themselves"""
+
+    MODE_DOWNLOAD = 'download'
+    MODE_BACKGROUND = 'background'
+    MODE_CHOICES = [
+        (MODE_DOWNLOAD, _('Download now')),
+        (MODE_BACKGROUND, _('Prepare in background and email me')),
+    ]
+
+    kind = forms.ChoiceField(
+        label=_('Report'),
+        choices=ReportExport.Kind.choices,
+        widget=forms.Select(attrs={'class': FIELD_CLASS})
+    )
+    format = forms.ChoiceField(
+        label=_('Format'),
+        choices=ReportExport.Format.choices,
+        initial=ReportExport.Format.CSV,
+        widget=forms.Select(attrs={'class': FIELD_CLASS})
+    )
+    date_from = forms.DateField(
+        required=False,
+        label=_('From Date'),
+        widget=forms.DateInput(attrs={'type': 'date', 'class': FIELD_CLASS})
+    )
+    date_to = forms.DateField(
+        required=False,
+        label=_('To Date'),
+        widget=forms.DateInput(attrs={'type': 'date', 'class': FIELD_CLASS})
+    )
+    clinic = forms.ModelChoiceField(
+        required=False,
+        label=_('Clinic'),
+        queryset=Clinic.objects.order_by('name'),
+        empty_label=_('All Clinics'),
+        widget=forms.Select(attrs={'class': FIELD_CLASS})
+    )
+    doctor = forms.ModelChoiceField(
+        required=False,
+        label=_('Doctor'),
+        queryset=Doctor.objects.select_related('user').order_by('user__first_name', 'user__last_name'),
+        empty_label=_('All Doctors'),
+        widget=forms.Select(attrs={'class': FIELD_CLASS})
+    )
+    status = forms.ChoiceField(
+        required=False,
+        label=_('Status'),
+        choices=[('', _('All Statuses'))]
+        + list(Appointment.Status.choices)
+        + [choice for choice in Payment.PaymentStatus.choices if choice[0] not in Appointment.Status.values],
+        widget=forms.Select(attrs={'class': FIELD_CLASS})
+    )
+    mode = forms.ChoiceField(
+        label=_('Delivery'),
+        choices=MODE_CHOICES,
+        initial=MODE_DOWNLOAD,
+        widget=forms.Select(attrs={'class': FIELD_CLASS})
+    )
+
+    def __init__(self, *args, doctor=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scoped_doctor = doctor
+        if doctor is not None:
+            del self.fields['clinic']
+            del self.fields['doctor']
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError(_('The start date must be before the end date'))
+
+        kind = cleaned_data.get('kind')
+        status = cleaned_data.get('status')
+        if kind and status and status not in dict(STATUS_CHOICES[kind]):
+            self.add_error('status', _('This status does not apply to the selected report'))
+        return cleaned_data
+
+    def get_filters(self):
+        """JSON-serializable export filters (see apps.dashboard.exports)"""
+        data = self.cleaned_data
+        doctor = self.scoped_doctor or data.get('doctor')
+        clinic = data.get('clinic')
+        filters = {
+            'date_from': data['date_from'].isoformat() if data.get('date_from') else None,
+            'date_to': data['date_to'].isoformat() if data.get('date_to') else None,
+            'clinic': clinic.pk if clinic else None,
+            'doctor': doctor.pk if doctor else None,
+            'status': data.get('status') or None,
+        }
+        return {name: value for name, value in filters.items() if value is not None}
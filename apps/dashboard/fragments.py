@@ -0,0 +1,153 @@
+"""
+Doctor dashboard fragments
+
+The doctor dashboards (dashboard:doctor and doctors:dashboard) render an
+empty shell; each widget is fetched by HTMX on load from its own endpoint.
+A fragment's data is cached per doctor, day and language for its own TTL,
+under a key that also carries the generation counters it depends on:
+
+* ``rollups.doctor_scope`` - bumped on every write to the doctor's
+  appointments (signals, bulk series, admin actions);
+* ``ledger.doctor_scope`` - bumped when the doctor's revenue changes;
+* ``'doctor'`` - bumped when any Doctor row changes (rating, patients).
+
+So a slow widget never delays the others, and a change shows up on the
+next load instead of after the TTL. Each app serves its widgets through a
+subclass of BaseFragmentView with its own templates.
+"""
+import hashlib
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.translation import get_language
+from django.views.generic import TemplateView
+
+from apps.appointments.availability import ACTIVE_STATUSES
+from apps.appointments.models import Appointment
+from apps.core import query_cache
+from apps.doctors.models import Doctor
+from utils.mixins import DoctorRequiredMixin
+from . import ledger, overview, rollups
+
+KEY_PREFIX = 'dashboard:fragment'
+
+
+def _appointments(doctor):
+    return Appointment.objects.filter(doctor=doctor).select_related('patient__profile', 'service')
+
+
+def build_stats(doctor, today):
+    windows = overview.date_windows(today)
+    summaries = rollups.summarize_windows(
+        {'today': windows['today'], 'week': windows['week'], 'upcoming': (today, None)}, doctor=doctor
+    )
+
+    def active(name):
+        by_status = summaries[name]['by_status']
+        return by_status['PENDING'] + by_status['CONFIRMED']
+
+    return {
+        'today_count': active('today'),
+        'week_count': active('week'),
+        'pending_count': summaries['upcoming']['by_status']['PENDING'],
+        'total_patients': doctor.total_patients,
+        'rating': doctor.rating,
+        'total_reviews': doctor.total_reviews,
+    }
+
+
+def build_monthly(doctor, today):
+    month = overview.date_windows(today)['month']
+    summary = rollups.summarize_windows({'month': month}, doctor=doctor)['month']
+    return {
+        'appointments': summary['count'],
+        'completed': summary['by_status']['COMPLETED'],
+        'revenue': ledger.summarize_windows({'month': month}, doctor=doctor)['month']['net'],
+    }
+
+
+def build_today(doctor, today):
+    return list(_appointments(doctor).filter(
+        date=today, status__in=ACTIVE_STATUSES
+    ).order_by('start_time'))
+
+
+def build_upcoming(doctor, today):
+    return list(_appointments(doctor).filter(
+        date__gte=today, status__in=ACTIVE_STATUSES
+    ).order_by('date', 'start_time')[:10])
+
+
+def build_pending(doctor, today):
+    return list(_appointments(doctor).filter(
+        date__gte=today, status='PENDING'
+    ).order_by('date', 'start_time')[:5])
+
+
+class Fragment:
+    """A cached dashboard widget: its data builder, TTL and scopes"""
+
+    def __init__(self, build, timeout, appointments=True, revenue=False, profile=False):
+        self.build = build
+        self.timeout = timeout
+        self.appointments = appointments
+        self.revenue = revenue
+        self.profile = profile
+
+    def get_scopes(self, doctor):
+        scopes = []
+        if self.appointments:
+            scopes.append(rollups.doctor_scope(doctor.pk))
+        if self.revenue:
+            scopes.append(ledger.doctor_scope(doctor.pk))
+        if self.profile:
+            scopes.append('doctor')
+        return scopes
+
+
+# name -> fragment; lists change most often and get the shortest TTLs
+FRAGMENTS = {
+    'stats': Fragment(build_stats, timeout=5 * 60, profile=True),
+    'monthly': Fragment(build_monthly, timeout=15 * 60, revenue=True),
+    'today': Fragment(build_today, timeout=60),
+    'upcoming': Fragment(build_upcoming, timeout=2 * 60),
+    'pending': Fragment(build_pending, timeout=2 * 60),
+}
+
+
+def get_data(name, doctor, today=None):
+    """Cached data of one fragment of ``doctor``'s dashboard"""
+    fragment = FRAGMENTS[name]
+    today = today or timezone.now().date()
+    versions = query_cache.generations(fragment.get_scopes(doctor))
+    digest = hashlib.md5(versions.encode()).hexdigest()
+    key = f'{KEY_PREFIX}:{name}:{doctor.pk}:{today.isoformat()}:{get_language()}:{digest}'
+    return query_cache.get_or_compute(key, lambda: fragment.build(doctor, today), fragment.timeout)
+
+
+class BaseFragmentView(LoginRequiredMixin, DoctorRequiredMixin, TemplateView):
+    """
+    One widget of the signed-in doctor's dashboard (HTMX, ``hx-trigger="load"``)
+
+    ``fragment_templates`` maps fragment name -> (template, context name);
+    other names are a 404.
+    """
+    fragment_templates = {}
+
+    def dispatch(self, request, *args, **kwargs):
+        if kwargs['name'] not in self.fragment_templates:
+            raise Http404
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_template_names(self):
+        return [self.fragment_templates[self.kwargs['name']][0]]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        name = self.kwargs['name']
+        doctor = get_object_or_404(Doctor, user=self.request.user)
+        context[self.fragment_templates[name][1]] = get_data(name, doctor)
+        context['doctor'] = doctor
+        return context
@@ -0,0 +1,206 @@
+"""
+Revenue ledger
+
+Collected revenue comes from Payment records, not service prices: a
+completed payment appends a PAYMENT line with its amount (base price plus
+late and cancellation fees), a refund appends a negative REFUND line. Each
+line also moves the running DailyRevenue totals of its (date, doctor,
+clinic), so charts and reports sum a few pre-aggregated rows.
+
+Recording is idempotent (one line per payment and kind), and
+``reconcile`` rebuilds everything from the Payment table in chunks
+(``manage.py reconcile_revenue``). Once committed, both bump the
+``SCOPE`` generation counter, and a new line also bumps its doctor's
+scope (``doctor_scope``); see apps.dashboard.charts and
+apps.dashboard.fragments.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from apps.appointments.models import Payment
+from apps.core import query_cache
+from .models import DailyRevenue, RevenueEntry
+
+SCOPE = 'dashboard:revenue'
+CHUNK_SIZE = 1000
+Kind = RevenueEntry.Kind
+
+
+def _day(moment):
+    return timezone.localdate(moment) if timezone.is_aware(moment) else moment.date()
+
+
+def _payment_entry(payment, appointment):
+    return RevenueEntry(
+        payment=payment,
+        kind=Kind.PAYMENT,
+        date=_day(payment.completed_at or payment.created_at),
+        doctor_id=appointment.doctor_id,
+        clinic_id=appointment.clinic_id,
+        amount=payment.amount,
+        base_amount=payment.base_amount,
+        late_fee_amount=payment.late_fee_amount,
+        cancellation_fee_amount=payment.cancellation_fee_amount,
+    )
+
+
+def _refund_entry(payment, appointment):
+    return RevenueEntry(
+        payment=payment,
+        kind=Kind.REFUND,
+        date=_day(payment.refunded_at or payment.updated_at),
+        doctor_id=appointment.doctor_id,
+        clinic_id=appointment.clinic_id,
+        amount=-payment.refund_amount,
+    )
+
+
+def _add_to_totals(entry):
+    """Move the running DailyRevenue totals by one ledger line"""
+    is_payment = entry.kind == Kind.PAYMENT
+    changes = {
+        'gross': entry.amount if is_payment else Decimal('0'),
+        'refunds': Decimal('0') if is_payment else -entry.amount,
+        'net': entry.amount,
+        'payments': 1 if is_payment else 0,
+    }
+    key = {'date': entry.date, 'doctor_id': entry.doctor_id, 'clinic_id': entry.clinic_id}
+    rows = DailyRevenue.objects.filter(**key)
+    update = {name: F(name) + value for name, value in changes.items()}
+    if rows.update(**update):
+        return
+    try:
+        with transaction.atomic():
+            DailyRevenue.objects.create(**key, **changes)
+    except IntegrityError:
+        rows.update(**update)
+
+
+def doctor_scope(doctor_id):
+    """Generation scope of one doctor's revenue"""
+    return f'{SCOPE}:doctor:{doctor_id}'
+
+
+def _changed(*doctor_ids):
+    scopes = [SCOPE] + [doctor_scope(doctor_id) for doctor_id in doctor_ids]
+    transaction.on_commit(lambda: query_cache.bump(*scopes))
+
+
+def _record(entry):
+    try:
+        with transaction.atomic():
+            entry.save()
+            _add_to_totals(entry)
+    except IntegrityError:
+        # Already recorded for this payment
+        return None
+    _changed(entry.doctor_id)
+    return entry
+
+
+def record_payment(payment):
+    """Append the line of a completed payment (no-op if already recorded)"""
+    if payment.status != Payment.PaymentStatus.COMPLETED:
+        return None
+    return _record(_payment_entry(payment, payment.appointment))
+
+
+def record_refund(payment):
+    """Append the (negative) line of a refunded payment"""
+    if not payment.is_refunded or not payment.refund_amount:
+        return None
+    return _record(_refund_entry(payment, payment.appointment))
+
+
+@transaction.atomic
+def reconcile(chunk_size=CHUNK_SIZE):
+    """
+    Rebuild the ledger and the daily totals from Payment rows
+
+    Payments are streamed ``chunk_size`` at a time and their lines
+    bulk-inserted per chunk; the totals are then regrouped from the ledger.
+    Returns {'entries': n, 'days': n}.
+    """
+    RevenueEntry.objects.all().delete()
+    DailyRevenue.objects.all().delete()
+
+    payments = Payment.objects.filter(
+        status=Payment.PaymentStatus.COMPLETED
+    ).select_related('appointment').order_by('pk')
+
+    entries = 0
+    batch = []
+    for payment in payments.iterator(chunk_size=chunk_size):
+        batch.append(_payment_entry(payment, payment.appointment))
+        if payment.is_refunded and payment.refund_amount:
+            batch.append(_refund_entry(payment, payment.appointment))
+        if len(batch) >= chunk_size:
+            RevenueEntry.objects.bulk_create(batch)
+            entries += len(batch)
+            batch = []
+    RevenueEntry.objects.bulk_create(batch)
+    entries += len(batch)
+
+    totals = RevenueEntry.objects.order_by().values('date', 'doctor_id', 'clinic_id').annotate(
+        gross_total=Sum('amount', filter=Q(kind=Kind.PAYMENT)),
+        refund_total=Sum('amount', filter=Q(kind=Kind.REFUND)),
+        net_total=Sum('amount'),
+        payment_count=Count('pk', filter=Q(kind=Kind.PAYMENT)),
+    )
+    days = [
+        DailyRevenue(
+            date=row['date'],
+            doctor_id=row['doctor_id'],
+            clinic_id=row['clinic_id'],
+            gross=row['gross_total'] or 0,
+            refunds=-(row['refund_total'] or 0),
+            net=row['net_total'] or 0,
+            payments=row['payment_count'],
+        )
+        for row in totals.iterator(chunk_size=chunk_size)
+    ]
+    DailyRevenue.objects.bulk_create(days, batch_size=chunk_size)
+    _changed()
+    return {'entries': entries, 'days': len(days)}
+
+
+# ============================================
+# Readers
+# ============================================
+
+def summarize_windows(windows, **filters):
+    """
+    {name: {'gross', 'refunds', 'net', 'payments'}} for named (first, last)
+    date windows (None for an open end), in one ``aggregate()``
+    """
+    aggregates = {}
+    for name, (first, last) in windows.items():
+        window = Q()
+        if first is not None:
+            window &= Q(date__gte=first)
+        if last is not None:
+            window &= Q(date__lte=last)
+        for field in ('gross', 'refunds', 'net', 'payments'):
+            aggregates[f'{name}_{field}'] = Sum(field, filter=window)
+    totals = DailyRevenue.objects.filter(**filters).aggregate(**aggregates)
+
+    summaries = defaultdict(dict)
+    for name in windows:
+        for field in ('gross', 'refunds', 'net'):
+            summaries[name][field] = totals[f'{name}_{field}'] or Decimal('0')
+        summaries[name]['payments'] = totals[f'{name}_payments'] or 0
+    return dict(summaries)
+
+
+def by_month(value='net', **filters):
+    """[{'month': date, 'total': amount}] in month order"""
+    return list(
+        DailyRevenue.objects.filter(**filters).annotate(
+            month=TruncMonth('date')
+        ).order_by('month').values('month').annotate(total=Sum(value))
+    )
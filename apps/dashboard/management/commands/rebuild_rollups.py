@@ -0,0 +1,34 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.dashboard import rollups
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f'Invalid date: {value} (expected YYYY-MM-DD)')
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the dashboard appointment rollups from the Appointment table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', type=_date,
+                            help='First date to rebuild (default: all)')
+        parser.add_argument('--to', dest='date_to', type=_date,
+                            help='Last date to rebuild (default: all)')
+        parser.add_argument('--batch-size', type=int, default=rollups.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = rollups.rebuild(
+            date_from=options['date_from'],
+            date_to=options['date_to'],
+            batch_size=options['batch_size']
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'{count} rollup rows rebuilt in {elapsed:.2f}s'))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from apps.dashboard import ledger
+from apps.dashboard.models import DailyRevenue
+
+
+def _net_total():
+    return DailyRevenue.objects.aggregate(total=Sum('net'))['total'] or 0
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the revenue ledger and daily totals from the Payment table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=ledger.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        before = _net_total()
+        result = ledger.reconcile(chunk_size=options['chunk_size'])
+        after = _net_total()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f'Net revenue: {before} SAR before, {after} SAR after')
+        if before != after:
+            self.stdout.write(self.style.WARNING(f'Drift corrected: {after - before} SAR'))
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['entries']} ledger entries, {result['days']} daily rows rebuilt in {elapsed:.2f}s"
+        ))
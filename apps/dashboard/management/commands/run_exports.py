@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.dashboard import exports
+
+
+class Command(BaseCommand):
+    help = 'Write pending background report exports and email their download links'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='Process at most this many exports per run')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Rows fetched per query (default: EXPORT_CHUNK_SIZE)')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new exports')
+        parser.add_argument('--interval', type=int, default=10, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            processed = exports.run_pending(limit=options['limit'], chunk_size=options['chunk_size'])
+            for export in processed:
+                if export.status == export.Status.DONE:
+                    self.stdout.write(f'#{export.pk} {export.kind}: {export.row_count} rows -> {export.file.name}')
+                else:
+                    self.stdout.write(self.style.ERROR(f'#{export.pk} {export.kind} failed: {export.error}'))
+            if processed:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(self.style.SUCCESS(f'{len(processed)} exports processed in {elapsed:.2f}s'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
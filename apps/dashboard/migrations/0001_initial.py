@@ -0,0 +1,37 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('clinics', '0003_listing_sort_indexes'),
+        ('doctors', '0004_listing_sort_indexes'),
+        ('services', '0003_search_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='date')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('CONFIRMED', 'Confirmed'), ('CANCELED', 'Canceled'), ('COMPLETED', 'Completed'), ('NO_SHOW', 'No Show')], max_length=20, verbose_name='status')),
+                ('count', models.IntegerField(default=0, verbose_name='count')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='revenue')),
+                ('clinic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='clinics.clinic', verbose_name='clinic')),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='doctors.doctor', verbose_name='doctor')),
+                ('service', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='services.service', verbose_name='service')),
+            ],
+            options={
+                'verbose_name': 'appointment rollup',
+                'verbose_name_plural': 'appointment rollups',
+                'indexes': [models.Index(fields=['date', 'status'], name='dashboard_a_date_f6ba96_idx'), models.Index(fields=['doctor', 'date'], name='dashboard_a_doctor__d54cf0_idx')],
+                'unique_together': {('date', 'doctor', 'clinic', 'service', 'status')},
+            },
+        ),
+    ]
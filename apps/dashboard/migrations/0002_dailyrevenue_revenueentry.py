@@ -0,0 +1,58 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0010_keyset_history_indexes'),
+        ('clinics', '0003_listing_sort_indexes'),
+        ('dashboard', '0001_initial'),
+        ('doctors', '0004_listing_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='date')),
+                ('gross', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='gross')),
+                ('refunds', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='refunds')),
+                ('net', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='net')),
+                ('payments', models.IntegerField(default=0, verbose_name='payments')),
+                ('clinic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='clinics.clinic', verbose_name='clinic')),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='doctors.doctor', verbose_name='doctor')),
+            ],
+            options={
+                'verbose_name': 'daily revenue',
+                'verbose_name_plural': 'daily revenue',
+                'indexes': [models.Index(fields=['clinic', 'date'], name='dashboard_d_clinic__38fa2e_idx'), models.Index(fields=['doctor', 'date'], name='dashboard_d_doctor__3e2008_idx')],
+                'unique_together': {('date', 'doctor', 'clinic')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RevenueEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('PAYMENT', 'Payment'), ('REFUND', 'Refund')], max_length=10, verbose_name='kind')),
+                ('date', models.DateField(verbose_name='date')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='amount')),
+                ('base_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='base amount')),
+                ('late_fee_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='late fee amount')),
+                ('cancellation_fee_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='cancellation fee amount')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+                ('clinic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='clinics.clinic', verbose_name='clinic')),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='doctors.doctor', verbose_name='doctor')),
+                ('payment', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='appointments.payment', verbose_name='payment')),
+            ],
+            options={
+                'verbose_name': 'revenue entry',
+                'verbose_name_plural': 'revenue entries',
+                'indexes': [models.Index(fields=['date'], name='dashboard_r_date_05380f_idx')],
+                'unique_together': {('payment', 'kind')},
+            },
+        ),
+    ]
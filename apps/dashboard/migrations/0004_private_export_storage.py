@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:57
+
+import apps.dashboard.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0003_report_export'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportexport',
+            name='file',
+            field=models.FileField(blank=True, storage=apps.dashboard.models.export_storage, upload_to=apps.dashboard.models.export_upload_to, verbose_name='file'),
+        ),
+    ]
@@ -1,3 +1,218 @@
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import storages
 from django.db import models
+from django.urls import reverse
+from django.utils.translation import gettext_lazy as _
+
+from apps.appointments.models import Appointment
+
+
+class AppointmentRollup(models.Model):
+    """
+    Appointment count and booked revenue per (date, doctor, clinic, service, status)
+
+    Maintained incrementally by apps.dashboard.rollups (model signals plus
+    explicit calls from bulk paths that bypass them) and rebuilt from the
+    Appointment table by ``manage.py rebuild_rollups``. Dashboards sum these
+    rows instead of aggregating every appointment. Specialization is read
+    through the doctor, so changing a doctor's specialization needs no
+    rollup rewrite.
+    """
+    date = models.DateField(_('date'))
+    doctor = models.ForeignKey(
+        'doctors.Doctor',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('doctor')
+    )
+    clinic = models.ForeignKey(
+        'clinics.Clinic',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('clinic')
+    )
+    service = models.ForeignKey(
+        'services.Service',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name=_('service')
+    )
+    status = models.CharField(_('status'), max_length=20, choices=Appointment.Status.choices)
+
+    count = models.IntegerField(_('count'), default=0)
+    # Sum of Appointment.base_price (the price at booking time)
+    revenue = models.DecimalField(_('revenue'), max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = _('appointment rollup')
+        verbose_name_plural = _('appointment rollups')
+        unique_together = ['date', 'doctor', 'clinic', 'service', 'status']
+        indexes = [
+            models.Index(fields=['date', 'status']),
+            models.Index(fields=['doctor', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} doctor={self.doctor_id} {self.status}: {self.count}"
+
+
+class RevenueEntry(models.Model):
+    """
+    Append-only revenue ledger line: a completed payment or its refund
+
+    Written by apps.dashboard.ledger when a payment completes
+    (Payment.mark_as_completed) and when it is refunded (cancellation with
+    fee); ``manage.py reconcile_revenue`` rebuilds it from Payment rows.
+    Refunds are negative. One line per (payment, kind) keeps recording
+    idempotent.
+    """
+
+    class Kind(models.TextChoices):
+        PAYMENT = 'PAYMENT', _('Payment')
+        REFUND = 'REFUND', _('Refund')
+
+    payment = models.ForeignKey(
+        'appointments.Payment',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name=_('payment')
+    )
+    kind = models.CharField(_('kind'), max_length=10, choices=Kind.choices)
+    date = models.DateField(_('date'))
+    doctor = models.ForeignKey(
+        'doctors.Doctor',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('doctor')
+    )
+    clinic = models.ForeignKey(
+        'clinics.Clinic',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('clinic')
+    )
+
+    amount = models.DecimalField(_('amount'), max_digits=12, decimal_places=2)
+    base_amount = models.DecimalField(_('base amount'), max_digits=12, decimal_places=2, default=0)
+    late_fee_amount = models.DecimalField(_('late fee amount'), max_digits=12, decimal_places=2, default=0)
+    cancellation_fee_amount = models.DecimalField(
+        _('cancellation fee amount'), max_digits=12, decimal_places=2, default=0
+    )
+
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('revenue entry')
+        verbose_name_plural = _('revenue entries')
+        unique_together = ['payment', 'kind']
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.kind} {self.amount} SAR"
+
+
+class DailyRevenue(models.Model):
+    """Running ledger totals per (date, doctor, clinic)"""
+    date = models.DateField(_('date'))
+    doctor = models.ForeignKey(
+        'doctors.Doctor',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('doctor')
+    )
+    clinic = models.ForeignKey(
+        'clinics.Clinic',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('clinic')
+    )
+
+    gross = models.DecimalField(_('gross'), max_digits=14, decimal_places=2, default=0)
+    refunds = models.DecimalField(_('refunds'), max_digits=14, decimal_places=2, default=0)
+    net = models.DecimalField(_('net'), max_digits=14, decimal_places=2, default=0)
+    payments = models.IntegerField(_('payments'), default=0)
+
+    class Meta:
+        verbose_name = _('daily revenue')
+        verbose_name_plural = _('daily revenue')
+        unique_together = ['date', 'doctor', 'clinic']
+        indexes = [
+            models.Index(fields=['clinic', 'date']),
+            models.Index(fields=['doctor', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} doctor={self.doctor_id} clinic={self.clinic_id}: {self.net} SAR"
+
+
+def export_storage():
+    return storages['exports']
+
+
+def export_upload_to(instance, filename):
+    """Unguessable directory per export; the file keeps its readable name"""
+    return f'{uuid.uuid4().hex}/{filename}'
+
+
+class ReportExport(models.Model):
+    """
+    A report export queued for background processing
+
+    ``manage.py run_exports`` writes the file (gzip-compressed CSV or XLSX),
+    then emails the requester the download link captured at request time.
+    """
+
+    class Kind(models.TextChoices):
+        APPOINTMENTS = 'appointments', _('Appointments')
+        PAYMENTS = 'payments', _('Payments')
+
+    class Format(models.TextChoices):
+        CSV = 'csv', _('CSV')
+        XLSX = 'xlsx', _('Excel (XLSX)')
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', _('Pending')
+        RUNNING = 'RUNNING', _('Running')
+        DONE = 'DONE', _('Ready')
+        FAILED = 'FAILED', _('Failed')
+
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='report_exports',
+        verbose_name=_('requested by')
+    )
+    kind = models.CharField(_('kind'), max_length=20, choices=Kind.choices)
+    format = models.CharField(_('format'), max_length=10, choices=Format.choices, default=Format.CSV)
+    # Validated export filters (dates as ISO strings, ids as integers)
+    filters = models.JSONField(_('filters'), default=dict, blank=True)
+    status = models.CharField(_('status'), max_length=10, choices=Status.choices, default=Status.PENDING)
+
+    file = models.FileField(_('file'), upload_to=export_upload_to, storage=export_storage, blank=True)
+    row_count = models.PositiveIntegerField(_('row count'), default=0)
+    download_url = models.URLField(_('download URL'), blank=True)
+    error = models.TextField(_('error'), blank=True)
+
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    finished_at = models.DateTimeField(_('finished at'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('report export')
+        verbose_name_plural = _('report exports')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} export #{self.pk} ({self.status})"
 
-# Create your models here.
+    def get_absolute_url(self):
+        return reverse('dashboard:export_download', kwargs={'pk': self.pk})
@@ -0,0 +1,84 @@
+"""
+Admin overview snapshot
+
+Everything the admin home page shows is computed together: appointment
+counters and revenue for today, this week, this month and all time come
+from one conditional ``aggregate()`` over the rollups
+(``rollups.summarize_windows``), collected revenue for the same windows
+from the ledger's daily totals (``ledger.summarize_windows``), plus a
+handful of catalogue counts and the top lists. The result is cached for
+``ADMIN_OVERVIEW_CACHE_TIMEOUT`` seconds under a key that includes the
+date, so the page renders in constant time and is at most that stale.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.appointments.models import Appointment
+from apps.clinics.models import Clinic
+from apps.core import query_cache
+from apps.doctors.models import Doctor, Specialization
+from apps.services.models import Service
+from apps.users.models import User
+from . import ledger, rollups
+
+KEY_PREFIX = 'dashboard:admin_overview'
+
+
+def get_timeout():
+    return getattr(settings, 'ADMIN_OVERVIEW_CACHE_TIMEOUT', 30)
+
+
+def date_windows(today):
+    """name -> (first, last) for today, this week, this month and all time"""
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    return {
+        'today': (today, today),
+        'week': (week_start, week_start + timedelta(days=6)),
+        'month': (month_start, next_month - timedelta(days=1)),
+        'all': (None, None),
+    }
+
+
+def build(today=None):
+    """Compute the snapshot (uncached)"""
+    today = today or timezone.now().date()
+    windows = date_windows(today)
+    return {
+        'today': today,
+        'windows': windows,
+        'appointments': rollups.summarize_windows(windows),
+        'revenue': ledger.summarize_windows(windows),
+        'catalogue': {
+            'total_clinics': Clinic.objects.filter(is_active=True).count(),
+            'total_doctors': Doctor.objects.filter(is_available=True, is_verified=True).count(),
+            'total_patients': User.objects.filter(role=User.Role.PATIENT).count(),
+            'total_specializations': Specialization.objects.count(),
+            'total_services': Service.objects.filter(is_active=True).count(),
+        },
+        'recent_appointments': list(Appointment.objects.select_related(
+            'patient__profile',
+            'doctor__user',
+            'doctor__specialization',
+            'clinic',
+            'service'
+        ).order_by('-created_at')[:10]),
+        'top_doctors': rollups.ranked(
+            Doctor.objects.select_related('user__profile', 'specialization', 'clinic'), 'doctor', limit=5
+        ),
+        'top_specializations': rollups.ranked(
+            Specialization.objects.all(), 'doctor__specialization', limit=5
+        ),
+        'top_clinics': rollups.ranked(Clinic.objects.all(), 'clinic', limit=5),
+    }
+
+
+def get_snapshot():
+    """The cached snapshot for today (computed by one request at a time)"""
+    today = timezone.now().date()
+    return query_cache.get_or_compute(
+        f'{KEY_PREFIX}:{today.isoformat()}', lambda: build(today), get_timeout()
+    )
@@ -0,0 +1,281 @@
+"""
+Dashboard rollups
+
+AppointmentRollup keeps, per (date, doctor, clinic, service, status), how
+many appointments exist and their booked revenue. Every write path moves
+appointments between rollup rows with signed deltas:
+
+* saves and deletes, through the Appointment signal handlers
+  (``record_save`` / ``record_delete``);
+* ``bulk_create`` of recurring series (``record_created``);
+* queryset ``update()`` from admin actions, which skip signals
+  (``record_update``, called before the update in the same transaction).
+
+``rebuild`` recomputes rows from the Appointment table (``manage.py
+rebuild_rollups``). Every change bumps the ``SCOPE`` generation counter,
+and that of the doctor involved (``doctor_scope``), once committed: chart
+versions and dashboard fragments depend on them (see apps.dashboard.charts
+and apps.dashboard.fragments). Readers below only ever sum rollup rows,
+so a key that briefly exists twice (concurrent first inserts with no
+service) still adds up correctly.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from apps.appointments.models import Appointment
+from apps.core import query_cache
+from .models import AppointmentRollup
+
+SCOPE = 'dashboard:appointments'
+KEY_FIELDS = ('date', 'doctor_id', 'clinic_id', 'service_id', 'status')
+COMPLETED = Appointment.Status.COMPLETED
+BATCH_SIZE = 1000
+
+
+def _key(values):
+    return tuple(values.get(field) for field in KEY_FIELDS)
+
+
+def doctor_scope(doctor_id):
+    """Generation scope of one doctor's appointments"""
+    return f'{SCOPE}:doctor:{doctor_id}'
+
+
+def _changed(*doctor_ids):
+    scopes = [SCOPE] + [doctor_scope(doctor_id) for doctor_id in doctor_ids]
+    transaction.on_commit(lambda: query_cache.bump(*scopes))
+
+
+def _apply(key, count, revenue):
+    """Add a delta to one rollup row (created on first positive delta)"""
+    if not count and not revenue:
+        return
+    lookup = dict(zip(KEY_FIELDS, key))
+    _changed(lookup['doctor_id'])
+    rows = AppointmentRollup.objects.filter(**lookup)
+    updated = rows.update(count=F('count') + count, revenue=F('revenue') + revenue)
+    # Negative deltas never create rows: their row is gone only when the
+    # doctor/clinic itself was deleted (cascade)
+    if updated or count <= 0:
+        return
+    try:
+        with transaction.atomic():
+            AppointmentRollup.objects.create(**lookup, count=count, revenue=revenue)
+    except IntegrityError:
+        rows.update(count=F('count') + count, revenue=F('revenue') + revenue)
+
+
+def _apply_all(deltas):
+    for key, (count, revenue) in deltas.items():
+        _apply(key, count, revenue)
+
+
+def _values(appointment):
+    return {
+        'date': appointment.date,
+        'doctor_id': appointment.doctor_id,
+        'clinic_id': appointment.clinic_id,
+        'service_id': appointment.service_id,
+        'status': appointment.status,
+        'base_price': appointment.base_price or Decimal('0'),
+    }
+
+
+def record_save(instance, created):
+    """Move a saved appointment from its previous rollup row to its current one"""
+    new = _values(instance)
+    deltas = defaultdict(lambda: [0, Decimal('0')])
+    if not created:
+        previous = getattr(instance, '_loaded_values', None)
+        if previous is None:
+            # Not loaded from the database (e.g. saved by pk): unknown origin
+            return
+        old = {field: previous.get(field, new[field]) for field in new}
+        if old == new:
+            return
+        deltas[_key(old)][0] -= 1
+        deltas[_key(old)][1] -= old['base_price'] or 0
+    deltas[_key(new)][0] += 1
+    deltas[_key(new)][1] += new['base_price']
+    _apply_all(deltas)
+
+
+def record_delete(instance):
+    values = _values(instance)
+    _apply(_key(values), -1, -values['base_price'])
+
+
+def record_created(appointments):
+    """Count appointments inserted with bulk_create"""
+    deltas = defaultdict(lambda: [0, Decimal('0')])
+    for appointment in appointments:
+        values = _values(appointment)
+        deltas[_key(values)][0] += 1
+        deltas[_key(values)][1] += values['base_price']
+    _apply_all(deltas)
+
+
+def record_update(queryset, **changes):
+    """
+    Move the rows of ``queryset`` as ``queryset.update(**changes)`` will
+
+    Call right before the update, inside the same transaction.
+    """
+    changed = {f'{name}_id' if f'{name}_id' in KEY_FIELDS else name: value
+               for name, value in changes.items()}
+    if not set(changed) & set(KEY_FIELDS):
+        return
+    groups = queryset.order_by().values(*KEY_FIELDS).annotate(
+        total=Count('pk'), revenue=Sum('base_price')
+    )
+    deltas = defaultdict(lambda: [0, Decimal('0')])
+    for group in groups:
+        revenue = group['revenue'] or Decimal('0')
+        deltas[_key(group)][0] -= group['total']
+        deltas[_key(group)][1] -= revenue
+        moved = {**group, **{k: v for k, v in changed.items() if k in KEY_FIELDS}}
+        deltas[_key(moved)][0] += group['total']
+        deltas[_key(moved)][1] += revenue
+    _apply_all(deltas)
+
+
+@transaction.atomic
+def rebuild(date_from=None, date_to=None, batch_size=BATCH_SIZE):
+    """Recompute rollup rows (optionally for a date range); returns the row count"""
+    appointments = Appointment.objects.all()
+    rollups = AppointmentRollup.objects.all()
+    if date_from:
+        appointments = appointments.filter(date__gte=date_from)
+        rollups = rollups.filter(date__gte=date_from)
+    if date_to:
+        appointments = appointments.filter(date__lte=date_to)
+        rollups = rollups.filter(date__lte=date_to)
+
+    rollups.delete()
+    groups = appointments.order_by().values(*KEY_FIELDS).annotate(
+        total=Count('pk'), booked=Sum('base_price')
+    )
+    rows = [
+        AppointmentRollup(
+            **{field: group[field] for field in KEY_FIELDS},
+            count=group['total'],
+            revenue=group['booked'] or 0
+        )
+        for group in groups.iterator(chunk_size=batch_size)
+    ]
+    AppointmentRollup.objects.bulk_create(rows, batch_size=batch_size)
+    _changed()
+    return len(rows)
+
+
+# ============================================
+# Readers
+# ============================================
+
+def rows(**filters):
+    """Rollup rows matching Appointment-style filters (date, status, doctor, ...)"""
+    return AppointmentRollup.objects.filter(**filters)
+
+
+def summarize(**filters):
+    """
+    {'count', 'by_status', 'revenue'} over matching appointments
+
+    ``revenue`` is the booked revenue of completed appointments. One query.
+    """
+    by_status = {}
+    revenue = Decimal('0')
+    for status, count, total in rows(**filters).order_by().values_list('status').annotate(
+        total_count=Sum('count'), total_revenue=Sum('revenue')
+    ):
+        by_status[status] = count or 0
+        if status == COMPLETED:
+            revenue = total or Decimal('0')
+    return {
+        'count': sum(by_status.values()),
+        'by_status': by_status,
+        'revenue': revenue,
+    }
+
+
+def _window_q(first, last):
+    q = Q()
+    if first is not None:
+        q &= Q(date__gte=first)
+    if last is not None:
+        q &= Q(date__lte=last)
+    return q
+
+
+def summarize_windows(windows, **filters):
+    """
+    ``summarize()`` for several date windows in one ``aggregate()``
+
+    ``windows`` maps a name to ``(first, last)`` dates (either may be None
+    for an open end); every (window, status) count and every window's
+    completed revenue is a filtered Sum over the same scan.
+    """
+    aggregates = {}
+    for name, (first, last) in windows.items():
+        window = _window_q(first, last)
+        for status in Appointment.Status.values:
+            aggregates[f'{name}_{status}'] = Sum('count', filter=window & Q(status=status))
+        aggregates[f'{name}_revenue'] = Sum('revenue', filter=window & Q(status=COMPLETED))
+    totals = rows(**filters).aggregate(**aggregates)
+
+    summaries = {}
+    for name in windows:
+        by_status = {
+            status: totals[f'{name}_{status}'] or 0 for status in Appointment.Status.values
+        }
+        summaries[name] = {
+            'count': sum(by_status.values()),
+            'by_status': by_status,
+            'revenue': totals[f'{name}_revenue'] or Decimal('0'),
+        }
+    return summaries
+
+
+def counts_by(field, **filters):
+    """{value of ``field``: appointment count}"""
+    return dict(
+        rows(**filters).order_by().values_list(field).annotate(total=Sum('count'))
+    )
+
+
+def ranked(queryset, field, limit=None, **filters):
+    """
+    Objects of ``queryset`` with an ``appointment_count`` attribute, most
+    booked first; ``field`` is the rollup path to their pk (e.g. 'doctor',
+    'doctor__specialization'). With ``limit`` only the top ones are loaded.
+    """
+    counts = counts_by(field, **filters)
+    if limit:
+        top = sorted(counts, key=lambda pk: -counts[pk])[:limit]
+        objects = list(queryset.filter(pk__in=top))
+    else:
+        objects = list(queryset)
+    for obj in objects:
+        obj.appointment_count = counts.get(obj.pk, 0)
+    objects.sort(key=lambda obj: -obj.appointment_count)
+    return objects[:limit] if limit else objects
+
+
+def by_day(**filters):
+    """[(date, count)] in date order"""
+    return list(
+        rows(**filters).order_by('date').values_list('date').annotate(total=Sum('count'))
+    )
+
+
+def by_month(value='count', **filters):
+    """[{'month': date, 'total': n}] in month order, summing ``value``"""
+    return list(
+        rows(**filters).annotate(month=TruncMonth('date')).order_by('month').values(
+            'month'
+        ).annotate(total=Sum(value))
+    )
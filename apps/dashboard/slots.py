@@ -0,0 +1,50 @@
+"""
+Slot buckets
+
+Peak-hour and weekday statistics group appointments by the stored
+``start_hour`` / ``weekday`` columns (set in
+Appointment.apply_derived_fields) rather than extracting them from
+start_time, so they are grouped index scans and portable across databases.
+"""
+from math import ceil
+
+from django.db.models import Count, F
+from django.utils.dates import WEEKDAYS
+
+HEAT_LEVELS = 4
+
+
+def hour_counts(appointments):
+    """``appointments`` grouped by start hour: values {'hour', 'count'} (unordered)"""
+    return appointments.filter(start_hour__isnull=False).order_by().annotate(
+        hour=F('start_hour')
+    ).values('hour').annotate(count=Count('pk'))
+
+
+def heatmap(appointments):
+    """
+    Weekday x hour grid of ``appointments``
+
+    {'hours': [...], 'rows': [{'label', 'cells': [{'hour', 'count', 'level'}]}]}
+    with Monday first and ``level`` from 0 (none) to HEAT_LEVELS (busiest
+    slot); None when there is nothing to show.
+    """
+    counts = {
+        (weekday, hour): count
+        for weekday, hour, count in appointments.filter(start_hour__isnull=False).order_by().values_list(
+            'weekday', 'start_hour'
+        ).annotate(count=Count('pk'))
+    }
+    if not counts:
+        return None
+
+    hours = range(min(hour for _, hour in counts), max(hour for _, hour in counts) + 1)
+    busiest = max(counts.values())
+    rows = []
+    for weekday, label in WEEKDAYS.items():
+        cells = []
+        for hour in hours:
+            count = counts.get((weekday, hour), 0)
+            cells.append({'hour': hour, 'count': count, 'level': ceil(count * HEAT_LEVELS / busiest)})
+        rows.append({'label': label, 'cells': cells})
+    return {'hours': list(hours), 'rows': rows}
@@ -14,6 +14,7 @@ urlpatterns = [
     path('doctor/', views.DoctorDashboardView.as_view(), name='doctor'),
     path('doctor/analytics/', views.DoctorAnalyticsView.as_view(), name='doctor_analytics'),
     path('doctor/patients/', views.DoctorPatientsView.as_view(), name='doctor_patients'),
+    path('doctor/fragments/<slug:name>/', views.DoctorFragmentView.as_view(), name='doctor_fragment'),
 
     # Admin Dashboard
     path('admin/', views.AdminDashboardView.as_view(), name='admin'),
@@ -21,6 +22,10 @@ urlpatterns = [
     path('admin/reports/', views.AdminReportsView.as_view(), name='admin_reports'),
     path('admin/analytics/', views.AdminAnalyticsView.as_view(), name='admin_analytics'),
 
+    # Report exports (admins and doctors)
+    path('exports/', views.ReportExportView.as_view(), name='export'),
+    path('exports/<int:pk>/download/', views.ExportDownloadView.as_view(), name='export_download'),
+
     # HTMX endpoints for charts
     path('admin/chart/appointments/', views.appointments_chart_data, name='appointments_chart'),
     path('admin/chart/revenue/', views.revenue_chart_data, name='revenue_chart'),
@@ -3,20 +3,30 @@
 apps/dashboard/views.py - لوحات التحكم الكاملة
 ============================================
 """
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
+from django.views import View
 from django.views.generic import TemplateView, ListView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.db.models import Count, Sum, Avg, Q, Max
-from django.db.models.functions import TruncDate, TruncMonth
+from django.db.models.functions import TruncMonth
 from django.utils import timezone
-from django.http import JsonResponse
+from django.utils.translation import gettext_lazy as _
+from django.contrib import messages
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition
 from datetime import datetime, timedelta
 
 from apps.users.models import User
 from apps.clinics.models import Clinic
 from apps.doctors.models import Doctor, Specialization
 from apps.appointments.models import Appointment
+from apps.appointments.timeline import PatientTimeline
+from apps.dashboard import charts, exports, fragments, overview, rollups, slots
+from apps.dashboard.forms import ReportExportForm
+from apps.dashboard.models import ReportExport
 from apps.services.models import Service
+from utils.mixins import CursorPaginationMixin
+from utils.pagination import SortMode
 
 
 class DashboardRedirectView(LoginRequiredMixin, TemplateView):
@@ -43,47 +53,12 @@ class PatientDashboardView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        user = self.request.user
-        today = timezone.now().date()
-
-        # Get patient's appointments
-        appointments = Appointment.objects.filter(patient=user)
-
-        # Upcoming appointments
-        context['upcoming_appointments'] = appointments.filter(
-            date__gte=today,
-            status__in=['PENDING', 'CONFIRMED']
-        ).select_related(
-            'doctor__user',
-            'doctor__specialization',
-            'clinic',
-            'service'
-        ).order_by('date', 'start_time')[:5]
-
-        # Statistics
-        context['stats'] = {
-            'total_appointments': appointments.count(),
-            'upcoming': appointments.filter(
-                date__gte=today,
-                status__in=['PENDING', 'CONFIRMED']
-            ).count(),
-            'completed': appointments.filter(status='COMPLETED').count(),
-            'canceled': appointments.filter(status='CANCELED').count(),
-        }
+        timeline = PatientTimeline(self.request.user)
 
-        # Recent appointments
-        context['recent_appointments'] = appointments.select_related(
-            'doctor__user',
-            'doctor__specialization',
-            'clinic'
-        ).order_by('-created_at')[:5]
-
-        # Favorite doctors (most visited)
-        context['favorite_doctors'] = Doctor.objects.filter(
-            appointments__patient=user
-        ).annotate(
-            visit_count=Count('appointments')
-        ).select_related('user', 'specialization', 'clinic').order_by('-visit_count')[:3]
+        context['upcoming_appointments'] = timeline.upcoming(limit=5)
+        context['stats'] = timeline.stats()
+        context['recent_appointments'] = timeline.recent()
+        context['favorite_doctors'] = timeline.favorite_doctors()
 
         return context
 
@@ -93,7 +68,7 @@ class PatientDashboardView(LoginRequiredMixin, TemplateView):
 # ============================================
 
 class DoctorDashboardView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
-    """Doctor dashboard"""
+    """Doctor dashboard shell; its widgets load as HTMX fragments"""
     template_name = 'dashboard/doctor.html'
 
     def test_func(self):
@@ -101,67 +76,20 @@ class DoctorDashboardView(LoginRequiredMixin, UserPassesTestMixin, TemplateView)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        user = self.request.user
-        doctor = Doctor.objects.select_related('clinic', 'specialization').get(user=user)
-
-        today = timezone.now().date()
-        week_start = today - timedelta(days=today.weekday())
-        week_end = week_start + timedelta(days=6)
-
-        # Today's appointments
-        context['today_appointments'] = Appointment.objects.filter(
-            doctor=doctor,
-            date=today,
-            status__in=['PENDING', 'CONFIRMED']
-        ).select_related('patient', 'service').order_by('start_time')
-
-        # This week's appointments
-        context['week_appointments'] = Appointment.objects.filter(
-            doctor=doctor,
-            date__range=[week_start, week_end],
-            status__in=['PENDING', 'CONFIRMED']
-        ).select_related('patient', 'service').order_by('date', 'start_time')
-
-        # Pending appointments (need confirmation)
-        context['pending_appointments'] = Appointment.objects.filter(
-            doctor=doctor,
-            status='PENDING',
-            date__gte=today
-        ).select_related('patient', 'service').order_by('date', 'start_time')[:5]
-
-        # Statistics
-        context['stats'] = {
-            'today_count': context['today_appointments'].count(),
-            'week_count': context['week_appointments'].count(),
-            'pending_count': context['pending_appointments'].count(),
-            'total_patients': doctor.total_patients,
-            'rating': doctor.rating,
-            'total_reviews': doctor.total_reviews,
-        }
+        context['doctor'] = get_object_or_404(
+            Doctor.objects.select_related('clinic', 'specialization'), user=self.request.user
+        )
+        return context
 
-        # Monthly statistics
-        current_month_start = today.replace(day=1)
-        context['monthly_stats'] = {
-            'appointments': Appointment.objects.filter(
-                doctor=doctor,
-                date__gte=current_month_start
-            ).count(),
-            'completed': Appointment.objects.filter(
-                doctor=doctor,
-                date__gte=current_month_start,
-                status='COMPLETED'
-            ).count(),
-            'revenue': Appointment.objects.filter(
-                doctor=doctor,
-                date__gte=current_month_start,
-                status='COMPLETED'
-            ).aggregate(
-                total=Sum('service__price')
-            )['total'] or 0,
-        }
 
-        context['doctor'] = doctor
-        return context
+class DoctorFragmentView(fragments.BaseFragmentView):
+    """One widget of the doctor dashboard (see apps.dashboard.fragments)"""
+    fragment_templates = {
+        'stats': ('dashboard/partials/doctor_stats.html', 'stats'),
+        'monthly': ('dashboard/partials/doctor_monthly.html', 'monthly_stats'),
+        'today': ('dashboard/partials/doctor_today.html', 'today_appointments'),
+        'pending': ('dashboard/partials/doctor_pending.html', 'pending_appointments'),
+    }
 
 
 class DoctorAnalyticsView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
@@ -180,46 +108,35 @@ class DoctorAnalyticsView(LoginRequiredMixin, UserPassesTestMixin, TemplateView)
         six_months_ago = today - timedelta(days=180)
 
         # Appointments by month
-        appointments_by_month = Appointment.objects.filter(
-            doctor=doctor,
-            date__gte=six_months_ago
-        ).annotate(
-            month=TruncMonth('date')
-        ).values('month').annotate(
-            count=Count('id')
-        ).order_by('month')
-
-        context['appointments_by_month'] = list(appointments_by_month)
+        context['appointments_by_month'] = [
+            {'month': row['month'], 'count': row['total']}
+            for row in rollups.by_month(doctor=doctor, date__gte=six_months_ago)
+        ]
 
         # Appointments by status
-        appointments_by_status = Appointment.objects.filter(
-            doctor=doctor
-        ).values('status').annotate(
-            count=Count('id')
-        )
-
-        context['appointments_by_status'] = list(appointments_by_status)
+        context['appointments_by_status'] = [
+            {'status': status, 'count': count}
+            for status, count in rollups.counts_by('status', doctor=doctor).items()
+        ]
 
-        # Peak hours
-        peak_hours = Appointment.objects.filter(
-            doctor=doctor,
-            status='COMPLETED'
-        ).extra(
-            select={'hour': 'EXTRACT(hour FROM start_time)'}
-        ).values('hour').annotate(
-            count=Count('id')
-        ).order_by('-count')[:5]
+        # Peak hours and weekday heatmap (completed visits)
+        completed = Appointment.objects.filter(doctor=doctor, status='COMPLETED')
+        context['peak_hours'] = list(slots.hour_counts(completed).order_by('-count', 'hour')[:5])
+        context['weekday_heatmap'] = slots.heatmap(completed)
 
-        context['peak_hours'] = list(peak_hours)
+        context['export_form'] = ReportExportForm(doctor=doctor)
+        context['recent_exports'] = ReportExport.objects.filter(requested_by=self.request.user)[:5]
 
         return context
 
 
-class DoctorPatientsView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class DoctorPatientsView(LoginRequiredMixin, UserPassesTestMixin, CursorPaginationMixin, ListView):
     """Doctor's patients list"""
     template_name = 'dashboard/doctor_patients.html'
+    partial_template_name = 'dashboard/partials/patient_rows.html'
     context_object_name = 'patients'
     paginate_by = 20
+    sort_mode = SortMode(_('Last visit'), '-last_visit', '-pk')
 
     def test_func(self):
         return self.request.user.is_doctor
@@ -227,15 +144,13 @@ class DoctorPatientsView(LoginRequiredMixin, UserPassesTestMixin, ListView):
     def get_queryset(self):
         doctor = Doctor.objects.get(user=self.request.user)
 
-        # Get unique patients with their last appointment
-        patients = User.objects.filter(
+        # Unique patients with their last appointment (ordered by sort_mode)
+        return User.objects.filter(
             appointments__doctor=doctor
         ).distinct().annotate(
             last_visit=Max('appointments__date'),
             total_visits=Count('appointments')
-        ).order_by('-last_visit')
-
-        return patients
+        )
 
 
 # ============================================
@@ -251,60 +166,29 @@ class AdminDashboardView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        today = timezone.now().date()
+        snapshot = overview.get_snapshot()
+        appointments = snapshot['appointments']
 
         # Overview statistics
         context['stats'] = {
-            'total_clinics': Clinic.objects.filter(is_active=True).count(),
-            'total_doctors': Doctor.objects.filter(is_available=True, is_verified=True).count(),
-            'total_patients': User.objects.filter(role=User.Role.PATIENT).count(),
-            'total_appointments': Appointment.objects.count(),
-            'today_appointments': Appointment.objects.filter(date=today).count(),
-            'pending_appointments': Appointment.objects.filter(status='PENDING').count(),
-            'total_specializations': Specialization.objects.count(),
-            'total_services': Service.objects.filter(is_active=True).count(),
+            **snapshot['catalogue'],
+            'total_appointments': appointments['all']['count'],
+            'today_appointments': appointments['today']['count'],
+            'pending_appointments': appointments['all']['by_status']['PENDING'],
         }
 
-        # Revenue statistics
+        # Revenue statistics (collected, net of refunds)
+        revenue = snapshot['revenue']
         context['revenue'] = {
-            'today': Appointment.objects.filter(
-                date=today,
-                status='COMPLETED'
-            ).aggregate(total=Sum('service__price'))['total'] or 0,
-
-            'this_month': Appointment.objects.filter(
-                date__month=today.month,
-                date__year=today.year,
-                status='COMPLETED'
-            ).aggregate(total=Sum('service__price'))['total'] or 0,
-
-            'total': Appointment.objects.filter(
-                status='COMPLETED'
-            ).aggregate(total=Sum('service__price'))['total'] or 0,
+            'today': revenue['today']['net'],
+            'this_month': revenue['month']['net'],
+            'total': revenue['all']['net'],
         }
 
-        # Recent appointments
-        context['recent_appointments'] = Appointment.objects.select_related(
-            'patient',
-            'doctor__user',
-            'clinic',
-            'service'
-        ).order_by('-created_at')[:10]
-
-        # Top doctors by appointments
-        context['top_doctors'] = Doctor.objects.annotate(
-            appointment_count=Count('appointments')
-        ).select_related('user', 'specialization', 'clinic').order_by('-appointment_count')[:5]
-
-        # Top specializations
-        context['top_specializations'] = Specialization.objects.annotate(
-            appointment_count=Count('doctors__appointments')
-        ).order_by('-appointment_count')[:5]
-
-        # Top clinics
-        context['top_clinics'] = Clinic.objects.annotate(
-            appointment_count=Count('appointments')
-        ).order_by('-appointment_count')[:5]
+        context['recent_appointments'] = snapshot['recent_appointments']
+        context['top_doctors'] = snapshot['top_doctors']
+        context['top_specializations'] = snapshot['top_specializations']
+        context['top_clinics'] = snapshot['top_clinics']
 
         return context
 
@@ -320,16 +204,16 @@ class AdminStatisticsView(LoginRequiredMixin, UserPassesTestMixin, TemplateView)
         context = super().get_context_data(**kwargs)
 
         # Appointment statistics by status
-        context['appointments_by_status'] = Appointment.objects.values(
-            'status'
-        ).annotate(
-            count=Count('id')
-        ).order_by('-count')
+        context['appointments_by_status'] = sorted(
+            [{'status': status, 'count': count}
+             for status, count in rollups.counts_by('status').items()],
+            key=lambda item: -item['count']
+        )
 
         # Appointments by specialization
-        context['appointments_by_specialization'] = Specialization.objects.annotate(
-            appointment_count=Count('doctors__appointments')
-        ).order_by('-appointment_count')
+        context['appointments_by_specialization'] = rollups.ranked(
+            Specialization.objects.all(), 'doctor__specialization'
+        )
 
         # User growth (last 12 months)
         twelve_months_ago = timezone.now() - timedelta(days=365)
@@ -341,12 +225,9 @@ class AdminStatisticsView(LoginRequiredMixin, UserPassesTestMixin, TemplateView)
             count=Count('id')
         ).order_by('month')
 
-        # Appointment distribution by hour
-        context['appointments_by_hour'] = Appointment.objects.extra(
-            select={'hour': 'EXTRACT(hour FROM start_time)'}
-        ).values('hour').annotate(
-            count=Count('id')
-        ).order_by('hour')
+        # Appointment distribution by hour and weekday
+        context['appointments_by_hour'] = slots.hour_counts(Appointment.objects.all()).order_by('hour')
+        context['weekday_heatmap'] = slots.heatmap(Appointment.objects.all())
 
         return context
 
@@ -360,59 +241,27 @@ class AdminReportsView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        today = timezone.now().date()
-
-        # Daily report
-        context['daily_report'] = {
-            'date': today,
-            'appointments': Appointment.objects.filter(date=today).count(),
-            'completed': Appointment.objects.filter(date=today, status='COMPLETED').count(),
-            'canceled': Appointment.objects.filter(date=today, status='CANCELED').count(),
-            'revenue': Appointment.objects.filter(
-                date=today, status='COMPLETED'
-            ).aggregate(total=Sum('service__price'))['total'] or 0,
-        }
-
-        # Weekly report
-        week_start = today - timedelta(days=today.weekday())
-        week_end = week_start + timedelta(days=6)
-
-        context['weekly_report'] = {
-            'week_start': week_start,
-            'week_end': week_end,
-            'appointments': Appointment.objects.filter(
-                date__range=[week_start, week_end]
-            ).count(),
-            'completed': Appointment.objects.filter(
-                date__range=[week_start, week_end],
-                status='COMPLETED'
-            ).count(),
-            'revenue': Appointment.objects.filter(
-                date__range=[week_start, week_end],
-                status='COMPLETED'
-            ).aggregate(total=Sum('service__price'))['total'] or 0,
-        }
+        snapshot = overview.get_snapshot()
+        windows = snapshot['windows']
+
+        def report(name, **extra):
+            summary = snapshot['appointments'][name]
+            return {
+                **extra,
+                'appointments': summary['count'],
+                'completed': summary['by_status']['COMPLETED'],
+                'canceled': summary['by_status']['CANCELED'],
+                'revenue': snapshot['revenue'][name]['net'],
+            }
+
+        context['daily_report'] = report('today', date=snapshot['today'])
+        context['weekly_report'] = report(
+            'week', week_start=windows['week'][0], week_end=windows['week'][1]
+        )
+        context['monthly_report'] = report('month', month=windows['month'][0])
 
-        # Monthly report
-        month_start = today.replace(day=1)
-
-        context['monthly_report'] = {
-            'month': month_start,
-            'appointments': Appointment.objects.filter(
-                date__month=today.month,
-                date__year=today.year
-            ).count(),
-            'completed': Appointment.objects.filter(
-                date__month=today.month,
-                date__year=today.year,
-                status='COMPLETED'
-            ).count(),
-            'revenue': Appointment.objects.filter(
-                date__month=today.month,
-                date__year=today.year,
-                status='COMPLETED'
-            ).aggregate(total=Sum('service__price'))['total'] or 0,
-        }
+        context['export_form'] = ReportExportForm()
+        context['recent_exports'] = ReportExport.objects.filter(requested_by=self.request.user)[:5]
 
         return context
 
@@ -425,58 +274,94 @@ class AdminAnalyticsView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
         return self.request.user.is_admin_user
 
 
+# ============================================
+# Report Exports
+# ============================================
+
+class ReportExportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    Stream an appointment/payment report as CSV or XLSX, or queue it for
+    ``manage.py run_exports``; doctors only export their own records
+    """
+
+    def test_func(self):
+        return self.request.user.is_admin_user or self.request.user.is_doctor
+
+    def get_back_url(self):
+        return 'dashboard:admin_reports' if self.request.user.is_admin_user else 'dashboard:doctor_analytics'
+
+    def get(self, request, *args, **kwargs):
+        doctor = None
+        if not request.user.is_admin_user:
+            doctor = get_object_or_404(Doctor, user=request.user)
+
+        form = ReportExportForm(request.GET, doctor=doctor)
+        if not form.is_valid():
+            for errors in form.errors.values():
+                for error in errors:
+                    messages.error(request, error)
+            return redirect(self.get_back_url())
+
+        kind = form.cleaned_data['kind']
+        fmt = form.cleaned_data['format']
+        filters = form.get_filters()
+
+        if form.cleaned_data['mode'] == ReportExportForm.MODE_BACKGROUND:
+            export = ReportExport.objects.create(
+                requested_by=request.user, kind=kind, format=fmt, filters=filters
+            )
+            export.download_url = request.build_absolute_uri(export.get_absolute_url())
+            export.save(update_fields=['download_url'])
+            messages.success(request, _('Your export is being prepared. We will email you when it is ready.'))
+            return redirect(self.get_back_url())
+
+        response = StreamingHttpResponse(
+            exports.stream(kind, fmt, filters), content_type=exports.CONTENT_TYPES[fmt]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{exports.filename(kind, fmt, filters)}"'
+        return response
+
+
+class ExportDownloadView(LoginRequiredMixin, View):
+    """Download a finished background export (its requester or an admin)"""
+
+    def get(self, request, pk):
+        queryset = ReportExport.objects.filter(status=ReportExport.Status.DONE)
+        if not request.user.is_admin_user:
+            queryset = queryset.filter(requested_by=request.user)
+        export = get_object_or_404(queryset, pk=pk)
+        return FileResponse(export.file.open('rb'), as_attachment=True,
+                            filename=export.file.name.rsplit('/', 1)[-1])
+
+
 # ============================================
 # HTMX Chart Data Endpoints
 # ============================================
 
+def _chart_etag(name):
+    """ETag of a chart for admins (None otherwise, so no 304 skips the check)"""
+    def etag(request, *args, **kwargs):
+        if not request.user.is_authenticated or not request.user.is_admin_user:
+            return None
+        return charts.version(name, request.GET)
+    return etag
+
+
+@condition(etag_func=_chart_etag('appointments'))
 def appointments_chart_data(request):
     """Get appointments chart data (HTMX)"""
     if not request.user.is_admin_user:
         return JsonResponse({'error': 'Unauthorized'}, status=403)
 
-    # Last 30 days
-    today = timezone.now().date()
-    thirty_days_ago = today - timedelta(days=30)
-
-    data = Appointment.objects.filter(
-        date__gte=thirty_days_ago
-    ).annotate(
-        day=TruncDate('date')
-    ).values('day').annotate(
-        count=Count('id')
-    ).order_by('day')
-
-    labels = [d['day'].strftime('%Y-%m-%d') for d in data]
-    values = [d['count'] for d in data]
-
-    return JsonResponse({
-        'labels': labels,
-        'values': values
-    })
+    # Last 30 days by default (?days=7|30|90)
+    return JsonResponse(charts.get_data('appointments', request.GET))
 
 
+@condition(etag_func=_chart_etag('revenue'))
 def revenue_chart_data(request):
     """Get revenue chart data (HTMX)"""
     if not request.user.is_admin_user:
         return JsonResponse({'error': 'Unauthorized'}, status=403)
 
-    # Last 12 months
-    today = timezone.now().date()
-    twelve_months_ago = today - timedelta(days=365)
-
-    data = Appointment.objects.filter(
-        date__gte=twelve_months_ago,
-        status='COMPLETED'
-    ).annotate(
-        month=TruncMonth('date')
-    ).values('month').annotate(
-        total=Sum('service__price')
-    ).order_by('month')
-
-    labels = [d['month'].strftime('%b %Y') for d in data]
-    values = [float(d['total']) if d['total'] else 0 for d in data]
-
-    return JsonResponse({
-        'labels': labels,
-        'values': values
-    })
\ No newline at end of file
+    # Last 12 months by default (?months=6|12|24)
+    return JsonResponse(charts.get_data('revenue', request.GET))
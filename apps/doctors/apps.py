@@ -7,4 +7,7 @@ class AppointmentsConfig(AppConfig):
     name = 'apps.doctors'
     verbose_name = 'Doctors'
 
+    def ready(self):
+        import apps.doctors.signals
+
 
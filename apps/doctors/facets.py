@@ -0,0 +1,239 @@
+"""
+Faceted counts for the doctor listing
+
+Counts for every facet (specialization, clinic, city, fee bucket, rating)
+come from one grouped query, the *facet matrix*: doctors matching the
+non-facet filters (search, availability window) grouped by
+(specialization, clinic, city, fee bucket, rating bucket, in price range,
+meets min rating). Each facet is then summed in Python from the matrix with
+every *other* facet filter applied, so a value's count is what the user gets
+by picking it. The matrix is small (one row per distinct combination) and
+cached for ``FACET_CACHE_TIMEOUT`` seconds per filter set and per generation
+of the doctor/clinic/specialization query-cache scopes.
+"""
+import hashlib
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, Count, IntegerField, Q, Value, When
+from django.utils.http import urlencode
+
+from apps.core import query_cache
+
+# (lower, upper) consultation fee bounds, upper exclusive
+FEE_BUCKETS = [(0, 100), (100, 200), (200, 300), (300, 500), (500, None)]
+RATING_THRESHOLDS = [Decimal('4.5'), Decimal('4'), Decimal('3')]
+# Query-cache scopes whose changes make a cached matrix stale
+MATRIX_SCOPES = ('doctor', 'clinic', 'specialization')
+
+
+def get_timeout():
+    return getattr(settings, 'FACET_CACHE_TIMEOUT', 60)
+
+
+def _decimal(value):
+    try:
+        return Decimal(value) if value not in (None, '') else None
+    except InvalidOperation:
+        return None
+
+
+def selected_filters(params):
+    """Facet selections from GET parameters (invalid numbers are ignored)"""
+    return {
+        'specialization': params.get('specialization', ''),
+        'clinic': params.get('clinic', ''),
+        'city': params.get('city', ''),
+        'min_price': _decimal(params.get('min_price')),
+        'max_price': _decimal(params.get('max_price')),
+        'min_rating': _decimal(params.get('min_rating')),
+    }
+
+
+def apply_filters(queryset, selected):
+    """Narrow a doctor queryset by the facet selections"""
+    if selected['specialization']:
+        queryset = queryset.filter(specialization__slug=selected['specialization'])
+    if selected['clinic']:
+        queryset = queryset.filter(clinic__slug=selected['clinic'])
+    if selected['city']:
+        queryset = queryset.filter(clinic__city=selected['city'])
+    return queryset.filter(_price_q(selected) & _rating_q(selected))
+
+
+def _price_q(selected):
+    q = Q()
+    if selected['min_price'] is not None:
+        q &= Q(consultation_fee__gte=selected['min_price'])
+    if selected['max_price'] is not None:
+        q &= Q(consultation_fee__lte=selected['max_price'])
+    return q
+
+
+def _rating_q(selected):
+    if selected['min_rating'] is None:
+        return Q()
+    return Q(rating__gte=selected['min_rating'])
+
+
+def _bucket(field, bounds):
+    whens = [
+        When(**{f'{field}__gte': lower, **({f'{field}__lt': upper} if upper is not None else {})},
+             then=Value(index))
+        for index, (lower, upper) in enumerate(bounds)
+    ]
+    return Case(*whens, default=Value(-1), output_field=IntegerField())
+
+
+def _flag(q):
+    if not q:
+        return Value(True, output_field=BooleanField())
+    return Case(When(q, then=Value(True)), default=Value(False), output_field=BooleanField())
+
+
+def facet_matrix(base_queryset, selected):
+    """
+    Grouped (specialization, clinic, city, fee_bucket, rating_bucket,
+    in_price, rating_ok, count) rows for the base queryset, cached
+    """
+    sql, params = base_queryset.order_by().values('pk').query.sql_with_params()
+    signature = repr((
+        sql, params, selected['min_price'], selected['max_price'], selected['min_rating'],
+        query_cache.generations(MATRIX_SCOPES),
+    ))
+    key = 'facets:doctors:' + hashlib.md5(signature.encode()).hexdigest()
+
+    matrix = cache.get(key)
+    if matrix is None:
+        rows = base_queryset.order_by().annotate(
+            fee_bucket=_bucket('consultation_fee', FEE_BUCKETS),
+            # Index of the highest threshold met (thresholds are descending)
+            rating_bucket=Case(
+                *[When(rating__gte=threshold, then=Value(index))
+                  for index, threshold in enumerate(RATING_THRESHOLDS)],
+                default=Value(-1), output_field=IntegerField()
+            ),
+            in_price=_flag(_price_q(selected)),
+            rating_ok=_flag(_rating_q(selected)),
+        ).values_list(
+            'specialization__slug', 'clinic__slug', 'clinic__city',
+            'fee_bucket', 'rating_bucket', 'in_price', 'rating_ok'
+        ).annotate(count=Count('pk'))
+        matrix = [tuple(row) for row in rows]
+        cache.set(key, matrix, get_timeout())
+    return matrix
+
+
+def _base_params(params):
+    query = params.copy()
+    query.pop('page', None)
+    return query
+
+
+def _link(params, **changes):
+    """Querystring with some parameters replaced (None removes them)"""
+    query = _base_params(params)
+    for name, value in changes.items():
+        query.pop(name, None)
+        if value is not None:
+            query[name] = value
+    return urlencode(sorted((k, v) for k, v in query.items() if v != ''))
+
+
+def get_facets(base_queryset, params):
+    """
+    Facet groups for the listing template
+
+    Returns {'specialization': [...], 'clinic': [...], 'city': [...],
+    'fee': [...], 'rating': [...]} where each value is a dict with
+    ``value``, ``label``, ``count``, ``selected`` and ``query`` (the
+    querystring that toggles it).
+    """
+    from apps.clinics.models import Clinic
+    from .models import Specialization
+
+    selected = selected_filters(params)
+    matrix = facet_matrix(base_queryset, selected)
+
+    def matches(row, skip):
+        spec, clinic, city, _, _, in_price, rating_ok = row[:7]
+        return (
+            (skip == 'specialization' or not selected['specialization'] or spec == selected['specialization'])
+            and (skip == 'clinic' or not selected['clinic'] or clinic == selected['clinic'])
+            and (skip == 'city' or not selected['city'] or city == selected['city'])
+            and (skip == 'fee' or in_price)
+            and (skip == 'rating' or rating_ok)
+        )
+
+    def totals(skip, column):
+        counts = {}
+        for row in matrix:
+            if matches(row, skip):
+                counts[row[column]] = counts.get(row[column], 0) + row[7]
+        return counts
+
+    specialization_counts = totals('specialization', 0)
+    clinic_counts = totals('clinic', 1)
+    city_counts = totals('city', 2)
+    fee_counts = totals('fee', 3)
+    rating_counts = totals('rating', 4)
+
+    specialization_names = dict(
+        Specialization.objects.filter(slug__in=specialization_counts).values_list('slug', 'name')
+    )
+    clinic_names = dict(
+        Clinic.objects.filter(slug__in=clinic_counts).values_list('slug', 'name')
+    )
+
+    def group(name, counts, labels):
+        current = params.get(name, '')
+        return sorted([
+            {
+                'value': value,
+                'label': labels.get(value, value),
+                'count': count,
+                'selected': value == current,
+                'query': _link(params, **{name: None if value == current else value}),
+            }
+            for value, count in counts.items() if value
+        ], key=lambda item: (-item['count'], str(item['label'])))
+
+    fee = []
+    for index, (lower, upper) in enumerate(FEE_BUCKETS):
+        count = fee_counts.get(index, 0)
+        is_selected = (
+            selected['min_price'] == lower
+            and selected['max_price'] == (Decimal(upper) - Decimal('0.01') if upper else None)
+        )
+        fee.append({
+            'value': index,
+            'label': f'{lower}+' if upper is None else f'{lower}–{upper}',
+            'count': count,
+            'selected': is_selected,
+            'query': _link(params, min_price=None, max_price=None) if is_selected else _link(
+                params, min_price=str(lower),
+                max_price=str(Decimal(upper) - Decimal('0.01')) if upper else None
+            ),
+        })
+
+    rating = []
+    for index, threshold in enumerate(RATING_THRESHOLDS):
+        # Buckets hold the highest threshold met, so ">= threshold" is cumulative
+        count = sum(c for bucket, c in rating_counts.items() if 0 <= bucket <= index)
+        is_selected = selected['min_rating'] == threshold
+        rating.append({
+            'value': str(threshold),
+            'label': f'{threshold}+',
+            'count': count,
+            'selected': is_selected,
+            'query': _link(params, min_rating=None if is_selected else str(threshold)),
+        })
+
+    return {
+        'specialization': group('specialization', specialization_counts, specialization_names),
+        'clinic': group('clinic', clinic_counts, clinic_names),
+        'city': group('city', city_counts, {}),
+        'fee': fee,
+        'rating': rating,
+    }
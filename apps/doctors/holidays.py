@@ -0,0 +1,85 @@
+"""
+Recurring days off index
+
+A DayOff with ``is_recurring`` set repeats every year on the same month/day.
+Instead of querying DayOff for every date checked, each doctor's recurring
+days off are folded into a frozenset of ``(month, day)`` pairs that is built
+once, cached without expiry and dropped by the DayOff signal handlers
+(apps.doctors.signals). Membership tests are then O(1) for any date.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+
+KEY_PREFIX = 'holidays'
+
+
+def _index_key(doctor_id):
+    return f'{KEY_PREFIX}:recurring:{doctor_id}'
+
+
+def month_day(date):
+    return (date.month, date.day)
+
+
+def get_recurring_index(doctor_ids):
+    """
+    {doctor_id: frozenset((month, day))} for the given doctors
+
+    One cache round trip, plus one query for the doctors not cached yet.
+    Doctors without recurring days off get an empty set (cached as well).
+    """
+    from .models import DayOff
+
+    doctor_ids = {getattr(d, 'pk', d) for d in doctor_ids}
+    keys = {_index_key(doctor_id): doctor_id for doctor_id in doctor_ids}
+    found = cache.get_many(keys)
+    index = {keys[key]: value for key, value in found.items()}
+
+    missing = doctor_ids - index.keys()
+    if missing:
+        built = {doctor_id: set() for doctor_id in missing}
+        rows = DayOff.objects.filter(
+            doctor_id__in=missing, is_recurring=True
+        ).values_list('doctor_id', 'date')
+        for doctor_id, date in rows:
+            built[doctor_id].add(month_day(date))
+
+        built = {doctor_id: frozenset(days) for doctor_id, days in built.items()}
+        cache.set_many({_index_key(doctor_id): days for doctor_id, days in built.items()}, None)
+        index.update(built)
+    return index
+
+
+def is_recurring_day_off(index, doctor_id, date):
+    """O(1) lookup in an index returned by get_recurring_index"""
+    return month_day(date) in index.get(doctor_id, ())
+
+
+def days_off_between(doctor, first, last):
+    """Every day off (one-off and recurring) of a doctor between two dates"""
+    from .models import DayOff
+
+    doctor_id = getattr(doctor, 'pk', doctor)
+    days = set(
+        DayOff.objects.filter(
+            doctor_id=doctor_id, date__range=[first, last]
+        ).values_list('date', flat=True)
+    )
+    recurring = get_recurring_index([doctor_id])[doctor_id]
+    if recurring:
+        date = first
+        while date <= last:
+            if month_day(date) in recurring:
+                days.add(date)
+            date += timedelta(days=1)
+    return days
+
+
+def is_day_off(doctor, date):
+    """Whether a doctor is off on a date (one-off row or recurring index)"""
+    return date in days_off_between(doctor, date, date)
+
+
+def invalidate(doctor_id):
+    cache.delete(_index_key(doctor_id))
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-16 23:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinics', '0003_listing_sort_indexes'),
+        ('doctors', '0003_doctor_bio_ar_doctor_bio_en_doctor_education_ar_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(fields=['is_available', 'is_verified', '-rating', 'id'], name='doctor_listing_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(fields=['is_available', 'is_verified', 'consultation_fee', 'id'], name='doctor_listing_fee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(fields=['is_available', 'is_verified', '-experience_years', 'id'], name='doctor_listing_exp_idx'),
+        ),
+    ]
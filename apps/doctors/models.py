@@ -103,6 +103,13 @@ class Doctor(models.Model):
             models.Index(fields=['clinic', 'specialization']),
             models.Index(fields=['-rating']),
             models.Index(fields=['is_available']),
+            # Listing sort modes (DoctorListView.sort_modes), pk as tie-breaker
+            models.Index(fields=['is_available', 'is_verified', '-rating', 'id'],
+                         name='doctor_listing_rating_idx'),
+            models.Index(fields=['is_available', 'is_verified', 'consultation_fee', 'id'],
+                         name='doctor_listing_fee_idx'),
+            models.Index(fields=['is_available', 'is_verified', '-experience_years', 'id'],
+                         name='doctor_listing_exp_idx'),
         ]
 
     def __str__(self):
@@ -169,3 +176,19 @@ class DayOff(models.Model):
 
     def __str__(self):
         return f"{self.doctor} - {self.date}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember persisted values so signal handlers can tell what changed"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+
+        # post_save handlers have seen the previous values; track the new ones
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+        }
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.appointments import availability_cache
+from . import holidays
+from .models import WorkingHour, DayOff
+
+
+@receiver(post_save, sender=WorkingHour)
+@receiver(post_delete, sender=WorkingHour)
+def invalidate_working_hour_availability(sender, instance, **kwargs):
+    """Working hours affect every date of the doctor"""
+    availability_cache.invalidate_doctor(instance.doctor_id)
+
+
+@receiver(post_save, sender=DayOff)
+@receiver(post_delete, sender=DayOff)
+def invalidate_day_off_availability(sender, instance, **kwargs):
+    """
+    Drop cached availability for the day off (every year if recurring)
+
+    A moved row also frees its previous doctor-day; a row that is or was
+    recurring touches every year, so the doctor's whole cache goes.
+    """
+    previous = getattr(instance, '_loaded_values', {})
+    old_doctor_id = previous.get('doctor_id', instance.doctor_id)
+    old_date = previous.get('date', instance.date)
+
+    # Rebuilt lazily
+    holidays.invalidate(instance.doctor_id)
+    if old_doctor_id != instance.doctor_id:
+        holidays.invalidate(old_doctor_id)
+
+    if instance.is_recurring or previous.get('is_recurring'):
+        availability_cache.invalidate_doctor(instance.doctor_id)
+        if old_doctor_id != instance.doctor_id:
+            availability_cache.invalidate_doctor(old_doctor_id)
+        return
+    availability_cache.invalidate(instance.doctor_id, instance.date)
+    if (old_doctor_id, old_date) != (instance.doctor_id, instance.date):
+        availability_cache.invalidate(old_doctor_id, old_date)
@@ -21,6 +21,7 @@ urlpatterns = [
 
     # Doctor Dashboard
     path('dashboard/', views.DoctorDashboardView.as_view(), name='dashboard'),
+    path('dashboard/fragments/<slug:name>/', views.DoctorDashboardFragmentView.as_view(), name='dashboard_fragment'),
     path('dashboard/appointments/', views.DoctorAppointmentsView.as_view(), name='dashboard_appointments'),
     path('dashboard/schedule/', views.DoctorScheduleView.as_view(), name='dashboard_schedule'),
     path('dashboard/working-hours/', views.WorkingHoursManageView.as_view(), name='working_hours'),
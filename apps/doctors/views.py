@@ -11,71 +11,124 @@ from datetime import datetime, timedelta
 
 from .models import Doctor, Specialization, WorkingHour, DayOff
 from .forms import WorkingHourForm, DayOffForm, DoctorSearchForm
+from . import facets
 from apps.appointments.models import Appointment
+from apps.appointments.availability import (
+    annotate_next_available, doctors_free_in_window, next_available_map
+)
+from apps.core import search as search_index
+from apps.dashboard.fragments import BaseFragmentView
 from utils.helpers import get_available_time_slots
-from utils.mixins import DoctorRequiredMixin
+from utils.mixins import (
+    CachedResultsMixin, CursorPaginationMixin, DoctorRequiredMixin, EarliestSlotsMixin, KeysetPaginationMixin
+)
+from utils.pagination import SortMode
 
 
-class DoctorListView(ListView):
+# Doctors whose next free slot is computed for the "Soonest Available" sort
+SOONEST_CANDIDATES = 200
+
+
+def _soonest_sort_values(doctor_ids):
+    """Sortable next-free-slot keys; doctors without one sort last"""
+    return {
+        doctor_id: slot.isoformat() if slot else '~'
+        for doctor_id, slot in next_available_map(doctor_ids).items()
+    }
+
+
+class DoctorListView(KeysetPaginationMixin, CachedResultsMixin, ListView):
     """List all doctors"""
     model = Doctor
     template_name = 'doctors/list.html'
     context_object_name = 'doctors'
-    paginate_by = 12
-
-    def get_queryset(self):
+    page_size = 12
+    cache_scopes = ('doctor', 'clinic', 'specialization')
+    # rating, fee and experience are backed by the doctor_listing_* composite
+    # indexes (see Doctor.Meta); name sorts through the user join. soonest is
+    # computed in Python, so only the SOONEST_CANDIDATES best-rated matches
+    # are ranked by their next free slot
+    sort_modes = {
+        'rating': SortMode(_('Highest Rated'), '-rating'),
+        'fee': SortMode(_('Lowest Fee'), 'consultation_fee'),
+        'experience': SortMode(_('Most Experienced'), '-experience_years'),
+        'name': SortMode(_('Name A-Z'), 'user__first_name', 'user__last_name'),
+        'soonest': SortMode(
+            _('Soonest Available'), '-rating',
+            sort_values=_soonest_sort_values, candidates=SOONEST_CANDIDATES
+        ),
+    }
+    sort_aliases = {'-rating': 'rating', 'consultation_fee': 'fee', '-experience_years': 'experience'}
+    default_sort = 'rating'
+
+    def get_cache_scopes(self):
+        # Availability results also change with bookings and schedules
+        if self.request.GET.get('available_on') or self.get_sort_name() == 'soonest':
+            return self.cache_scopes + ('availability',)
+        return self.cache_scopes
+
+    def get_base_queryset(self):
+        """Doctors matching the non-facet filters (search, availability window)"""
         queryset = Doctor.objects.filter(
             is_available=True,
             is_verified=True
-        ).select_related(
-            'user__profile',
-            'clinic',
-            'specialization'
-        ).prefetch_related('working_hours')
+        )
 
         # Search
         search = self.request.GET.get('search', '')
         if search:
             queryset = queryset.filter(
-                Q(user__first_name__icontains=search) |
-                Q(user__last_name__icontains=search) |
-                Q(bio__icontains=search) |
-                Q(specialization__name__icontains=search)
+                pk__in=search_index.search_ids(search, search_index.Kind.DOCTOR, limit=None)
             )
 
-        # Filter by specialization
-        specialization = self.request.GET.get('specialization', '')
-        if specialization:
-            queryset = queryset.filter(specialization__slug=specialization)
-
-        # Filter by clinic
-        clinic = self.request.GET.get('clinic', '')
-        if clinic:
-            queryset = queryset.filter(clinic__slug=clinic)
-
-        # Price range
-        min_price = self.request.GET.get('min_price', '')
-        max_price = self.request.GET.get('max_price', '')
-        if min_price:
-            queryset = queryset.filter(consultation_fee__gte=min_price)
-        if max_price:
-            queryset = queryset.filter(consultation_fee__lte=max_price)
-
-        # Min rating
-        min_rating = self.request.GET.get('min_rating', '')
-        if min_rating:
-            queryset = queryset.filter(rating__gte=min_rating)
-
-        # Ordering
-        order = self.request.GET.get('order', '-rating')
-        queryset = queryset.order_by(order)
+        # Free within a time window on a date (e.g. Tuesday afternoon)
+        available_on = self.request.GET.get('available_on', '')
+        if available_on:
+            try:
+                date = datetime.strptime(available_on, '%Y-%m-%d').date()
+                window_start = datetime.strptime(
+                    self.request.GET.get('available_from') or '00:00', '%H:%M').time()
+                window_end = datetime.strptime(
+                    self.request.GET.get('available_to') or '23:59', '%H:%M').time()
+            except ValueError:
+                pass
+            else:
+                free = doctors_free_in_window(
+                    queryset.values_list('pk', flat=True), date, window_start, window_end
+                )
+                queryset = queryset.filter(pk__in=free)
 
         return queryset
 
+    def build_queryset(self):
+        self.base_queryset = self.get_base_queryset()
+
+        # Facets: specialization, clinic, city, price range, min rating
+        return facets.apply_filters(
+            self.base_queryset, facets.selected_filters(self.request.GET)
+        )
+
+    def compute_results(self):
+        results = super().compute_results()
+        # Counts per facet value for the current filters (one grouped query)
+        results['facets'] = facets.get_facets(self.base_queryset, self.request.GET)
+        return results
+
+    def get_hydration_queryset(self):
+        return Doctor.objects.select_related(
+            'user__profile',
+            'clinic',
+            'specialization'
+        ).prefetch_related('working_hours')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['search_form'] = DoctorSearchForm(self.request.GET)
         context['specializations'] = Specialization.objects.all()
+        context['facets'] = self.get_results()['facets']
+
+        # Next free slot badges for the current page (one batched computation)
+        annotate_next_available(context['doctors'])
         return context
 
     def get_template_names(self):
@@ -120,16 +173,20 @@ class DoctorDetailView(DetailView):
         return context
 
 
-class SpecializationListView(ListView):
+class SpecializationListView(CachedResultsMixin, ListView):
     """List all specializations"""
     model = Specialization
     template_name = 'doctors/specializations.html'
     context_object_name = 'specializations'
+    cache_scopes = ('specialization', 'doctor')
 
-    def get_queryset(self):
+    def build_queryset(self):
+        return Specialization.objects.order_by('name')
+
+    def get_hydration_queryset(self):
         return Specialization.objects.annotate(
             doctor_count=Count('doctors')
-        ).order_by('name')
+        )
 
     def get_template_names(self):
         if self.request.htmx:
@@ -137,7 +194,7 @@ class SpecializationListView(ListView):
         return ['doctors/specializations.html']
 
 
-class SpecializationDetailView(DetailView):
+class SpecializationDetailView(EarliestSlotsMixin, DetailView):
     """Specialization detail with doctors"""
     model = Specialization
     template_name = 'doctors/specialization_detail.html'
@@ -147,28 +204,36 @@ class SpecializationDetailView(DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['doctors'] = Doctor.objects.filter(
+        context['doctors'] = self.get_scope_doctors().select_related('user', 'clinic')
+        annotate_next_available(context['doctors'])
+        return context
+
+    def get_scope_doctors(self):
+        return Doctor.objects.filter(
             specialization=self.object,
             is_available=True,
             is_verified=True
-        ).select_related('user', 'clinic')
-        return context
+        )
 
 
-class TopRatedDoctorsView(ListView):
+class TopRatedDoctorsView(CachedResultsMixin, ListView):
     """Top rated doctors (HTMX)"""
     template_name = 'doctors/partials/top_doctors.html'
     context_object_name = 'doctors'
+    cache_scopes = ('doctor', 'clinic', 'specialization')
 
-    def get_queryset(self):
+    def build_queryset(self):
         return Doctor.objects.filter(
             is_available=True,
             is_verified=True
-        ).select_related(
+        ).order_by('-rating')[:8]
+
+    def get_hydration_queryset(self):
+        return Doctor.objects.select_related(
             'user__profile',
             'specialization',
             'clinic'
-        ).order_by('-rating')[:8]
+        )
 
 
 @login_required
@@ -185,8 +250,13 @@ def available_slots(request, pk):
     except ValueError:
         return JsonResponse({'error': 'Invalid date format'}, status=400)
 
+    # Size slots by the selected service, if any
+    service_id = request.GET.get('service', '')
+    service = doctor.clinic.services.filter(pk=service_id).first() if service_id.isdigit() else None
+    duration = service.duration_minutes if service else 30
+
     # Use helper function
-    slots = get_available_time_slots(doctor, date)
+    slots = get_available_time_slots(doctor, date, duration_minutes=duration)
 
     return render(request, 'doctors/partials/available_slots.html', {
         'slots': slots,
@@ -221,42 +291,27 @@ class DoctorDashboardView(LoginRequiredMixin, DoctorRequiredMixin, DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        doctor = self.object
-        today = datetime.now().date()
-
-        # Today's appointments
-        context['today_appointments'] = Appointment.objects.filter(
-            doctor=doctor,
-            date=today,
-            status__in=['PENDING', 'CONFIRMED']
-        ).select_related('patient__profile', 'service').order_by('start_time')
-
-        # Upcoming appointments
-        context['upcoming_appointments'] = Appointment.objects.filter(
-            doctor=doctor,
-            date__gte=today,
-            status__in=['PENDING', 'CONFIRMED']
-        ).select_related('patient__profile', 'service').order_by('date', 'start_time')[:10]
+        # Widgets are loaded by HTMX from DoctorDashboardFragmentView
+        context['today'] = datetime.now().date()
+        return context
 
-        # Statistics
-        context['stats'] = {
-            'today_count': context['today_appointments'].count(),
-            'pending_count': Appointment.objects.filter(
-                doctor=doctor,
-                status='PENDING'
-            ).count(),
-            'total_patients': doctor.total_patients,
-            'rating': doctor.rating,
-        }
 
-        return context
+class DoctorDashboardFragmentView(BaseFragmentView):
+    """One widget of the doctor's personal dashboard (HTMX)"""
+    fragment_templates = {
+        'stats': ('doctors/partials/dashboard_stats.html', 'stats'),
+        'today': ('doctors/partials/dashboard_today.html', 'today_appointments'),
+        'upcoming': ('doctors/partials/dashboard_upcoming.html', 'upcoming_appointments'),
+    }
 
 
-class DoctorAppointmentsView(LoginRequiredMixin, DoctorRequiredMixin, ListView):
+class DoctorAppointmentsView(LoginRequiredMixin, DoctorRequiredMixin, CursorPaginationMixin, ListView):
     """Doctor's appointments list"""
     template_name = 'doctors/appointments.html'
+    partial_template_name = 'doctors/partials/appointment_rows.html'
     context_object_name = 'appointments'
     paginate_by = 20
+    sort_mode = SortMode(_('Newest first'), '-date', '-start_time', '-pk')
 
     def get_queryset(self):
         doctor = get_object_or_404(Doctor, user=self.request.user)
@@ -266,7 +321,7 @@ class DoctorAppointmentsView(LoginRequiredMixin, DoctorRequiredMixin, ListView):
             'patient__profile',
             'service',
             'clinic'
-        ).order_by('-date', '-start_time')
+        )
 
 
 class DoctorScheduleView(LoginRequiredMixin, DoctorRequiredMixin, TemplateView):
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-16 22:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_service_description_ar_service_description_en_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='service',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False, verbose_name='search text'),
+        ),
+    ]
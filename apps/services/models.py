@@ -3,9 +3,13 @@ from django.db import models
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 
+from utils.arabic import build_search_text
+
 class Service(models.Model):
     """Medical Service offered by clinic"""
 
+    SEARCH_FIELDS = ('name', 'description')
+
     clinic = models.ForeignKey(
         'clinics.Clinic',
         on_delete=models.CASCADE,
@@ -31,6 +35,10 @@ class Service(models.Model):
     )
 
     is_active = models.BooleanField(_('active'), default=True)
+
+    # Normalized ar/en text for search (utils.arabic), set in save()
+    search_text = models.TextField(_('search text'), blank=True, editable=False)
+
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
 
@@ -65,6 +73,7 @@ class Service(models.Model):
 
                 self.slug = slug
 
+        self.search_text = build_search_text(self, self.SEARCH_FIELDS)
         super().save(*args, **kwargs)
 
 
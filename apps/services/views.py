@@ -1,4 +1,6 @@
 from django.views.generic import ListView, DetailView
+
+from utils.arabic import normalize_arabic
 from .models import Service
 
 
@@ -10,7 +12,12 @@ class ServiceListView(ListView):
     paginate_by = 20
 
     def get_queryset(self):
-        return Service.objects.filter(is_active=True).select_related('clinic')
+        queryset = Service.objects.filter(is_active=True).select_related('clinic')
+
+        # Search (normalized like Service.search_text)
+        for term in normalize_arabic(self.request.GET.get('search', '')).split()[:8]:
+            queryset = queryset.filter(search_text__contains=term)
+        return queryset
 
 
 class ServiceDetailView(DetailView):
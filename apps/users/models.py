@@ -61,6 +61,10 @@ class User(AbstractUser):
         verbose_name = _('user')
         verbose_name_plural = _('users')
         ordering = ['-date_joined']
+        indexes = [
+            # Doctor listing "name" sort mode
+            models.Index(fields=['first_name', 'last_name', 'id'], name='user_name_sort_idx'),
+        ]
 
     def __str__(self):
         return self.get_full_name() or self.email
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.sites',
+    'django.contrib.humanize',
 
     # Third-party apps
     'allauth',
@@ -113,6 +114,9 @@ DATABASES = {
 # Supabase requires SSL
 if 'postgres' in DATABASES.get('default', {}).get('ENGINE', ''):
     DATABASES['default'].setdefault('OPTIONS', {})['sslmode'] = 'require'
+# SQLite has no row locks; IMMEDIATE transactions serialize writers instead
+if 'sqlite' in DATABASES.get('default', {}).get('ENGINE', ''):
+    DATABASES['default'].setdefault('OPTIONS', {})['transaction_mode'] = 'IMMEDIATE'
 # Cache (Redis)
 """
 CACHES = {
@@ -143,6 +147,21 @@ CACHES = {
         'LOCATION': 'unique-snowflake',
     }
 }
+# Availability cache (seconds); entries are also invalidated on change
+AVAILABILITY_CACHE_TIMEOUT = config('AVAILABILITY_CACHE_TIMEOUT', default=60 * 60, cast=int)
+# How long a picked slot stays reserved for the patient (minutes)
+SLOT_HOLD_MINUTES = config('SLOT_HOLD_MINUTES', default=5, cast=int)
+# Doctor listing facet matrix cache (seconds)
+FACET_CACHE_TIMEOUT = config('FACET_CACHE_TIMEOUT', default=60, cast=int)
+# Search/listing query-result cache (seconds); generation counters invalidate on change
+QUERY_CACHE_TIMEOUT = config('QUERY_CACHE_TIMEOUT', default=5 * 60, cast=int)
+# Admin home page snapshot (seconds); short-lived, not invalidated on change
+ADMIN_OVERVIEW_CACHE_TIMEOUT = config('ADMIN_OVERVIEW_CACHE_TIMEOUT', default=30, cast=int)
+# Dashboard chart payloads (seconds); versioned, so writes invalidate them at once
+CHART_CACHE_TIMEOUT = config('CHART_CACHE_TIMEOUT', default=10 * 60, cast=int)
+# Rows fetched per database round trip by report exports
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
 # Session
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
@@ -196,6 +215,15 @@ STORAGES = {
     'staticfiles': {
         'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
     },
+    # Report exports hold patient and payment data: kept outside MEDIA_ROOT
+    # (no public URL) and served only by dashboard:export_download
+    'exports': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {
+            'location': config('EXPORTS_ROOT', default=str(BASE_DIR / 'private' / 'exports')),
+            'base_url': None,
+        },
+    },
 }
 
 # Media files
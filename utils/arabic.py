@@ -0,0 +1,47 @@
+"""
+Arabic text normalization for search
+
+The same normalizer is applied when search columns are written (model
+``save()`` and ``manage.py backfill_search_text``) and to the query string,
+so plain ``contains`` / full-text lookups match across spelling variants
+without regex or Python post-filtering.
+"""
+import re
+
+# Tashkeel (fathatan .. sukun and extended marks), superscript alef, Quranic marks
+DIACRITICS_RE = re.compile('[\u064B-\u065F\u0670\u06D6-\u06ED]')
+TATWEEL = '\u0640'
+
+CHAR_MAP = str.maketrans({
+    '\u0623': '\u0627',  # أ -> ا
+    '\u0625': '\u0627',  # إ -> ا
+    '\u0622': '\u0627',  # آ -> ا
+    '\u0671': '\u0627',  # ٱ -> ا
+    '\u0649': '\u064A',  # ى -> ي
+    '\u0629': '\u0647',  # ة -> ه
+    '\u0624': '\u0648',  # ؤ -> و
+    '\u0626': '\u064A',  # ئ -> ي
+    TATWEEL: None,
+})
+
+
+def normalize_arabic(text):
+    """
+    Search form of a string: no diacritics or tatweel, unified alef/hamza,
+    taa marbuta and alef maqsura, casefolded and whitespace-collapsed
+    """
+    if not text:
+        return ''
+    text = DIACRITICS_RE.sub('', str(text)).translate(CHAR_MAP)
+    return ' '.join(text.casefold().split())
+
+
+def build_search_text(instance, fields):
+    """Normalized text of the ar/en translations of ``fields``, deduplicated"""
+    parts = []
+    for field in fields:
+        for name in (f'{field}_ar', f'{field}_en', field):
+            value = normalize_arabic(getattr(instance, name, ''))
+            if value and value not in parts:
+                parts.append(value)
+    return ' '.join(parts)
@@ -4,40 +4,21 @@ from django.utils import timezone
 
 
 def get_available_time_slots(doctor, date, duration_minutes=30):
-    from apps.doctors.models import WorkingHour, DayOff
-    from apps.appointments.models import Appointment
-    from datetime import datetime, timedelta
+    """
+    Available time slots for a doctor on a date (see AvailabilityEngine)
 
-    # 1. إذا كان يوم إجازة، لا توجد فترات
-    if DayOff.objects.filter(doctor=doctor, date=date).exists():
-        return []
-
-    # 2. جلب ساعات العمل ووجود مواعيد مسبقة
-    day_of_week = date.weekday()
-    working_hours = WorkingHour.objects.filter(doctor=doctor, day_of_week=day_of_week, is_active=True)
-    existing_appointments = Appointment.objects.filter(
-        doctor=doctor, date=date, status__in=['PENDING', 'CONFIRMED']
-    ).values_list('start_time', flat=True)
+    Only slots where an appointment of ``duration_minutes`` fits without
+    overlapping an existing booking are returned. Served from the
+    availability cache.
+    """
+    from apps.appointments.availability_cache import get_cached_slots
 
     slots = []
-    now = datetime.now()
-
-    for wh in working_hours:
-        current_time = datetime.combine(date, wh.start_time)
-        end_time = datetime.combine(date, wh.end_time)
-
-        while current_time < end_time:
-            slot_time = current_time.time()
-
-            # تحسين: منع عرض أوقات قديمة في نفس اليوم
-            is_past = (date == now.date() and slot_time < now.time())
-
-            if slot_time not in existing_appointments and not is_past:
-                slots.append({
-                    'time': slot_time.strftime('%H:%M'),
-                    'formatted': current_time.strftime('%I:%M %p')
-                })
-            current_time += timedelta(minutes=duration_minutes)
+    for slot_time in get_cached_slots(doctor, date, duration_minutes):
+        slots.append({
+            'time': slot_time.strftime('%H:%M'),
+            'formatted': slot_time.strftime('%I:%M %p')
+        })
     return slots
 
 
@@ -1,8 +1,11 @@
 from django.contrib.auth.mixins import UserPassesTestMixin
-from django.shortcuts import redirect
+from django.http import JsonResponse
+from django.shortcuts import redirect, render
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
 
+from utils.pagination import next_query
+
 
 class PatientRequiredMixin(UserPassesTestMixin):
     """Mixin to ensure user is a patient"""
@@ -34,4 +37,204 @@ class AdminRequiredMixin(UserPassesTestMixin):
 
     def handle_no_permission(self):
         messages.error(self.request, _('You must be an admin to access this page'))
-        return redirect('dashboard:index')
\ No newline at end of file
+        return redirect('dashboard:index')
+
+
+class EarliestSlotsMixin:
+    """
+    Adds an "earliest available" mode to a detail view
+
+    ``?earliest=N`` returns the soonest N bookable slots across the doctors
+    from ``get_scope_doctors()``: an HTML partial for HTMX requests, JSON
+    otherwise.
+    """
+    earliest_default = 10
+    earliest_max = 50
+    earliest_template_name = 'doctors/partials/earliest_slots.html'
+
+    def get_scope_doctors(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        if 'earliest' not in request.GET:
+            return super().get(request, *args, **kwargs)
+
+        from apps.appointments.availability import earliest_slots
+
+        self.object = self.get_object()
+        limit = request.GET.get('earliest', '')
+        limit = int(limit) if limit.isdigit() and int(limit) > 0 else self.earliest_default
+        limit = min(limit, self.earliest_max)
+
+        doctors = self.get_scope_doctors().select_related('user', 'specialization', 'clinic').in_bulk()
+        slots = [
+            {'doctor': doctors[doctor_id], 'start': start}
+            for start, doctor_id in earliest_slots(doctors, limit)
+        ]
+
+        if request.htmx:
+            return render(request, self.earliest_template_name, {'slots': slots})
+
+        return JsonResponse({
+            'slots': [
+                {
+                    'doctor_id': slot['doctor'].pk,
+                    'doctor_name': slot['doctor'].user.get_full_name(),
+                    'date': slot['start'].date().isoformat(),
+                    'time': slot['start'].strftime('%H:%M'),
+                }
+                for slot in slots
+            ]
+        })
+
+
+class CachedResultsMixin:
+    """
+    Serves a ListView's results from the query-result cache
+
+    The view's filtering/ordering lives in ``build_queryset()``; what gets
+    cached is ``compute_results()`` (by default the ordered primary keys) under
+    a key made of the language, the normalized GET parameters and the
+    generation of every scope in ``cache_scopes``. Only the objects of the
+    current page are then loaded, from ``get_hydration_queryset()``.
+    """
+    cache_scopes = ()
+
+    def build_queryset(self):
+        raise NotImplementedError
+
+    def get_hydration_queryset(self):
+        raise NotImplementedError
+
+    def get_cache_scopes(self):
+        return self.cache_scopes
+
+    def compute_results(self):
+        return {'ids': list(self.build_queryset().values_list('pk', flat=True))}
+
+    def get_results(self):
+        if not hasattr(self, '_results'):
+            from apps.core import query_cache
+
+            key = query_cache.make_key(
+                self.__class__.__name__, self.request.GET, self.get_cache_scopes(),
+                ignore=(self.page_kwarg,)
+            )
+            self._results = query_cache.get_or_compute(key, self.compute_results)
+        return self._results
+
+    def get_queryset(self):
+        return self.get_results()['ids']
+
+    def hydrate(self, ids):
+        objects = self.get_hydration_queryset().in_bulk(ids)
+        return [objects[pk] for pk in ids if pk in objects]
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator, page, object_list, is_paginated = super().paginate_queryset(queryset, page_size)
+        page.object_list = self.hydrate(list(object_list))
+        return paginator, page, page.object_list, is_paginated
+
+    def get_context_data(self, **kwargs):
+        if self.get_paginate_by(self.object_list) is None:
+            self.object_list = self.hydrate(self.object_list)
+        return super().get_context_data(**kwargs)
+
+
+class KeysetPaginationMixin:
+    """
+    Named sort modes plus keyset pagination for a CachedResultsMixin list view
+
+    ``?order=`` picks one of ``sort_modes`` (unknown values fall back to
+    ``default_sort``; ``sort_aliases`` maps legacy values) and ``?after=``
+    is the cursor returned as ``next_query`` for the following page.
+    """
+    sort_modes = {}
+    sort_aliases = {}
+    default_sort = None
+    cursor_param = 'after'
+    page_size = 12
+
+    def get_sort_name(self):
+        name = self.request.GET.get('order', '')
+        name = self.sort_aliases.get(name, name)
+        return name if name in self.sort_modes else self.default_sort
+
+    def compute_results(self):
+        from utils.pagination import decode_cursor, keyset_slice
+
+        ids, next_cursor = keyset_slice(
+            self.build_queryset(),
+            self.sort_modes[self.get_sort_name()],
+            decode_cursor(self.request.GET.get(self.cursor_param)),
+            self.page_size
+        )
+        return {'ids': ids, 'next_cursor': next_cursor}
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['sort_modes'] = [(name, mode.label) for name, mode in self.sort_modes.items()]
+        context['current_sort'] = self.get_sort_name()
+
+        context['next_query'] = next_query(
+            self.request.GET, self.cursor_param, self.get_results()['next_cursor']
+        )
+        return context
+
+
+class CursorPaginationMixin:
+    """
+    Keyset pagination for a plain ListView (no OFFSET, no COUNT(*))
+
+    ``sort_mode`` is the fixed ordering of ``get_queryset()``; each page is
+    one ``LIMIT`` query continuing after the ``?after=`` cursor, and
+    ``next_query`` feeds the HTMX "load more" button. HTMX requests for a
+    following page render ``partial_template_name`` (just the rows).
+
+    Lists that still display totals set ``count_scopes``: ``totals`` is then
+    ``compute_totals()`` served from the query cache until one of the scopes
+    is bumped (see apps.core.signals).
+    """
+    sort_mode = None
+    cursor_param = 'after'
+    partial_template_name = None
+    count_scopes = ()
+
+    def get_template_names(self):
+        if (self.partial_template_name and self.request.htmx
+                and self.cursor_param in self.request.GET):
+            return [self.partial_template_name]
+        return super().get_template_names()
+
+    def paginate_queryset(self, queryset, page_size):
+        from utils.pagination import decode_cursor, keyset_page
+
+        objects, self.next_cursor = keyset_page(
+            queryset, self.sort_mode,
+            decode_cursor(self.request.GET.get(self.cursor_param)), page_size
+        )
+        return None, None, objects, self.next_cursor is not None
+
+    def get_count_scopes(self):
+        return self.count_scopes
+
+    def compute_totals(self):
+        return {'count': self.object_list.count()}
+
+    def get_totals(self):
+        from apps.core import query_cache
+
+        key = query_cache.make_key(
+            f'{self.__class__.__name__}:totals', self.request.GET, self.get_count_scopes(),
+            ignore=(self.cursor_param,)
+        )
+        return query_cache.get_or_compute(key, self.compute_totals)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_query'] = next_query(
+            self.request.GET, self.cursor_param, getattr(self, 'next_cursor', None)
+        )
+        if self.get_count_scopes():
+            context['totals'] = self.get_totals()
+        return context